@@ -0,0 +1,257 @@
+"""
+Dataset Manifest
+Per-file hashes and media info for incremental dataset processing
+"""
+
+import os
+import argparse
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from landmark_cache import hash_file
+
+MANIFEST_FILE = 'manifest.json'
+PREVIOUS_MANIFEST_FILE = 'manifest.prev.json'
+MANIFEST_VERSION = 1
+
+SUPPORTED_IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp'}
+
+# Side length of the difference hash grid (64-bit hash)
+DHASH_SIZE = 8
+
+
+def load_manifest(path: Path) -> Dict[str, dict]:
+    """
+    Load manifest entries keyed by source path, or {} if missing
+    """
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)['files']
+
+
+def save_manifest(path: Path, files: Dict[str, dict]):
+    """
+    Atomically write manifest entries
+    """
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': MANIFEST_VERSION, 'files': files}, f, indent=1, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _dhash(gray) -> str:
+    """
+    64-bit difference hash of a grayscale image as a hex string
+    """
+    import cv2
+
+    small = cv2.resize(gray, (DHASH_SIZE + 1, DHASH_SIZE), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return f'{value:016x}'
+
+
+def probe_media(file_path: Path) -> dict:
+    """
+    Read media type, resolution, frame count and a perceptual hash
+
+    Videos only decode their first frame.
+    """
+    import cv2
+
+    suffix = file_path.suffix.lower()
+    info = {'media_type': 'image' if suffix in SUPPORTED_IMAGE_EXTENSIONS else 'video'}
+
+    if info['media_type'] == 'image':
+        gray = cv2.imread(str(file_path), cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            return info
+        info['width'], info['height'] = int(gray.shape[1]), int(gray.shape[0])
+        info['frame_count'] = 1
+        info['dhash'] = _dhash(gray)
+    else:
+        cap = cv2.VideoCapture(str(file_path))
+        info['width'] = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        info['height'] = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        info['frame_count'] = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        ret, frame = cap.read()
+        if ret:
+            info['dhash'] = _dhash(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+        cap.release()
+
+    return info
+
+
+def build_entry(file_path: Path, previous: Optional[dict] = None) -> dict:
+    """
+    Build a manifest entry, reusing `previous` if size and mtime are unchanged
+    """
+    stat = file_path.stat()
+    if (previous is not None and
+            previous.get('size') == stat.st_size and
+            previous.get('mtime_ns') == stat.st_mtime_ns):
+        return previous
+
+    entry = {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': hash_file(file_path)
+    }
+    entry.update(probe_media(file_path))
+    return entry
+
+
+def update_manifest(files: List[Tuple[str, Path, str, str]], previous: Dict[str, dict],
+                    workers: int = 8) -> Tuple[Dict[str, dict], int]:
+    """
+    Build manifest entries for (key, source path, label, staged path) tuples
+
+    Only files that are new or whose size/mtime changed are hashed and probed.
+
+    Returns:
+        Tuple of (manifest entries, number of files that were re-read)
+    """
+    def build(item):
+        key, file_path, label, staged = item
+        entry = dict(build_entry(file_path, previous.get(key)))
+        entry['label'] = label
+        entry['staged'] = staged
+        return key, entry
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        entries = dict(executor.map(build, files))
+
+    reread = sum(1 for key, entry in entries.items()
+                 if previous.get(key, {}).get('mtime_ns') != entry['mtime_ns']
+                 or previous.get(key, {}).get('size') != entry['size'])
+    return entries, reread
+
+
+def staged_hashes(dataset_path: Path) -> Dict[str, str]:
+    """
+    Map staged relative paths to their manifest SHA-256
+
+    Entries are only trusted while the staged file's size and mtime still
+    match the manifest, so extraction can skip re-hashing unchanged files.
+    """
+    hashes = {}
+    for entry in load_manifest(dataset_path / MANIFEST_FILE).values():
+        try:
+            stat = (dataset_path / entry['staged']).stat()
+        except (KeyError, OSError):
+            continue
+        if stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime_ns']:
+            hashes[entry['staged']] = entry['sha256']
+    return hashes
+
+
+def diff_manifests(old: Dict[str, dict], new: Dict[str, dict]) -> dict:
+    """
+    List added, removed and modified files between two manifests
+    """
+    old_keys = set(old)
+    new_keys = set(new)
+    return {
+        'added': sorted(new_keys - old_keys),
+        'removed': sorted(old_keys - new_keys),
+        'modified': sorted(key for key in old_keys & new_keys
+                           if old[key].get('sha256') != new[key].get('sha256'))
+    }
+
+
+def find_duplicates(files: Dict[str, dict], max_distance: int = 4) -> dict:
+    """
+    Find exact and near-duplicate files across different labels
+
+    Exact duplicates share a SHA-256. Near duplicates have perceptual hashes
+    within `max_distance` bits; candidates are found by splitting each 64-bit
+    hash into max_distance + 1 bands, at least one of which must match
+    exactly (pigeonhole), so not every pair is compared.
+    """
+    by_hash = {}
+    for key, entry in files.items():
+        by_hash.setdefault(entry.get('sha256'), []).append(key)
+
+    exact = [
+        sorted(keys) for keys in by_hash.values()
+        if len(keys) > 1 and len({files[key]['label'] for key in keys}) > 1
+    ]
+
+    hashed = [(key, int(entry['dhash'], 16)) for key, entry in files.items() if entry.get('dhash')]
+    num_bands = max_distance + 1
+    band_bits = 64 // num_bands
+
+    buckets = {}
+    for key, value in hashed:
+        for band in range(num_bands):
+            band_value = (value >> (band * band_bits)) & ((1 << band_bits) - 1)
+            buckets.setdefault((band, band_value), []).append((key, value))
+
+    near = set()
+    for members in buckets.values():
+        for i in range(len(members)):
+            for j in range(i + 1, len(members)):
+                (key_a, hash_a), (key_b, hash_b) = members[i], members[j]
+                if (files[key_a]['label'] == files[key_b]['label'] or
+                        files[key_a].get('sha256') == files[key_b].get('sha256')):
+                    continue
+                distance = bin(hash_a ^ hash_b).count('1')
+                if distance <= max_distance:
+                    near.add((min(key_a, key_b), max(key_a, key_b), distance))
+
+    return {
+        'exact': exact,
+        'near': [
+            {'files': [key_a, key_b], 'labels': [files[key_a]['label'], files[key_b]['label']],
+             'distance': distance}
+            for key_a, key_b, distance in sorted(near)
+        ]
+    }
+
+
+def print_diff(diff: dict, limit: int = 20):
+    """
+    Print a manifest diff summary
+    """
+    print(f"Added: {len(diff['added'])}, removed: {len(diff['removed'])}, modified: {len(diff['modified'])}")
+    for change in ['added', 'removed', 'modified']:
+        for key in diff[change][:limit]:
+            print(f"  {change[0].upper()} {key}")
+        if len(diff[change]) > limit:
+            print(f"  ... {len(diff[change]) - limit} more {change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare dataset manifests or find duplicates')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    diff_parser = subparsers.add_parser('diff', help='List changes between two manifests')
+    diff_parser.add_argument('--old', type=str, required=True, help='Previous manifest')
+    diff_parser.add_argument('--new', type=str, required=True, help='Current manifest')
+
+    dup_parser = subparsers.add_parser('duplicates', help='Find duplicate files across letters')
+    dup_parser.add_argument('--manifest', type=str, required=True, help='Manifest to check')
+    dup_parser.add_argument('--max-distance', type=int, default=4, help='Max perceptual hash distance in bits')
+
+    args = parser.parse_args()
+
+    if args.command == 'diff':
+        print_diff(diff_manifests(load_manifest(Path(args.old)), load_manifest(Path(args.new))), limit=1000000)
+        return
+
+    duplicates = find_duplicates(load_manifest(Path(args.manifest)), args.max_distance)
+    print(f"Exact duplicates across letters: {len(duplicates['exact'])}")
+    for keys in duplicates['exact']:
+        print(f"  {', '.join(keys)}")
+    print(f"Near duplicates across letters: {len(duplicates['near'])}")
+    for pair in duplicates['near']:
+        print(f"  {pair['files'][0]} ({pair['labels'][0]}) ~ {pair['files'][1]} ({pair['labels'][1]}) "
+              f"distance {pair['distance']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,54 +4,277 @@ Exports trained Keras model to TensorFlow.js format
 """
 
 import argparse
+import gzip
 import json
+import shutil
+import tempfile
+import time
+import numpy as np
 from pathlib import Path
+from typing import Optional
 import tensorflow as tf
+from tensorflow import keras
+from tensorflow.keras import layers
 import tensorflowjs as tfjs
+from numpy_inference import fold_layers, layer_spec, weight_key
+from features import compute_features, load_feature_spec
+from landmark_store import handedness_canonicalized
 
+QUANTIZATION_DTYPES = ['float16', 'uint8']
 
-def export_model(input_path: Path, output_path: Path):
+
+def fold_batch_norm(model: keras.Model) -> keras.Model:
+    """
+    Build an equivalent inference model with BatchNormalization folded away
+
+    In create_model() each BatchNormalization follows a ReLU, so it is an
+    affine map on the next Dense layer's input and is folded into that
+    layer's kernel and bias (see numpy_inference.fold_layers). Dropout is an
+    identity at inference and is dropped.
+    """
+    specs = []
+    for layer in model.layers:
+        weights = {weight_key(weight.name): weight.numpy() for weight in layer.weights}
+        spec = layer_spec(type(layer).__name__, layer.get_config(), weights)
+        if spec is not None:
+            specs.append(spec)
+
+    folded_specs = fold_layers(specs)
+
+    folded = keras.Sequential(
+        [layers.Input(shape=model.input_shape[1:])] +
+        [layers.Dense(spec['kernel'].shape[1], activation=spec['activation']) for spec in folded_specs],
+        name=f'{model.name}_folded'
+    )
+    dense_layers = [layer for layer in folded.layers if isinstance(layer, layers.Dense)]
+    for layer, spec in zip(dense_layers, folded_specs):
+        layer.set_weights([spec['kernel'], spec['bias']])
+
+    return folded
+
+
+def prune_dense_weights(model: keras.Model, sparsity: float) -> keras.Model:
+    """
+    Magnitude-prune Dense kernels
+
+    The smallest `sparsity` fraction of each Dense kernel (by absolute value)
+    is set to zero. Zeroed weights do not shrink the raw shards but compress
+    well when the model is served gzipped.
+    """
+    pruned = keras.models.clone_model(model)
+    pruned.set_weights(model.get_weights())
+
+    for layer in pruned.layers:
+        if not isinstance(layer, layers.Dense):
+            continue
+        kernel, bias = layer.get_weights()
+        threshold = np.quantile(np.abs(kernel), sparsity)
+        kernel = np.where(np.abs(kernel) < threshold, 0.0, kernel).astype(kernel.dtype)
+        layer.set_weights([kernel, bias])
+
+    return pruned
+
+
+def save_tfjs(model: keras.Model, output_path: Path, quantize: Optional[str] = None):
+    """
+    Save a Keras model as TensorFlow.js artifacts, optionally quantized
+    """
+    quantization_dtype_map = {quantize: True} if quantize else None
+    tfjs.converters.save_keras_model(
+        model, str(output_path), quantization_dtype_map=quantization_dtype_map
+    )
+
+
+def artifact_size(output_path: Path) -> dict:
+    """
+    Total raw and gzipped size of model.json and its weight shards
+    """
+    raw = 0
+    gzipped = 0
+    for file_path in [output_path / 'model.json', *sorted(output_path.glob('*.bin'))]:
+        data = file_path.read_bytes()
+        raw += len(data)
+        gzipped += len(gzip.compress(data))
+    return {'bytes': raw, 'gzip_bytes': gzipped}
+
+
+def measure_load_time(output_path: Path, repeats: int = 3) -> float:
+    """
+    Best-of-N time in milliseconds to parse and load TensorFlow.js artifacts
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        tfjs.converters.load_keras_model(str(output_path / 'model.json'))
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def evaluate_accuracy(model: keras.Model, X: np.ndarray, y: np.ndarray) -> float:
+    """
+    Top-1 accuracy of a model on encoded labels
+    """
+    predictions = model.predict(np.asarray(X, dtype=np.float32), batch_size=1024, verbose=0)
+    return float(np.mean(np.argmax(predictions, axis=1) == y))
+
+
+def load_holdout(data_path: Path, model_dir: Path):
+    """
+    Rebuild the held-out test split used by train_model()
+    """
+    from train_model import load_data, split_indices
+
+    with open(model_dir / 'label_mapping.json', 'r', encoding='utf-8') as f:
+        label_mapping = json.load(f)
+    codes = {label: int(index) for index, label in label_mapping.items()}
+
+    sample_filter = {}
+    metadata_path = model_dir / 'model_metadata.json'
+    if metadata_path.exists():
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            sample_filter = json.load(f).get('sample_filter', {})
+
+    X, y, groups = load_data(data_path, **sample_filter, return_groups=True)
+    y_encoded = np.array([codes[label] for label in y])
+    _, test_idx = split_indices(y_encoded, groups if X.ndim == 3 else None)
+
+    spec = load_feature_spec(model_dir)
+    if handedness_canonicalized(data_path) != spec['canonicalize_handedness']:
+        print(f"Warning: {data_path} and the model disagree on canonicalized handedness, "
+              f"the hold-out accuracy will not match training")
+
+    X_test = np.asarray(X[test_idx])
+    if X_test.ndim == 2:
+        X_test = compute_features(X_test, spec)
+    return X_test, y_encoded[test_idx]
+
+
+def export_report(model: keras.Model, original: keras.Model, variant_name: str,
+                  X_test: Optional[np.ndarray], y_test: Optional[np.ndarray]) -> list:
+    """
+    Compare artifact size, load time and accuracy across quantization variants
+
+    The original float32 model is the baseline; the exported model is measured
+    with no quantization, float16 and uint8 weights.
+    """
+    baseline_accuracy = None
+    if X_test is not None:
+        baseline_accuracy = evaluate_accuracy(original, X_test, y_test)
+
+    candidates = [('original', original, None)]
+    for quantize in [None] + QUANTIZATION_DTYPES:
+        candidates.append((f"{variant_name}-{quantize or 'float32'}", model, quantize))
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, candidate, quantize in candidates:
+            variant_path = Path(tmp_dir) / name
+            variant_path.mkdir()
+            save_tfjs(candidate, variant_path, quantize)
+
+            row = {'variant': name, **artifact_size(variant_path), 'load_ms': measure_load_time(variant_path)}
+
+            if X_test is not None:
+                # Reload from the artifacts so quantization error is included
+                reloaded = tfjs.converters.load_keras_model(str(variant_path / 'model.json'))
+                row['accuracy'] = evaluate_accuracy(reloaded, X_test, y_test)
+                row['accuracy_delta'] = row['accuracy'] - baseline_accuracy
+
+            rows.append(row)
+
+    print("\nExport report:")
+    print(f"{'Variant':<28}{'Size (KB)':>12}{'Gzip (KB)':>12}{'Load (ms)':>12}{'Accuracy':>10}{'Delta':>10}")
+    for row in rows:
+        accuracy = f"{row['accuracy']:.4f}" if 'accuracy' in row else '-'
+        delta = f"{row['accuracy_delta']:+.4f}" if 'accuracy_delta' in row else '-'
+        print(f"{row['variant']:<28}{row['bytes'] / 1024:>12.1f}{row['gzip_bytes'] / 1024:>12.1f}"
+              f"{row['load_ms']:>12.1f}{accuracy:>10}{delta:>10}")
+
+    return rows
+
+
+def export_model(input_path: Path, output_path: Path, quantize: Optional[str] = None,
+                 prune: float = 0.0, fold_bn: bool = False,
+                 data_path: Optional[Path] = None, report: bool = False):
     """
     Export model to TensorFlow.js format
+
+    Args:
+        quantize: None for float32 weights, or 'float16' / 'uint8'
+        prune: Fraction of each Dense kernel to zero by magnitude
+        fold_bn: Fold BatchNormalization into the Dense layers
+        data_path: Landmark data used to measure held-out accuracy
+        report: Write export_report.json next to the exported model, comparing
+                variants to model.h5
     """
     print("=" * 60)
     print("Model Export to TensorFlow.js")
     print("=" * 60)
-    
+
     # Load model
     model_path = input_path / 'model.h5'
     if not model_path.exists():
         raise ValueError(f"Model file not found: {model_path}")
-    
+
     print(f"Loading model from {model_path}...")
-    model = tf.keras.models.load_model(model_path)
-    
+    original = tf.keras.models.load_model(model_path)
+    model = original
+
+    # Optional graph and weight transforms
+    variant_parts = []
+    if fold_bn:
+        print("\nFolding BatchNormalization into Dense layers...")
+        model = fold_batch_norm(model)
+        variant_parts.append('folded')
+    if prune > 0:
+        print(f"\nPruning {prune:.0%} of Dense weights by magnitude...")
+        model = prune_dense_weights(model, prune)
+        variant_parts.append(f'pruned{int(prune * 100)}')
+    variant_name = '+'.join(variant_parts) or 'exported'
+
     print("\nModel architecture:")
     model.summary()
-    
+
     # Create output directory
     output_path.mkdir(parents=True, exist_ok=True)
-    
+
     # Export to TensorFlow.js
-    print(f"\nExporting to TensorFlow.js format...")
-    tfjs.converters.save_keras_model(model, str(output_path))
-    
+    print(f"\nExporting to TensorFlow.js format ({quantize or 'float32'} weights)...")
+    save_tfjs(model, output_path, quantize)
+
     print(f"Model exported to {output_path}")
-    
+
     # Copy metadata and label mapping
     metadata_path = input_path / 'model_metadata.json'
     label_mapping_path = input_path / 'label_mapping.json'
-    
+
     if metadata_path.exists():
-        import shutil
         shutil.copy2(metadata_path, output_path / 'model_metadata.json')
         print(f"Metadata copied to {output_path / 'model_metadata.json'}")
-    
+
     if label_mapping_path.exists():
-        import shutil
         shutil.copy2(label_mapping_path, output_path / 'label_mapping.json')
         print(f"Label mapping copied to {output_path / 'label_mapping.json'}")
-    
+
+    # The browser computes its model inputs from this spec (src/ml/features.ts)
+    spec = load_feature_spec(input_path)
+    with open(output_path / 'feature_spec.json', 'w', encoding='utf-8') as f:
+        json.dump(spec, f, indent=2)
+    print(f"Feature spec ({spec['name']}) written to {output_path / 'feature_spec.json'}")
+
+    # Compare variants against the original model
+    if report:
+        X_test, y_test = (None, None)
+        if data_path is not None:
+            X_test, y_test = load_holdout(data_path, input_path)
+
+        rows = export_report(model, original, variant_name, X_test, y_test)
+        report_path = output_path / 'export_report.json'
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump({'exported': {'quantize': quantize, 'prune': prune, 'fold_bn': fold_bn},
+                       'variants': rows}, f, indent=2)
+        print(f"Export report saved to {report_path}")
+
     print("\n" + "=" * 60)
     print("Export completed successfully!")
     print(f"TensorFlow.js model saved to: {output_path}")
@@ -65,13 +288,26 @@ def main():
     parser = argparse.ArgumentParser(description='Export model to TensorFlow.js')
     parser.add_argument('--input', type=str, required=True, help='Input directory (trained model)')
     parser.add_argument('--output', type=str, default='../public/model', help='Output directory')
-    
+    parser.add_argument('--quantize', type=str, default=None, choices=QUANTIZATION_DTYPES,
+                        help='Weight quantization dtype')
+    parser.add_argument('--prune', type=float, default=0.0, help='Fraction of Dense weights to prune by magnitude')
+    parser.add_argument('--fold-bn', action='store_true', help='Fold BatchNormalization into Dense layers')
+    parser.add_argument('--report', action='store_true', help='Compare size, load time and accuracy of variants')
+    parser.add_argument('--data', type=str, default=None, help='Landmark data for held-out accuracy in the report')
+
     args = parser.parse_args()
-    
+
     input_path = Path(args.input)
     output_path = Path(args.output)
-    
-    export_model(input_path, output_path)
+
+    export_model(
+        input_path, output_path,
+        quantize=args.quantize,
+        prune=args.prune,
+        fold_bn=args.fold_bn,
+        data_path=Path(args.data) if args.data else None,
+        report=args.report
+    )
 
 
 if __name__ == '__main__':
@@ -6,118 +6,590 @@ Extracts hand landmarks from images/videos using MediaPipe
 import os
 import argparse
 import json
+import multiprocessing as mp_proc
+import time
 import cv2
 import numpy as np
-import pandas as pd
 from pathlib import Path
-from typing import List, Tuple, Optional
+from functools import partial
+from typing import Iterable, Iterator, List, Tuple, Optional
 import mediapipe as mp
+from features import (
+    HANDEDNESS_LABELS, UNKNOWN_HANDEDNESS, canonicalize_handedness, handedness_code, normalize_landmarks
+)
+from landmark_cache import LandmarkCache
+from dataset_manifest import staged_hashes
+from landmark_store import LandmarkCsvWriter, LandmarkStoreWriter, reorder_sources
+from pipeline_metrics import MetricsWriter, peak_rss_mb
+from frame_prefetch import DEFAULT_QUEUE_DEPTH, FramePrefetcher, PrefetchedFile
+from sequence_dataset import DEFAULT_WINDOW, DEFAULT_WINDOW_STRIDE, build_sequence_store
+from frame_sampling import (
+    DEFAULT_SAMPLING, SAMPLING_STRATEGIES, iter_sampled_frames,
+    merge_sampling_stats, new_sampling_stats
+)
 
 # Initialize MediaPipe Hands
 mp_hands = mp.solutions.hands
 mp_drawing = mp.solutions.drawing_utils
 
+SUPPORTED_IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp'}
+SUPPORTED_VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv'}
 
-def extract_landmarks_from_image(image_path: Path, hands) -> Optional[np.ndarray]:
+# MediaPipe Hands settings shared by the serial and parallel paths
+HANDS_CONFIG = {
+    'static_image_mode': True,
+    'max_num_hands': 1,
+    'min_detection_confidence': 0.5,
+    'min_tracking_confidence': 0.5
+}
+
+# How videos are processed: 'static' runs palm detection on every sampled
+# frame with the shared Hands instance; 'tracking' opens a dedicated
+# static_image_mode=False instance per video so MediaPipe tracks the hand
+# between frames and only re-detects when tracking confidence drops below
+# min_tracking_confidence
+VIDEO_MODES = ['static', 'tracking']
+DEFAULT_TRACKING_CONFIDENCE = 0.5
+
+# Decode resolution: images are read at 1/reduce scale with OpenCV's reduced
+# read modes (DCT scaling for JPEG) and video frames are resized by the same
+# factor; the long side is then capped at max_side pixels. MediaPipe landmarks
+# are normalized image coordinates, so they stay comparable across scales.
+DEFAULT_RESOLUTION = {
+    'reduce': 1,        # 1 | 2 | 4 | 8
+    'max_side': None    # cap on the long side in pixels after reduction
+}
+REDUCE_FACTORS = [1, 2, 4, 8]
+
+# Bump when extraction or normalization logic changes so cached results are invalidated
+EXTRACTOR_VERSION = 3
+
+# (landmarks (n, 63), frame indices, handedness codes, handedness scores) for one file
+ExtractResult = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+# Per-process Hands instance used by pool workers
+_worker_hands = None
+
+
+def _detected_hands(results) -> List[Tuple[np.ndarray, int, float]]:
     """
-    Extract hand landmarks from a single image
+    Every hand in a MediaPipe result as (flattened landmarks, handedness code, score)
+    """
+    if not results.multi_hand_landmarks:
+        return []
     
-    Returns:
-        Numpy array of shape (63,) containing flattened landmarks, or None if no hand detected
+    handedness_list = results.multi_handedness or []
+    hands_found = []
+    for i, hand_landmarks in enumerate(results.multi_hand_landmarks):
+        # Extract and flatten landmarks
+        landmarks = []
+        for landmark in hand_landmarks.landmark:
+            landmarks.extend([landmark.x, landmark.y, landmark.z])
+        
+        code, score = UNKNOWN_HANDEDNESS, float('nan')
+        if i < len(handedness_list):
+            classification = handedness_list[i].classification[0]
+            code, score = handedness_code(classification.label), classification.score
+        
+        hands_found.append((np.array(landmarks), code, score))
+    
+    return hands_found
+
+
+def _imread_flag(reduce: int) -> int:
+    """
+    cv2.imread flag decoding a color image at 1/reduce scale
+    """
+    flags = {
+        1: cv2.IMREAD_COLOR,
+        2: cv2.IMREAD_REDUCED_COLOR_2,
+        4: cv2.IMREAD_REDUCED_COLOR_4,
+        8: cv2.IMREAD_REDUCED_COLOR_8
+    }
+    if reduce not in flags:
+        raise ValueError(f"Unsupported reduce factor: {reduce} (choose from {REDUCE_FACTORS})")
+    return flags[reduce]
+
+
+def downscale_frame(frame: np.ndarray, reduce: int = 1, max_side: Optional[int] = None) -> np.ndarray:
+    """
+    Shrink a frame by `reduce` and to at most `max_side` pixels on its long side
+
+    Frames are never upscaled.
     """
-    # Read image
-    image = cv2.imread(str(image_path))
+    height, width = frame.shape[:2]
+    scale = 1.0 / reduce
+    if max_side:
+        scale = min(scale, max_side / max(height, width))
+    if scale >= 1.0:
+        return frame
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+
+def decode_image_frames(image_path: Path, resolution: Optional[dict] = None) -> List[Tuple[int, np.ndarray]]:
+    """
+    Decode an image to a single (0, RGB frame) pair; empty if unreadable
+    """
+    resolution = {**DEFAULT_RESOLUTION, **(resolution or {})}
+    
+    # Read image, reduced during decoding if requested
+    image = cv2.imread(str(image_path), _imread_flag(resolution['reduce']))
     if image is None:
         print(f"Warning: Could not read image {image_path}")
-        return None
+        return []
+    image = downscale_frame(image, 1, resolution['max_side'])
     
     # Convert to RGB
-    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    return [(0, cv2.cvtColor(image, cv2.COLOR_BGR2RGB))]
+
+
+def decode_video_frames(video_path: Path, max_frames: int = 100, sampling: Optional[dict] = None,
+                        stats: Optional[dict] = None,
+                        resolution: Optional[dict] = None) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Yield (frame index, RGB frame) pairs for the frames chosen by the sampling strategy
+
+    Frames are downscaled (see DEFAULT_RESOLUTION) before the RGB conversion.
+    """
+    sampling = {**DEFAULT_SAMPLING, **(sampling or {})}
+    resolution = {**DEFAULT_RESOLUTION, **(resolution or {})}
+    stats = stats if stats is not None else new_sampling_stats()
     
-    # Process with MediaPipe
-    results = hands.process(image_rgb)
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        print(f"Warning: Could not open video {video_path}")
+        return
     
-    if not results.multi_hand_landmarks:
-        return None
+    try:
+        for frame_index, frame in iter_sampled_frames(cap, max_frames, sampling, stats):
+            frame = downscale_frame(frame, resolution['reduce'], resolution['max_side'])
+            yield frame_index, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    finally:
+        cap.release()
+
+
+def decode_file_frames(file_path: Path, stats: dict, max_frames: int = 100,
+                       sampling: Optional[dict] = None,
+                       resolution: Optional[dict] = None) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Decode function for FramePrefetcher: frames of an image or video file
+    """
+    suffix = file_path.suffix.lower()
+    if suffix in SUPPORTED_IMAGE_EXTENSIONS:
+        yield from decode_image_frames(file_path, resolution)
+    elif suffix in SUPPORTED_VIDEO_EXTENSIONS:
+        stats.update(new_sampling_stats())
+        yield from decode_video_frames(file_path, max_frames, sampling, stats, resolution)
+
+
+def extract_landmarks_from_image(image_path: Path, hands,
+                                 frames: Optional[Iterable[Tuple[int, np.ndarray]]] = None,
+                                 resolution: Optional[dict] = None) -> List[Tuple[np.ndarray, int, float]]:
+    """
+    Extract hand landmarks from a single image
+    
+    `frames` are the already decoded frames (see decode_image_frames); the
+    image is read here at `resolution` if they are not given.
     
-    # Get first hand
-    hand_landmarks = results.multi_hand_landmarks[0]
+    Returns:
+        List with one (landmarks of shape (63,), handedness code, handedness
+        score) tuple per detected hand; empty if no hand detected
+    """
+    if frames is None:
+        frames = decode_image_frames(image_path, resolution)
     
-    # Extract and flatten landmarks
-    landmarks = []
-    for landmark in hand_landmarks.landmark:
-        landmarks.extend([landmark.x, landmark.y, landmark.z])
+    frames = list(frames)
+    if not frames:
+        return []
     
-    return np.array(landmarks)
+    # Process with MediaPipe
+    _, image_rgb = frames[0]
+    return _detected_hands(hands.process(image_rgb))
 
 
-def extract_landmarks_from_video(video_path: Path, hands, max_frames: int = 100) -> List[np.ndarray]:
+def extract_landmarks_from_video(video_path: Path, hands, max_frames: int = 100,
+                                 sampling: Optional[dict] = None,
+                                 stats: Optional[dict] = None,
+                                 frame_indices: Optional[List[int]] = None,
+                                 frames: Optional[Iterable[Tuple[int, np.ndarray]]] = None,
+                                 decode_stats: Optional[dict] = None,
+                                 resolution: Optional[dict] = None) -> List[Tuple[np.ndarray, int, float]]:
     """
-    Extract hand landmarks from video frames
-    
+    Extract hand landmarks from sampled video frames
+
+    Only the frames chosen by the sampling strategy are decoded; skipped
+    frames are passed over with grab() or a seek. If `frame_indices` is
+    given, the source frame index of each returned sample is appended to it.
+    `frames` are frames decoded elsewhere (see decode_video_frames), whose
+    decode counters are in `decode_stats`.
+
     Returns:
-        List of landmark arrays
+        List of (landmarks, handedness code, score) tuples, one per detected
+        hand per frame
     """
-    cap = cv2.VideoCapture(str(video_path))
-    landmarks_list = []
+    video_stats = new_sampling_stats()
+    video_stats['videos'] = 1
+    video_stats['process_seconds'] = 0.0
+    video_stats['decode_seconds'] = 0.0
     
-    frame_count = 0
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    if frames is None:
+        frames = decode_video_frames(video_path, max_frames, sampling, video_stats, resolution)
     
-    # Sample frames evenly
-    frame_interval = max(1, total_frames // max_frames)
+    hands_list = []
     
-    while cap.isOpened() and frame_count < max_frames:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        # Skip frames based on interval
-        if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) % frame_interval != 0:
-            continue
-        
-        # Convert to RGB
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    # Time between iterations is spent decoding frames, or waiting for the decode threads
+    tick = time.perf_counter()
+    for frame_index, frame_rgb in frames:
+        video_stats['decode_seconds'] += time.perf_counter() - tick
         
         # Process with MediaPipe
+        start = time.perf_counter()
         results = hands.process(frame_rgb)
+        video_stats['process_seconds'] += time.perf_counter() - start
+        frame_hands = _detected_hands(results)
         
-        if results.multi_hand_landmarks:
-            hand_landmarks = results.multi_hand_landmarks[0]
-            
-            # Extract and flatten landmarks
-            landmarks = []
-            for landmark in hand_landmarks.landmark:
-                landmarks.extend([landmark.x, landmark.y, landmark.z])
-            
-            landmarks_list.append(np.array(landmarks))
-            frame_count += 1
+        if frame_hands:
+            hands_list.extend(frame_hands)
+            video_stats['used'] += 1
+            if frame_indices is not None:
+                frame_indices.extend([frame_index] * len(frame_hands))
+        
+        tick = time.perf_counter()
+    
+    if decode_stats is not None:
+        merge_sampling_stats(video_stats, decode_stats)
+    
+    print(f"  {video_path.name}: decoded {video_stats['decoded']}/{video_stats['total_frames']} frames, "
+          f"used {video_stats['used']}")
     
-    cap.release()
-    return landmarks_list
+    if stats is not None:
+        merge_sampling_stats(stats, video_stats)
+    
+    return hands_list
 
 
-def normalize_landmarks(landmarks: np.ndarray) -> np.ndarray:
+def extract_landmarks_from_video_tracking(video_path: Path, tracking_config: dict, max_frames: int = 100,
+                                          sampling: Optional[dict] = None,
+                                          stats: Optional[dict] = None,
+                                          frame_indices: Optional[List[int]] = None,
+                                          frames: Optional[Iterable[Tuple[int, np.ndarray]]] = None,
+                                          decode_stats: Optional[dict] = None,
+                                          resolution: Optional[dict] = None) -> List[Tuple[np.ndarray, int, float]]:
     """
-    Normalize landmarks relative to wrist (landmark 0)
+    Extract hand landmarks from a video in MediaPipe tracking mode
+
+    A fresh static_image_mode=False Hands instance is used for each video so
+    tracking state never leaks between videos. Sampled frames are fed in
+    increasing frame order, so samples keep their temporal order.
     """
-    # Reshape to (21, 3)
-    landmarks_reshaped = landmarks.reshape(21, 3)
-    
-    # Get wrist position
-    wrist = landmarks_reshaped[0]
-    
-    # Normalize relative to wrist
-    normalized = landmarks_reshaped - wrist
-    
-    # Flatten back
-    return normalized.flatten()
+    hands = mp_hands.Hands(**tracking_config)
+    try:
+        return extract_landmarks_from_video(
+            video_path, hands, max_frames, sampling, stats, frame_indices, frames, decode_stats, resolution
+        )
+    finally:
+        hands.close()
 
 
-def extract_landmarks(input_path: Path, output_path: Path, max_frames_per_video: int = 100):
+def tracking_hands_config(hands_config: dict, min_tracking_confidence: float = DEFAULT_TRACKING_CONFIDENCE) -> dict:
+    """
+    Hands settings for tracking-mode video extraction
+    """
+    return {
+        **hands_config,
+        'static_image_mode': False,
+        'min_tracking_confidence': min_tracking_confidence
+    }
+
+
+def extract_file(file_path: Path, hands, max_frames: int = 100,
+                 sampling: Optional[dict] = None, stats: Optional[dict] = None,
+                 tracking_config: Optional[dict] = None,
+                 prefetched: Optional[PrefetchedFile] = None,
+                 resolution: Optional[dict] = None) -> ExtractResult:
+    """
+    Extract normalized landmarks from a single image or video file
+
+    Every detected hand becomes its own sample. With a `tracking_config`
+    videos are processed in tracking mode (see VIDEO_MODES) instead of with
+    the shared `hands` instance. With `prefetched`, frames come from a
+    FramePrefetcher decode thread instead of being decoded here at
+    `resolution` (see DEFAULT_RESOLUTION).
+
+    Returns:
+        Tuple of (landmarks of shape (n, 63), frame index, handedness code and
+        handedness score of each sample); n is 0 if no hand was detected
+    """
+    suffix = file_path.suffix.lower()
+    frame_indices = []
+    frames = prefetched.frames() if prefetched is not None else None
+    decode_stats = prefetched.stats if prefetched is not None else None
+
+    if suffix in SUPPORTED_IMAGE_EXTENSIONS:
+        hands_list = extract_landmarks_from_image(file_path, hands, frames, resolution)
+        frame_indices = [0] * len(hands_list)
+    elif suffix in SUPPORTED_VIDEO_EXTENSIONS and tracking_config is not None:
+        hands_list = extract_landmarks_from_video_tracking(
+            file_path, tracking_config, max_frames, sampling, stats, frame_indices, frames, decode_stats,
+            resolution
+        )
+    elif suffix in SUPPORTED_VIDEO_EXTENSIONS:
+        hands_list = extract_landmarks_from_video(
+            file_path, hands, max_frames, sampling, stats, frame_indices, frames, decode_stats, resolution
+        )
+    else:
+        hands_list = []
+
+    if not hands_list:
+        return (np.empty((0, 63)), np.empty(0, dtype=np.int64),
+                np.empty(0, dtype=np.int8), np.empty(0, dtype=np.float32))
+
+    landmarks, handedness, scores = zip(*hands_list)
+    return (
+        normalize_landmarks(np.stack(landmarks)),
+        np.asarray(frame_indices, dtype=np.int64),
+        np.asarray(handedness, dtype=np.int8),
+        np.asarray(scores, dtype=np.float32)
+    )
+
+
+def extractor_settings(max_frames: int, sampling: Optional[dict] = None,
+                       hands_config: Optional[dict] = None, tracking_config: Optional[dict] = None,
+                       resolution: Optional[dict] = None) -> dict:
+    """
+    Settings that determine extraction output, used to key the landmark cache
+    """
+    settings = {
+        'extractor_version': EXTRACTOR_VERSION,
+        'mediapipe_version': getattr(mp, '__version__', 'unknown'),
+        'max_frames': max_frames,
+        'sampling': {**DEFAULT_SAMPLING, **(sampling or {})},
+        'video_tracking': tracking_config,
+        **(hands_config or HANDS_CONFIG)
+    }
+    # Only non-default resolutions are recorded, so existing cache entries stay valid
+    resolution = {**DEFAULT_RESOLUTION, **(resolution or {})}
+    if resolution != DEFAULT_RESOLUTION:
+        settings['decode_resolution'] = resolution
+    return settings
+
+
+def compare_video_modes(video_files: List[Path], hands_config: dict, tracking_config: dict,
+                        max_frames: int = 100, sampling: Optional[dict] = None) -> dict:
+    """
+    Measure MediaPipe per-frame cost of static vs tracking mode on the same videos
+
+    Only time spent in Hands.process() is counted, so decoding is excluded.
+    """
+    report = {}
+    for mode in VIDEO_MODES:
+        stats = new_sampling_stats()
+        if mode == 'static':
+            hands = mp_hands.Hands(**{**hands_config, 'static_image_mode': True})
+            for video_path in video_files:
+                extract_landmarks_from_video(video_path, hands, max_frames, sampling, stats)
+            hands.close()
+        else:
+            for video_path in video_files:
+                extract_landmarks_from_video_tracking(video_path, tracking_config, max_frames, sampling, stats)
+
+        process_seconds = stats.get('process_seconds', 0.0)
+        report[mode] = {
+            'frames': stats['decoded'],
+            'used': stats['used'],
+            'process_seconds': process_seconds,
+            'ms_per_frame': 1000 * process_seconds / stats['decoded'] if stats['decoded'] else 0.0
+        }
+
+    if report['static']['ms_per_frame'] > 0:
+        report['cost_reduction'] = 1 - report['tracking']['ms_per_frame'] / report['static']['ms_per_frame']
+    return report
+
+
+def _init_worker(hands_config: dict):
+    """
+    Pool initializer: build one MediaPipe Hands instance per worker process
+    """
+    global _worker_hands
+    _worker_hands = mp_hands.Hands(**hands_config)
+
+
+def _timed_extract(file_path: Path, hands, max_frames: int, sampling: dict,
+                   tracking_config: Optional[dict],
+                   prefetched: Optional[PrefetchedFile] = None,
+                   resolution: Optional[dict] = None) -> Tuple[ExtractResult, dict]:
+    """
+    Extract a single file and collect its frame counters and wall time
+    """
+    stats = new_sampling_stats()
+    start = time.perf_counter()
+    result = extract_file(file_path, hands, max_frames, sampling, stats, tracking_config, prefetched, resolution)
+    stats['extract_seconds'] = time.perf_counter() - start
+    return result, stats
+
+
+def _extract_task(file_path: Path, max_frames: int, sampling: dict,
+                  tracking_config: Optional[dict], resolution: Optional[dict]) -> Tuple[ExtractResult, dict]:
+    """
+    Pool task: extract a single file with the worker's Hands instance
+    """
+    return _timed_extract(file_path, _worker_hands, max_frames, sampling, tracking_config, None, resolution)
+
+
+def _extract_parallel(files: List[Path], max_frames: int, sampling: dict, stats: dict, workers: int,
+                      task_timeout: float, max_retries: int,
+                      hands_config: dict,
+                      tracking_config: Optional[dict] = None,
+                      file_stats: Optional[List[Optional[dict]]] = None,
+                      resolution: Optional[dict] = None) -> Tuple[List[Optional[ExtractResult]], List[Path]]:
+    """
+    Extract files across a process pool
+
+    Results are returned in the same order as `files`. A task that raises,
+    hangs past `task_timeout` or dies with its worker is retried in a fresh
+    pool up to `max_retries` times and then skipped. If `file_stats` is
+    given it is filled with each file's counters (None for skipped files).
+
+    Returns:
+        Tuple of (per-file results, None for skipped files; skipped files)
+    """
+    results: List[Optional[ExtractResult]] = [None] * len(files)
+    if file_stats is not None:
+        file_stats[:] = [None] * len(files)
+    pending = list(range(len(files)))
+
+    for attempt in range(max_retries + 1):
+        if not pending:
+            break
+
+        if attempt > 0:
+            print(f"\nRetrying {len(pending)} failed file(s) (attempt {attempt + 1}/{max_retries + 1})")
+
+        failed = []
+        # Leaving the context terminates the pool, which also kills hung workers
+        with mp_proc.Pool(workers, initializer=_init_worker, initargs=(hands_config,)) as pool:
+            async_results = {
+                i: pool.apply_async(_extract_task, (files[i], max_frames, sampling, tracking_config, resolution))
+                for i in pending
+            }
+
+            # Collect in submission order so the output matches a serial run
+            for i in pending:
+                try:
+                    results[i], task_stats = async_results[i].get(timeout=task_timeout)
+                    merge_sampling_stats(stats, task_stats)
+                    if file_stats is not None:
+                        file_stats[i] = task_stats
+                except mp_proc.TimeoutError:
+                    print(f"Warning: Timed out after {task_timeout}s: {files[i]}")
+                    failed.append(i)
+                except Exception as e:
+                    print(f"Warning: Worker failed on {files[i]}: {e}")
+                    failed.append(i)
+
+        pending = failed
+
+    skipped = [files[i] for i in pending]
+    return results, skipped
+
+
+def _checkpoint_path(output_path: Path, output_format: str) -> Path:
+    """
+    Location of the resume checkpoint for an output
+    """
+    if output_format == 'csv':
+        return output_path.with_name(output_path.name + '.checkpoint.json')
+    return output_path / 'checkpoint.json'
+
+
+def _load_checkpoint(checkpoint_path: Path, settings: dict, output_format: str) -> Optional[dict]:
+    """
+    Load a resume checkpoint if it matches the current settings
+    """
+    if not checkpoint_path.exists():
+        print("No checkpoint found, starting from the beginning")
+        return None
+
+    with open(checkpoint_path, 'r', encoding='utf-8') as f:
+        checkpoint = json.load(f)
+
+    if checkpoint.get('settings') != json.loads(json.dumps(settings)) or checkpoint.get('format') != output_format:
+        print("Warning: Checkpoint was written with different settings, starting from the beginning")
+        return None
+
+    return checkpoint
+
+
+def _save_checkpoint(checkpoint_path: Path, checkpoint: dict):
+    """
+    Atomically write a resume checkpoint
+    """
+    tmp_path = checkpoint_path.with_name(checkpoint_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, ensure_ascii=False)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def extract_landmarks(input_path: Path, output_path: Path, max_frames_per_video: int = 100,
+                      workers: int = 1, task_timeout: float = 600.0, max_retries: int = 1,
+                      cache_dir: Optional[Path] = None, cache_max_size_mb: Optional[float] = None,
+                      clear_cache: bool = False, sampling: Optional[dict] = None,
+                      output_format: Optional[str] = None, chunk_size: int = 256,
+                      resume: bool = False, max_hands: int = 1, canonicalize: bool = False,
+                      video_mode: str = 'static', tracking_confidence: float = DEFAULT_TRACKING_CONFIDENCE,
+                      compare_video_modes_count: int = 0, sequence_path: Optional[Path] = None,
+                      sequence_window: int = DEFAULT_WINDOW, sequence_stride: int = DEFAULT_WINDOW_STRIDE,
+                      decode_threads: int = 0, queue_depth: int = DEFAULT_QUEUE_DEPTH,
+                      resolution: Optional[dict] = None,
+                      metrics: Optional[MetricsWriter] = None):
     """
     Extract landmarks from all files in the dataset
+
+    With workers > 1 files are spread across a process pool; the output is
+    identical to a serial run over the same inputs. With a cache_dir, files
+    whose content and extractor settings are unchanged are served from the
+    landmark cache and only new or modified files are extracted. `sampling`
+    overrides DEFAULT_SAMPLING for video frame selection.
+
+    The output is a binary landmark store directory (see landmark_store.py)
+    unless output_format is 'csv' or the output path ends in .csv.
+
+    Files are processed in chunks of `chunk_size`; each chunk is written to
+    the output and recorded in a checkpoint before the next one starts, so
+    memory stays bounded and `resume=True` continues an interrupted run.
+    Files skipped by an earlier run are appended when retried; once no
+    skipped files remain, a store is rewritten in metadata order so it
+    matches an uninterrupted run. A CSV has no source column and keeps the
+    retried files at the end.
+
+    Up to `max_hands` hands are extracted per image or frame, each stored
+    with its handedness label and score. With `canonicalize=True` left hands
+    are mirrored into right-hand space when written (the cache keeps the
+    original landmarks).
+
+    `video_mode='tracking'` extracts videos with a per-video tracking-mode
+    Hands instance that re-detects only when tracking confidence falls below
+    `tracking_confidence`. `compare_video_modes_count` videos are then also
+    run in both modes to report the per-frame cost difference.
+
+    With a `sequence_path`, windows of `sequence_window` frames are also
+    built from the landmark store (see sequence_dataset.py).
+
+    With `decode_threads` > 0 (serial runs only), images and video frames
+    are decoded on a thread pool into per-file queues of `queue_depth`
+    frames while MediaPipe processes earlier ones (see frame_prefetch.py).
+
+    `resolution` decodes images and video frames at reduced scale before
+    detection (see DEFAULT_RESOLUTION); it is part of the cache key.
+
+    With a `metrics` writer a record is emitted per file (wall time, frames
+    decoded and used, decode vs MediaPipe time), per chunk (files/sec,
+    memory high-water mark) and for the whole run (hit rates and totals).
     """
+    if output_format is None:
+        output_format = 'csv' if output_path.suffix.lower() == '.csv' else 'store'
+    
     print("=" * 60)
     print("Landmark Extraction")
     print("=" * 60)
@@ -130,82 +602,372 @@ def extract_landmarks(input_path: Path, output_path: Path, max_frames_per_video:
     with open(metadata_path, 'r', encoding='utf-8') as f:
         metadata = json.load(f)
     
-    # Initialize MediaPipe Hands
-    hands = mp_hands.Hands(
-        static_image_mode=True,
-        max_num_hands=1,
-        min_detection_confidence=0.5,
-        min_tracking_confidence=0.5
-    )
-    
-    # Prepare data storage
-    all_landmarks = []
-    all_labels = []
-    
-    # Process each label
-    for label, files in metadata['dataset'].items():
-        print(f"\nProcessing label: {label}")
-        
-        for file_rel_path in files:
+    # Collect files in metadata order
+    file_labels = []
+    files = []
+    for label, label_files in metadata['dataset'].items():
+        for file_rel_path in label_files:
             file_path = input_path / file_rel_path
             
             if not file_path.exists():
                 print(f"Warning: File not found: {file_path}")
                 continue
             
-            # Check file type
-            if file_path.suffix.lower() in ['.jpg', '.jpeg', '.png', '.bmp', '.webp']:
-                # Image file
-                landmarks = extract_landmarks_from_image(file_path, hands)
-                if landmarks is not None:
-                    normalized = normalize_landmarks(landmarks)
-                    all_landmarks.append(normalized)
-                    all_labels.append(label)
-            
-            elif file_path.suffix.lower() in ['.mp4', '.avi', '.mov', '.mkv']:
-                # Video file
-                landmarks_list = extract_landmarks_from_video(file_path, hands, max_frames_per_video)
-                for landmarks in landmarks_list:
-                    normalized = normalize_landmarks(landmarks)
-                    all_landmarks.append(normalized)
-                    all_labels.append(label)
-        
-        print(f"Extracted {sum(1 for l in all_labels if l == label)} samples for '{label}'")
+            file_labels.append(label)
+            files.append(file_path)
+    
+    file_keys = [file_path.relative_to(input_path).as_posix() for file_path in files]
+    hands_config = {**HANDS_CONFIG, 'max_num_hands': max_hands}
+    tracking_config = tracking_hands_config(hands_config, tracking_confidence) if video_mode == 'tracking' else None
+    settings = extractor_settings(max_frames_per_video, sampling, hands_config, tracking_config, resolution)
+    output_settings = {**settings, 'canonicalize_handedness': canonicalize}
+    sampling = {**DEFAULT_SAMPLING, **(sampling or {})}
+    
+    # Resume from checkpoint
+    checkpoint_path = _checkpoint_path(output_path, output_format)
+    checkpoint = _load_checkpoint(checkpoint_path, output_settings, output_format) if resume else None
+    
+    completed = checkpoint['completed'] if checkpoint else []
+    class_counts = checkpoint['class_counts'] if checkpoint else {}
+    hand_counts = checkpoint['hand_counts'] if checkpoint else {}
+    completed_set = set(completed)
+    pending = [i for i in range(len(files)) if file_keys[i] not in completed_set]
     
-    hands.close()
+    if checkpoint:
+        print(f"Resuming: {len(completed)} files already done, {len(pending)} remaining")
+    last_completed = max((i for i in range(len(files)) if file_keys[i] in completed_set), default=-1)
+    retried_out_of_order = any(i < last_completed for i in pending)
     
-    # Convert to DataFrame
-    landmark_columns = [f'{axis}{i}' for i in range(21) for axis in ['x', 'y', 'z']]
-    df = pd.DataFrame(all_landmarks, columns=landmark_columns)
-    df.insert(0, 'label', all_labels)
+    # Landmark cache
+    cache = None
+    if cache_dir is not None:
+        max_size_bytes = int(cache_max_size_mb * 1024 * 1024) if cache_max_size_mb is not None else None
+        cache = LandmarkCache(cache_dir, settings, max_size_bytes)
+        if clear_cache:
+            cache.clear()
+            print(f"Cache cleared: {cache_dir}")
     
-    # Save to CSV
+    # Reuse content hashes recorded by prepare_dataset
+    known_hashes = staged_hashes(input_path) if cache is not None else {}
+    
+    # Open output
+    resume_state = checkpoint['writer'] if checkpoint else None
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(output_path, index=False)
+    if output_format == 'csv':
+        writer = LandmarkCsvWriter(output_path, resume_state)
+    else:
+        writer = LandmarkStoreWriter(output_path, output_settings, resume_state)
+    
+    hands = mp_hands.Hands(**hands_config) if workers <= 1 else None
+    prefetcher = None
+    if decode_threads > 0 and workers > 1:
+        print("Warning: Decode threads are only used in serial runs (workers=1), ignoring")
+    elif decode_threads > 0:
+        decode_fn = partial(decode_file_frames, max_frames=max_frames_per_video, sampling=sampling,
+                            resolution=resolution)
+        prefetcher = FramePrefetcher(decode_fn, decode_threads, queue_depth)
+    frame_stats = new_sampling_stats()
+    skipped = []
+    run_counters = {'files': 0, 'cached': 0, 'extracted': 0, 'files_with_hands': 0, 'samples': 0}
+    run_start = time.perf_counter()
+    
+    with writer:
+        for chunk_start in range(0, len(pending), chunk_size):
+            chunk = pending[chunk_start:chunk_start + chunk_size]
+            chunk_start_time = time.perf_counter()
+            results: List[Optional[ExtractResult]] = [None] * len(chunk)
+            
+            # Serve unchanged files from the cache
+            cache_keys = []
+            to_extract = list(range(len(chunk)))
+            if cache is not None:
+                cache_keys = [cache.key_for(files[i], known_hashes.get(file_keys[i])) for i in chunk]
+                to_extract = []
+                for j, key in enumerate(cache_keys):
+                    results[j] = cache.get(key)
+                    if results[j] is None:
+                        to_extract.append(j)
+            
+            # Run extraction
+            extract_files = [files[chunk[j]] for j in to_extract]
+            extracted_stats: List[Optional[dict]] = []
+            if not extract_files:
+                extracted = []
+            elif workers > 1:
+                extracted, chunk_skipped = _extract_parallel(
+                    extract_files, max_frames_per_video, sampling, frame_stats, workers, task_timeout, max_retries,
+                    hands_config, tracking_config, extracted_stats, resolution
+                )
+                skipped.extend(chunk_skipped)
+            else:
+                extracted = []
+                if prefetcher is not None:
+                    inputs = ((f.path, f) for f in prefetcher.iter_files(extract_files))
+                else:
+                    inputs = ((file_path, None) for file_path in extract_files)
+                for file_path, prefetched in inputs:
+                    result, file_stats = _timed_extract(
+                        file_path, hands, max_frames_per_video, sampling, tracking_config, prefetched, resolution
+                    )
+                    merge_sampling_stats(frame_stats, file_stats)
+                    extracted.append(result)
+                    extracted_stats.append(file_stats)
+            
+            for j, result in zip(to_extract, extracted):
+                results[j] = result
+                if cache is not None and result is not None:
+                    cache.put(cache_keys[j], *result)
+            
+            if metrics is not None:
+                stats_by_position = dict(zip(to_extract, extracted_stats))
+                for j, i in enumerate(chunk):
+                    if results[j] is None:
+                        continue
+                    file_stats = stats_by_position.get(j)
+                    record = {'file': file_keys[i], 'cached': file_stats is None, 'samples': len(results[j][0])}
+                    if file_stats is not None:
+                        record['seconds'] = file_stats['extract_seconds']
+                        for key in ['decoded', 'used', 'decode_seconds', 'process_seconds']:
+                            if key in file_stats:
+                                record[key] = file_stats[key]
+                    metrics.emit('file', stage='extract', **record)
+            
+            run_counters['files'] += len(chunk)
+            run_counters['extracted'] += sum(result is not None for result in extracted)
+            run_counters['cached'] += len(chunk) - len(to_extract)
+            run_counters['files_with_hands'] += sum(
+                1 for result in results if result is not None and len(result[0])
+            )
+            
+            # Write samples in metadata order
+            for i, result in zip(chunk, results):
+                if result is None:
+                    continue
+                landmarks, frame_indices, handedness, hand_scores = result
+                if canonicalize:
+                    landmarks = canonicalize_handedness(landmarks, handedness)
+                writer.append(landmarks, file_labels[i], file_keys[i], frame_indices, handedness, hand_scores)
+                class_counts[file_labels[i]] = class_counts.get(file_labels[i], 0) + len(landmarks)
+                for code in handedness.tolist():
+                    name = HANDEDNESS_LABELS[code] if code != UNKNOWN_HANDEDNESS else 'Unknown'
+                    hand_counts[name] = hand_counts.get(name, 0) + 1
+                completed.append(file_keys[i])
+            
+            writer.flush()
+            _save_checkpoint(checkpoint_path, {
+                'format': output_format,
+                'settings': output_settings,
+                'completed': completed,
+                'class_counts': class_counts,
+                'hand_counts': hand_counts,
+                'writer': writer.state()
+            })
+            
+            print(f"Processed {min(chunk_start + chunk_size, len(pending))}/{len(pending)} files "
+                  f"({writer.num_samples} samples written)")
+            
+            if metrics is not None:
+                chunk_seconds = time.perf_counter() - chunk_start_time
+                metrics.emit(
+                    'chunk', stage='extract', files=len(chunk), cached=len(chunk) - len(to_extract),
+                    seconds=chunk_seconds, files_per_sec=len(chunk) / chunk_seconds if chunk_seconds else None,
+                    samples_written=writer.num_samples, peak_rss_mb=peak_rss_mb()
+                )
+    
+    if hands is not None:
+        hands.close()
+    
+    run_seconds = time.perf_counter() - run_start
+    run_counters['samples'] = writer.num_samples
+    if metrics is not None:
+        decoded = frame_stats['decoded']
+        metrics.emit(
+            'extract_summary', stage='extract', **run_counters,
+            skipped=len(skipped),
+            seconds=run_seconds,
+            files_per_sec=run_counters['files'] / run_seconds if run_seconds else None,
+            file_hit_rate=run_counters['files_with_hands'] / run_counters['files'] if run_counters['files'] else None,
+            videos=frame_stats['videos'],
+            frames_total=frame_stats['total_frames'],
+            frames_decoded=decoded,
+            frames_used=frame_stats['used'],
+            frame_hit_rate=frame_stats['used'] / decoded if decoded else None,
+            decode_ms_per_frame=1000 * frame_stats.get('decode_seconds', 0.0) / decoded if decoded else None,
+            process_ms_per_frame=1000 * frame_stats.get('process_seconds', 0.0) / decoded if decoded else None,
+            video_mode=video_mode,
+            prefetch=prefetcher.summary() if prefetcher is not None else None,
+            peak_rss_mb=peak_rss_mb()
+        )
+    
+    if cache is not None:
+        print(f"\nCache: {cache.hits} hits, {cache.misses} misses")
+        evicted = cache.evict()
+        if evicted:
+            print(f"Cache: evicted {evicted} entries to stay under {cache_max_size_mb} MB")
+    
+    # Keep the checkpoint only if skipped files remain for a later --resume
+    if not skipped:
+        checkpoint_path.unlink(missing_ok=True)
+    
+    # Files retried on --resume were appended after files that follow them in metadata.json
+    if output_format == 'store' and not skipped:
+        file_rank = {key: rank for rank, key in enumerate(file_keys)}
+        written_ranks = [file_rank.get(key, len(file_keys)) for key in writer.sources]
+        if written_ranks != sorted(written_ranks):
+            reorder_sources(output_path, sorted(range(len(written_ranks)), key=written_ranks.__getitem__))
+            print("Rewrote the landmark store in metadata order after retrying files")
+    elif output_format == 'csv' and retried_out_of_order:
+        print("Note: Retried files were appended at the end of the CSV, after files that follow them "
+              "in metadata.json")
     
     print("\n" + "=" * 60)
     print(f"Landmark extraction completed!")
-    print(f"Total samples: {len(df)}")
-    print(f"Output saved to: {output_path}")
+    print(f"Total samples: {writer.num_samples}")
+    print(f"Output saved to: {output_path} ({output_format})")
+    if run_counters['files']:
+        print(f"Files: {run_counters['files']} in {run_seconds:.1f}s "
+              f"({run_counters['files'] / max(run_seconds, 1e-9):.1f} files/s), "
+              f"hands found in {run_counters['files_with_hands'] / run_counters['files']:.1%}")
+    if frame_stats['videos']:
+        print(f"Video frames ({sampling['strategy']} sampling): decoded {frame_stats['decoded']} "
+              f"of {frame_stats['total_frames']}, used {frame_stats['used']}, "
+              f"seeks {frame_stats['seeks']} across {frame_stats['videos']} videos")
+    if frame_stats['decoded'] and frame_stats.get('process_seconds'):
+        print(f"MediaPipe video cost ({video_mode} mode): "
+              f"{1000 * frame_stats['process_seconds'] / frame_stats['decoded']:.2f} ms/frame")
+    if prefetcher is not None and prefetcher.stats['frames']:
+        prefetch = prefetcher.summary()
+        print(f"Decode prefetch ({decode_threads} threads, queue depth {queue_depth}): "
+              f"mean queue occupancy {prefetch['mean_occupancy']:.0%}, "
+              f"MediaPipe waited {prefetch['consumer_wait_seconds']:.1f}s, "
+              f"decoders waited {prefetch['producer_block_seconds']:.1f}s "
+              f"-> {prefetch['bottleneck']}-bound")
+    if hand_counts:
+        print("Hands: " + ", ".join(f"{count} {name}" for name, count in sorted(hand_counts.items())) +
+              (" (left hands mirrored to right)" if canonicalize else ""))
+    if skipped:
+        print(f"Skipped {len(skipped)} file(s) after failed retries (retry with --resume):")
+        for file_path in skipped:
+            print(f"  - {file_path}")
     print("=" * 60)
     
     # Print class distribution
     print("\nClass distribution:")
-    print(df['label'].value_counts().sort_index())
+    for label in sorted(class_counts):
+        print(f"{label}: {class_counts[label]}")
+    
+    # Fixed-length windows for sequence models
+    if sequence_path is not None:
+        if output_format != 'store':
+            print("Warning: Sequence windows need the landmark store format, skipping")
+        elif skipped:
+            print("Warning: Some files were skipped, not building sequence windows (retry with --resume)")
+        else:
+            print()
+            build_sequence_store(output_path, sequence_path, sequence_window, sequence_stride)
+    
+    # Compare per-frame cost of static and tracking video modes
+    video_files = [f for f in files if f.suffix.lower() in SUPPORTED_VIDEO_EXTENSIONS][:compare_video_modes_count]
+    if video_files:
+        print(f"\nComparing static and tracking mode on {len(video_files)} video(s)...")
+        comparison = compare_video_modes(
+            video_files, hands_config, tracking_hands_config(hands_config, tracking_confidence),
+            max_frames_per_video, sampling
+        )
+        for mode in VIDEO_MODES:
+            print(f"{mode:>9}: {comparison[mode]['ms_per_frame']:.2f} ms/frame, "
+                  f"{comparison[mode]['used']}/{comparison[mode]['frames']} frames with hands")
+        if 'cost_reduction' in comparison:
+            print(f"Tracking mode per-frame cost is {comparison['cost_reduction']:.0%} lower than static mode")
 
 
 def main():
     parser = argparse.ArgumentParser(description='Extract hand landmarks from TSL dataset')
     parser.add_argument('--input', type=str, required=True, help='Input directory (processed dataset)')
-    parser.add_argument('--output', type=str, default='./landmarks.csv', help='Output CSV file')
+    parser.add_argument('--output', type=str, default='./landmarks', help='Output landmark store directory or CSV file')
+    parser.add_argument('--format', type=str, default=None, choices=['store', 'csv'],
+                        help='Output format (default: csv for .csv paths, otherwise store)')
     parser.add_argument('--max-frames', type=int, default=100, help='Max frames per video')
+    parser.add_argument('--sampling', type=str, default=DEFAULT_SAMPLING['strategy'],
+                        choices=SAMPLING_STRATEGIES, help='Video frame sampling strategy')
+    parser.add_argument('--stride', type=int, default=DEFAULT_SAMPLING['stride'],
+                        help='Frame step for stride/scene sampling')
+    parser.add_argument('--max-decoded', type=int, default=DEFAULT_SAMPLING['max_decoded'],
+                        help='Hard cap on decoded frames per video')
+    parser.add_argument('--scene-threshold', type=float, default=DEFAULT_SAMPLING['scene_threshold'],
+                        help='Minimum frame change for scene sampling')
+    parser.add_argument('--max-hands', type=int, default=1,
+                        help='Max hands extracted per image or frame (each hand becomes its own sample)')
+    parser.add_argument('--canonicalize-hands', action='store_true',
+                        help='Mirror left hands to right-hand space in the output')
+    parser.add_argument('--video-mode', type=str, default='static', choices=VIDEO_MODES,
+                        help='static: detect on every frame; tracking: track hands across frames per video')
+    parser.add_argument('--tracking-confidence', type=float, default=DEFAULT_TRACKING_CONFIDENCE,
+                        help='Tracking confidence floor below which palm detection re-runs')
+    parser.add_argument('--compare-video-modes', type=int, default=0,
+                        help='Afterwards, time static vs tracking mode on this many videos')
+    parser.add_argument('--sequence-output', type=str, default=None,
+                        help='Also write fixed-length video windows to this sequence store')
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW, help='Frames per sequence window')
+    parser.add_argument('--window-stride', type=int, default=DEFAULT_WINDOW_STRIDE,
+                        help='Frames between sequence window starts')
+    parser.add_argument('--reduce', type=int, default=DEFAULT_RESOLUTION['reduce'], choices=REDUCE_FACTORS,
+                        help='Decode images and video frames at 1/N scale before hand detection')
+    parser.add_argument('--max-side', type=int, default=DEFAULT_RESOLUTION['max_side'],
+                        help='Cap the long side of decoded frames at this many pixels')
+    parser.add_argument('--workers', type=int, default=1, help='Number of extraction processes')
+    parser.add_argument('--decode-threads', type=int, default=0,
+                        help='Decode frames ahead of MediaPipe on this many threads (serial runs only)')
+    parser.add_argument('--queue-depth', type=int, default=DEFAULT_QUEUE_DEPTH,
+                        help='Decoded frames buffered per file by the decode threads')
+    parser.add_argument('--task-timeout', type=float, default=600.0, help='Seconds before a file is considered hung')
+    parser.add_argument('--max-retries', type=int, default=1, help='Retries for failed or hung files')
+    parser.add_argument('--chunk-size', type=int, default=256, help='Files per output chunk and checkpoint')
+    parser.add_argument('--resume', action='store_true', help='Continue an interrupted run from its checkpoint')
+    parser.add_argument('--cache-dir', type=str, default=None, help='Landmark cache directory (disabled if omitted)')
+    parser.add_argument('--cache-max-size', type=float, default=None, help='Maximum cache size in MB')
+    parser.add_argument('--clear-cache', action='store_true', help='Invalidate the cache before extracting')
+    parser.add_argument('--metrics', type=str, default=None, help='Append JSON-lines metrics to this file')
     
     args = parser.parse_args()
     
     input_path = Path(args.input)
     output_path = Path(args.output)
+    metrics = MetricsWriter(Path(args.metrics)) if args.metrics else None
+    
+    extract_landmarks(
+        input_path, output_path, args.max_frames,
+        workers=args.workers,
+        decode_threads=args.decode_threads,
+        queue_depth=args.queue_depth,
+        resolution={'reduce': args.reduce, 'max_side': args.max_side},
+        task_timeout=args.task_timeout,
+        max_retries=args.max_retries,
+        output_format=args.format,
+        chunk_size=args.chunk_size,
+        resume=args.resume,
+        max_hands=args.max_hands,
+        canonicalize=args.canonicalize_hands,
+        video_mode=args.video_mode,
+        tracking_confidence=args.tracking_confidence,
+        compare_video_modes_count=args.compare_video_modes,
+        sequence_path=Path(args.sequence_output) if args.sequence_output else None,
+        sequence_window=args.window,
+        sequence_stride=args.window_stride,
+        cache_dir=Path(args.cache_dir) if args.cache_dir else None,
+        cache_max_size_mb=args.cache_max_size,
+        clear_cache=args.clear_cache,
+        metrics=metrics,
+        sampling={
+            'strategy': args.sampling,
+            'stride': args.stride,
+            'max_decoded': args.max_decoded,
+            'scene_threshold': args.scene_threshold
+        }
+    )
     
-    extract_landmarks(input_path, output_path, args.max_frames)
+    if metrics is not None:
+        metrics.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,180 @@
+"""
+Landmark Features
+Landmark normalization and versioned feature specs shared by extraction, training and inference
+"""
+
+import json
+import numpy as np
+from pathlib import Path
+from typing import Optional, Union
+
+NUM_LANDMARKS = 21
+NUM_FEATURES = NUM_LANDMARKS * 3
+
+
+def normalize_landmarks(landmarks: np.ndarray) -> np.ndarray:
+    """
+    Normalize landmarks relative to wrist (landmark 0)
+
+    Accepts a single flattened sample of shape (63,) or a batch of shape
+    (N, 63) and returns an array of the same shape.
+    """
+    landmarks = np.asarray(landmarks)
+
+    # Reshape to (N, 21, 3)
+    landmarks_reshaped = landmarks.reshape(-1, NUM_LANDMARKS, 3)
+
+    # Normalize relative to wrist
+    normalized = landmarks_reshaped - landmarks_reshaped[:, :1, :]
+
+    # Flatten back
+    return normalized.reshape(landmarks.shape)
+
+
+# Handedness codes stored with each sample (-1 if MediaPipe gave no label)
+HANDEDNESS_LABELS = ['Left', 'Right']
+UNKNOWN_HANDEDNESS = -1
+
+
+def handedness_code(label: str) -> int:
+    """
+    Encode a MediaPipe handedness label ('Left' / 'Right')
+    """
+    return HANDEDNESS_LABELS.index(label) if label in HANDEDNESS_LABELS else UNKNOWN_HANDEDNESS
+
+
+def canonicalize_handedness(landmarks: np.ndarray, handedness: np.ndarray) -> np.ndarray:
+    """
+    Mirror left-hand samples into right-hand space
+
+    Expects wrist-normalized landmarks of shape (N, 63) and per-sample
+    handedness codes. Left hands have x negated around the wrist; all other
+    samples are returned unchanged.
+    """
+    landmarks = np.array(landmarks, dtype=np.float64).reshape(-1, NUM_LANDMARKS, 3)
+    left = np.asarray(handedness) == HANDEDNESS_LABELS.index('Left')
+    landmarks[left, :, 0] *= -1
+    return landmarks.reshape(-1, NUM_FEATURES)
+
+
+# Versioned feature specs. A trained model records its spec in
+# model_metadata.json and export writes it to feature_spec.json, so training,
+# the servers and src/ml/features.ts compute the same inputs. Never change a
+# published spec; add a new version instead.
+# A model trained on a store extracted with --canonicalize-hands also records
+# canonicalize_handedness: True, and inference then mirrors left hands too.
+#   scale: (a, b) landmarks whose distance (palm size) divides all coordinates
+#   rotate: (a, b) landmarks whose in-plane axis is rotated to point up (-y)
+#   fingertip_distances: landmark pairs whose distances are appended
+#   joint_angles: (a, b, c) triplets whose angle at b (in units of pi) is appended
+FINGERTIPS = [4, 8, 12, 16, 20]
+FINGER_CHAINS = [[0, 1, 2, 3, 4], [0, 5, 6, 7, 8], [0, 9, 10, 11, 12], [0, 13, 14, 15, 16], [0, 17, 18, 19, 20]]
+
+FEATURE_SPECS = {
+    'raw-v1': {
+        'name': 'raw-v1',
+        'scale': None,
+        'rotate': None,
+        'fingertip_distances': [],
+        'joint_angles': []
+    },
+    'geometric-v1': {
+        'name': 'geometric-v1',
+        'scale': [0, 9],
+        'rotate': [0, 9],
+        'fingertip_distances': [[a, b] for i, a in enumerate(FINGERTIPS) for b in FINGERTIPS[i + 1:]],
+        'joint_angles': [chain[i:i + 3] for chain in FINGER_CHAINS for i in range(3)]
+    }
+}
+DEFAULT_FEATURE_SPEC = 'raw-v1'
+
+# Palm sizes and axis lengths below this are treated as degenerate (e.g. zero-padded frames)
+_EPS = 1e-6
+
+
+def feature_spec(spec: Union[str, dict, None] = None) -> dict:
+    """
+    Resolve a feature spec name (or a spec dict from model metadata)
+
+    The returned dict includes `num_features`, the model input size.
+    """
+    if spec is None:
+        spec = DEFAULT_FEATURE_SPEC
+    if isinstance(spec, str):
+        if spec not in FEATURE_SPECS:
+            raise ValueError(f"Unknown feature spec: {spec} (choose from {list(FEATURE_SPECS)})")
+        spec = FEATURE_SPECS[spec]
+    return {
+        'canonicalize_handedness': False,
+        **spec,
+        'num_features': NUM_FEATURES + len(spec['fingertip_distances']) + len(spec['joint_angles'])
+    }
+
+
+def load_feature_spec(model_dir: Path) -> dict:
+    """
+    Feature spec a model was trained with (raw-v1 for models without one)
+    """
+    metadata_path = Path(model_dir) / 'model_metadata.json'
+    spec = None
+    if metadata_path.exists():
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            spec = json.load(f).get('feature_spec')
+    return feature_spec(spec)
+
+
+def compute_features(landmarks: np.ndarray, spec: Union[str, dict, None] = None,
+                     handedness: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Compute model input features for a batch of landmarks
+
+    Accepts raw or wrist-normalized landmarks of shape (63,) or (N, 63) and
+    returns float32 features of shape (num_features,) or (N, num_features).
+    raw-v1 is the wrist-normalized landmarks unchanged.
+
+    Pass the handedness code of each sample when serving a spec with
+    canonicalize_handedness, so left hands are mirrored like the training
+    data was. Training data read from a canonicalized store is already
+    mirrored and is passed without handedness.
+    """
+    spec = feature_spec(spec)
+    landmarks = np.asarray(landmarks, dtype=np.float64)
+    single = landmarks.ndim == 1
+    points = normalize_landmarks(landmarks.reshape(-1, NUM_FEATURES))
+    if spec['canonicalize_handedness'] and handedness is not None:
+        points = canonicalize_handedness(points, np.asarray(handedness).reshape(-1))
+    points = points.reshape(-1, NUM_LANDMARKS, 3)
+
+    if spec['scale'] is not None:
+        a, b = spec['scale']
+        palm = np.linalg.norm(points[:, b] - points[:, a], axis=1)
+        points = points / np.where(palm > _EPS, palm, 1.0)[:, None, None]
+
+    if spec['rotate'] is not None:
+        a, b = spec['rotate']
+        axis = points[:, b, :2] - points[:, a, :2]
+        length = np.hypot(axis[:, 0], axis[:, 1])
+        valid = length > _EPS
+        safe_length = np.where(valid, length, 1.0)
+        # Rotation taking the axis to (0, -length)
+        cos = np.where(valid, -axis[:, 1] / safe_length, 1.0)[:, None]
+        sin = np.where(valid, -axis[:, 0] / safe_length, 0.0)[:, None]
+        x, y = points[:, :, 0], points[:, :, 1]
+        points = np.stack([x * cos - y * sin, x * sin + y * cos, points[:, :, 2]], axis=2)
+
+    columns = [points.reshape(-1, NUM_FEATURES)]
+
+    if spec['fingertip_distances']:
+        pairs = np.asarray(spec['fingertip_distances'])
+        columns.append(np.linalg.norm(points[:, pairs[:, 0]] - points[:, pairs[:, 1]], axis=2))
+
+    if spec['joint_angles']:
+        triplets = np.asarray(spec['joint_angles'])
+        u = points[:, triplets[:, 0]] - points[:, triplets[:, 1]]
+        w = points[:, triplets[:, 2]] - points[:, triplets[:, 1]]
+        norms = np.linalg.norm(u, axis=2) * np.linalg.norm(w, axis=2)
+        cosine = np.sum(u * w, axis=2) / np.where(norms > _EPS, norms, 1.0)
+        columns.append(np.arccos(np.clip(cosine, -1.0, 1.0)) / np.pi)
+
+    features = np.concatenate(columns, axis=1).astype(np.float32)
+    return features[0] if single else features
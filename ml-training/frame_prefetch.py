@@ -0,0 +1,181 @@
+"""
+Frame Prefetch
+Threaded decode-ahead of image and video frames with bounded queues
+"""
+
+import queue
+import threading
+import time
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+DEFAULT_DECODE_THREADS = 2
+DEFAULT_QUEUE_DEPTH = 8
+
+# How often a producer blocked on a full queue checks for cancellation
+PUT_POLL_SECONDS = 0.1
+
+# decode_fn(path, stats) -> iterator of (frame index, RGB frame)
+DecodeFn = Callable[[object, dict], Iterable[Tuple[int, np.ndarray]]]
+
+_END = object()
+
+
+class _DecodeError:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def new_prefetch_stats() -> dict:
+    """
+    Create an empty queue occupancy counter dictionary
+    """
+    return {
+        'files': 0,
+        'frames': 0,
+        'occupancy_sum': 0,           # queued frames seen by the consumer at each get
+        'consumer_wait_seconds': 0.0, # consumer idle on an empty queue: decoding is the bottleneck
+        'producer_block_seconds': 0.0 # decoders idle on a full queue: detection is the bottleneck
+    }
+
+
+def summarize_prefetch_stats(stats: dict, queue_depth: int) -> dict:
+    """
+    Mean queue occupancy and which side of the pipeline waited more
+    """
+    occupancy = stats['occupancy_sum'] / (stats['frames'] * queue_depth) if stats['frames'] else 0.0
+    bottleneck = 'decode' if stats['consumer_wait_seconds'] > stats['producer_block_seconds'] else 'detection'
+    return {**stats, 'mean_occupancy': occupancy, 'bottleneck': bottleneck}
+
+
+class PrefetchedFile:
+    """
+    Frames of one file, decoded ahead by a producer thread
+
+    `stats` receives the counters of the decode function (e.g. frames
+    grabbed and decoded); read them after frames() is exhausted.
+    """
+
+    def __init__(self, path, queue_depth: int, stats: dict, lock: threading.Lock):
+        self.path = path
+        self.stats = {}
+        self._queue = queue.Queue(maxsize=queue_depth)
+        self._cancelled = threading.Event()
+        self._pipeline_stats = stats
+        self._lock = lock
+
+    def _put(self, item) -> bool:
+        start = time.perf_counter()
+        while True:
+            try:
+                self._queue.put(item, timeout=PUT_POLL_SECONDS)
+                break
+            except queue.Full:
+                if self._cancelled.is_set():
+                    return False
+        blocked = time.perf_counter() - start
+        with self._lock:
+            self._pipeline_stats['producer_block_seconds'] += blocked
+        return True
+
+    def _produce(self, decode_fn: DecodeFn):
+        if self._cancelled.is_set():
+            return
+        frames = iter(decode_fn(self.path, self.stats))
+        try:
+            for frame in frames:
+                if not self._put(frame):
+                    return
+        except BaseException as e:
+            self._put(_DecodeError(e))
+            return
+        finally:
+            # Release the capture of a video generator that was abandoned
+            if hasattr(frames, 'close'):
+                frames.close()
+        self._put(_END)
+
+    def frames(self) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Yield (frame index, RGB frame) pairs in decode order
+        """
+        while True:
+            occupancy = self._queue.qsize()
+            start = time.perf_counter()
+            item = self._queue.get()
+            waited = time.perf_counter() - start
+
+            if item is _END:
+                return
+            if isinstance(item, _DecodeError):
+                raise item.error
+
+            with self._lock:
+                self._pipeline_stats['frames'] += 1
+                self._pipeline_stats['occupancy_sum'] += occupancy
+                self._pipeline_stats['consumer_wait_seconds'] += waited
+            yield item
+
+    def cancel(self):
+        self._cancelled.set()
+
+
+class FramePrefetcher:
+    """
+    Decode files on a thread pool ahead of a single in-order consumer
+
+    OpenCV releases the GIL while decoding, so decoder threads run while the
+    consumer is inside MediaPipe. Each file gets its own queue of at most
+    `queue_depth` frames and at most `threads + 1` files are in flight, which
+    bounds memory. Files are handed out in input order.
+    """
+
+    def __init__(self, decode_fn: DecodeFn, threads: int = DEFAULT_DECODE_THREADS,
+                 queue_depth: int = DEFAULT_QUEUE_DEPTH, files_ahead: Optional[int] = None):
+        self.decode_fn = decode_fn
+        self.threads = max(1, threads)
+        self.queue_depth = max(1, queue_depth)
+        self.files_ahead = files_ahead or self.threads + 1
+        self.stats = new_prefetch_stats()
+        self._lock = threading.Lock()
+
+    def _submit(self, executor: ThreadPoolExecutor, path) -> PrefetchedFile:
+        prefetched = PrefetchedFile(path, self.queue_depth, self.stats, self._lock)
+        # Jobs start in submission order, so the file being consumed always has a running producer
+        executor.submit(prefetched._produce, self.decode_fn)
+        return prefetched
+
+    def iter_files(self, paths: Iterable) -> Iterator[PrefetchedFile]:
+        """
+        Yield a PrefetchedFile per path, in order
+
+        Consume each file's frames() before moving to the next one.
+        """
+        paths = iter(paths)
+        in_flight = deque()
+        current = None
+        executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='decode')
+        try:
+            for path in paths:
+                in_flight.append(self._submit(executor, path))
+                if len(in_flight) >= self.files_ahead:
+                    break
+
+            while in_flight:
+                current = in_flight.popleft()
+                next_path = next(paths, None)
+                if next_path is not None:
+                    in_flight.append(self._submit(executor, next_path))
+                yield current
+                self.stats['files'] += 1
+        finally:
+            # Unblock producers if the consumer stopped early
+            for prefetched in [current, *in_flight]:
+                if prefetched is not None:
+                    prefetched.cancel()
+            executor.shutdown(wait=True)
+
+    def summary(self) -> dict:
+        return summarize_prefetch_stats(self.stats, self.queue_depth)
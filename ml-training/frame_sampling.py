@@ -0,0 +1,162 @@
+"""
+Frame Sampling
+Seek-based video frame sampling for landmark extraction
+"""
+
+import cv2
+import numpy as np
+from typing import Iterator, List, Optional, Tuple
+
+SAMPLING_STRATEGIES = ['uniform', 'stride', 'scene']
+
+DEFAULT_SAMPLING = {
+    'strategy': 'uniform',      # uniform | stride | scene
+    'stride': 5,                # frame step for the stride and scene strategies
+    'max_decoded': 300,         # hard cap on frames decoded per video
+    'scene_threshold': 0.04     # mean absolute gray-level change that counts as a new scene
+}
+
+# Gaps longer than this are skipped with a seek instead of repeated grab() calls
+SEEK_THRESHOLD = 30
+
+# Side length of the grayscale thumbnail used for scene-change detection
+SCENE_THUMBNAIL_SIZE = 32
+
+
+def new_sampling_stats() -> dict:
+    """
+    Create an empty frame counter dictionary
+    """
+    return {
+        'videos': 0,
+        'total_frames': 0,  # frames in the source videos
+        'grabbed': 0,       # frames advanced with grab()
+        'seeks': 0,         # CAP_PROP_POS_FRAMES seeks
+        'decoded': 0,       # frames retrieved as full BGR images
+        'used': 0           # decoded frames that produced landmarks
+    }
+
+
+def merge_sampling_stats(total: dict, stats: dict):
+    """
+    Add the counters in `stats` to `total` in place
+    """
+    for key, value in stats.items():
+        total[key] = total.get(key, 0) + value
+
+
+def target_frame_indices(total_frames: int, max_frames: int, strategy: str, stride: int) -> List[int]:
+    """
+    Compute the frame indices to decode for the index-based strategies
+
+    Returns:
+        Sorted list of frame indices
+    """
+    if total_frames <= 0 or max_frames <= 0:
+        return []
+
+    if strategy == 'uniform':
+        count = min(max_frames, total_frames)
+        indices = np.linspace(0, total_frames - 1, count).round().astype(int)
+        return np.unique(indices).tolist()
+
+    if strategy == 'stride':
+        return list(range(0, total_frames, max(1, stride)))[:max_frames]
+
+    if strategy == 'scene':
+        # Scene candidates are every stride-th frame; selection happens after decoding
+        return list(range(0, total_frames, max(1, stride)))
+
+    raise ValueError(f"Unknown sampling strategy: {strategy}")
+
+
+def _read_frame_at(cap, target: int, position: int, stats: dict) -> Tuple[Optional[np.ndarray], int]:
+    """
+    Advance the capture to `target` and decode that frame
+
+    Short gaps are skipped with grab(), which avoids the BGR conversion and
+    copy of retrieve(); long gaps use a seek.
+
+    Returns:
+        Tuple of (frame or None at end of stream, new capture position)
+    """
+    if target - position > SEEK_THRESHOLD:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+        stats['seeks'] += 1
+        position = target
+
+    while position < target:
+        if not cap.grab():
+            return None, position
+        stats['grabbed'] += 1
+        position += 1
+
+    if not cap.grab():
+        return None, position
+    stats['grabbed'] += 1
+    position += 1
+
+    ok, frame = cap.retrieve()
+    if not ok:
+        return None, position
+
+    stats['decoded'] += 1
+    return frame, position
+
+
+def _scene_signature(frame: np.ndarray) -> np.ndarray:
+    """
+    Small normalized grayscale thumbnail used to compare frames
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    thumbnail = cv2.resize(
+        gray, (SCENE_THUMBNAIL_SIZE, SCENE_THUMBNAIL_SIZE), interpolation=cv2.INTER_AREA
+    )
+    return thumbnail.astype(np.float32) / 255.0
+
+
+def iter_sampled_frames(cap, max_frames: int, sampling: dict, stats: dict) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Yield (frame index, BGR frame) pairs selected by the sampling strategy
+
+    At most `max_frames` frames are yielded and at most
+    `sampling['max_decoded']` frames are decoded, whatever the strategy.
+    """
+    strategy = sampling['strategy']
+    stride = max(1, int(sampling['stride']))
+    max_decoded = sampling['max_decoded']
+
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    stats['total_frames'] += max(total_frames, 0)
+
+    if total_frames > 0:
+        targets = target_frame_indices(total_frames, max_frames, strategy, stride)
+    else:
+        # Frame count unavailable (e.g. some streams): walk the file with the stride
+        targets = iter(range(0, 2 ** 31, stride))
+
+    decoded_before = stats['decoded']
+    position = 0
+    yielded = 0
+    last_signature = None
+
+    for target in targets:
+        if yielded >= max_frames:
+            break
+        if max_decoded is not None and stats['decoded'] - decoded_before >= max_decoded:
+            break
+
+        frame, position = _read_frame_at(cap, target, position, stats)
+        if frame is None:
+            break
+
+        if strategy == 'scene':
+            signature = _scene_signature(frame)
+            if last_signature is not None:
+                change = float(np.mean(np.abs(signature - last_signature)))
+                if change < sampling['scene_threshold']:
+                    continue
+            last_signature = signature
+
+        yielded += 1
+        yield target, frame
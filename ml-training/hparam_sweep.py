@@ -0,0 +1,384 @@
+"""
+Hyperparameter Sweep
+Parallel MLP architecture/optimizer search with early pruning and a leaderboard
+"""
+
+import os
+import argparse
+import itertools
+import json
+import multiprocessing as mp_proc
+import random
+import statistics
+import time
+from pathlib import Path
+from typing import List, Optional
+from features import FEATURE_SPECS
+
+# Search space used when no --space file is given; every combination is a trial
+DEFAULT_SEARCH_SPACE = {
+    'hidden_units': [[256, 128, 64], [128, 64], [64, 32], [32]],
+    'dropout': [[0.2], [0.3]],
+    'learning_rate': [0.001, 0.0003],
+    'batch_size': [32, 128]
+}
+
+# Median-stopping pruning: after PRUNE_MIN_EPOCHS, a trial whose val_loss is
+# worse than the median of other trials at the same epoch is stopped
+PRUNE_MIN_EPOCHS = 5
+PRUNE_MIN_TRIALS = 3
+
+HISTORY_FILE = 'history.jsonl'
+LEADERBOARD_FILE = 'leaderboard.json'
+
+# Set by _init_trial_worker in each trial process
+_worker_data = None
+
+
+def expand_search_space(space: dict, max_trials: Optional[int] = None, seed: int = 42) -> List[dict]:
+    """
+    Expand a search space into trial configs
+
+    Every combination of the listed values is a trial; with `max_trials` a
+    random subset of that size is drawn.
+    """
+    keys = sorted(space)
+    trials = [dict(zip(keys, values)) for values in itertools.product(*(space[key] for key in keys))]
+    if max_trials is not None and max_trials < len(trials):
+        trials = random.Random(seed).sample(trials, max_trials)
+    return trials
+
+
+def _read_history(history_path: Path) -> List[dict]:
+    """
+    Epoch reports of all trials so far
+
+    Trials append to the file concurrently without locking, so a line that
+    another process is still writing (no newline yet, or not valid JSON) is
+    skipped; it is read on a later epoch.
+    """
+    if not history_path.exists():
+        return []
+    records = []
+    with open(history_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.endswith('\n'):
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def should_prune(history: List[dict], trial_id: int, epoch: int, val_loss: float) -> bool:
+    """
+    Median-stopping rule over the epoch reports of other trials
+    """
+    if epoch + 1 < PRUNE_MIN_EPOCHS:
+        return False
+
+    others = [
+        record['val_loss'] for record in history
+        if record['epoch'] == epoch and record['trial'] != trial_id
+    ]
+    if len(others) < PRUNE_MIN_TRIALS:
+        return False
+
+    return val_loss > statistics.median(others)
+
+
+def _init_trial_worker(data_path: str, threads: int):
+    """
+    Pool initializer: pin TensorFlow threads, then load the data once per process
+    """
+    global _worker_data
+
+    # Must be set before TensorFlow starts its thread pools
+    for var in ['OMP_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS']:
+        os.environ[var] = str(threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+
+    import numpy as np
+    import tensorflow as tf
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import LabelEncoder
+    from train_model import load_data, split_indices
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    X, y = load_data(Path(data_path))
+    y_encoded = LabelEncoder().fit_transform(y)
+
+    # Trials are ranked on a validation split carved from the training split,
+    # so the held-out test split stays untouched
+    train_idx, _ = split_indices(y_encoded)
+    fit_idx, val_idx = train_test_split(
+        train_idx, test_size=0.2, random_state=42, stratify=y_encoded[train_idx]
+    )
+
+    _worker_data = {
+        'X_fit': np.asarray(X[fit_idx], dtype=np.float32),
+        'y_fit': y_encoded[fit_idx],
+        'X_val': np.asarray(X[val_idx], dtype=np.float32),
+        'y_val': y_encoded[val_idx],
+        'num_classes': int(y_encoded.max()) + 1,
+        'inputs': {}
+    }
+
+
+def _trial_inputs(spec_name: str):
+    """
+    Fit and validation inputs for a feature spec, computed once per process
+    """
+    from features import compute_features
+
+    inputs = _worker_data['inputs']
+    if spec_name not in inputs:
+        inputs[spec_name] = (
+            compute_features(_worker_data['X_fit'], spec_name),
+            compute_features(_worker_data['X_val'], spec_name)
+        )
+    return inputs[spec_name]
+
+
+def run_trial(trial_id: int, config: dict, epochs: int, history_path: str, prune: bool) -> dict:
+    """
+    Train one trial config and measure its size and latency
+
+    A config that cannot be built or trained (e.g. a dropout list that does
+    not match hidden_units) is recorded as failed instead of ending the sweep.
+    """
+    from features import DEFAULT_FEATURE_SPEC
+    from train_model import DEFAULT_ARCHITECTURE, resolve_architecture
+
+    # Settings missing from the search space keep their train_model defaults
+    config = {**DEFAULT_ARCHITECTURE, 'batch_size': 32, 'features': DEFAULT_FEATURE_SPEC, **config}
+
+    start = time.perf_counter()
+    try:
+        config = resolve_architecture(config)
+        return _fit_trial(trial_id, config, epochs, history_path, prune, start)
+    except Exception as e:
+        return {
+            'trial': trial_id,
+            'config': config,
+            'status': 'failed',
+            'error': f"{type(e).__name__}: {e}",
+            'epochs': 0,
+            'val_accuracy': None,
+            'val_loss': None,
+            'params': None,
+            'latency_ms': None,
+            'train_seconds': time.perf_counter() - start
+        }
+
+
+def _fit_trial(trial_id: int, config: dict, epochs: int, history_path: str, prune: bool, start: float) -> dict:
+    """
+    Train a resolved trial config (see run_trial)
+    """
+    from tensorflow import keras
+    from train_model import create_model, measure_inference_ms
+
+    data = _worker_data
+    X_fit, X_val = _trial_inputs(config['features'])
+
+    model = create_model(X_fit.shape[1], data['num_classes'], config['hidden_units'], config['dropout'])
+    model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=config['learning_rate']),
+        loss='sparse_categorical_crossentropy',
+        metrics=['accuracy']
+    )
+
+    class MedianPruning(keras.callbacks.Callback):
+        """
+        Report val_loss after each epoch and stop if the trial is losing
+        """
+
+        def __init__(self):
+            super().__init__()
+            self.pruned_at = None
+
+        def on_epoch_end(self, epoch, logs=None):
+            val_loss = float(logs['val_loss'])
+            history = _read_history(Path(history_path))
+            with open(history_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'trial': trial_id, 'epoch': epoch, 'val_loss': val_loss}) + '\n')
+            if prune and should_prune(history, trial_id, epoch, val_loss):
+                self.pruned_at = epoch + 1
+                self.model.stop_training = True
+
+    pruning = MedianPruning()
+    history = model.fit(
+        X_fit, data['y_fit'],
+        validation_data=(X_val, data['y_val']),
+        epochs=epochs,
+        batch_size=config['batch_size'],
+        callbacks=[
+            pruning,
+            keras.callbacks.EarlyStopping(monitor='val_loss', patience=15, restore_best_weights=True)
+        ],
+        verbose=0
+    )
+
+    val_loss, val_accuracy = model.evaluate(X_val, data['y_val'], verbose=0)
+
+    return {
+        'trial': trial_id,
+        'config': config,
+        'status': 'pruned' if pruning.pruned_at else 'completed',
+        'epochs': len(history.history['loss']),
+        'val_accuracy': float(val_accuracy),
+        'val_loss': float(val_loss),
+        'params': int(model.count_params()),
+        'latency_ms': measure_inference_ms(model),
+        'train_seconds': time.perf_counter() - start
+    }
+
+
+def print_leaderboard(results: List[dict], target_accuracy: Optional[float] = None):
+    """
+    Print trials ranked by validation accuracy
+    """
+    print(f"\n{'#':>4}  {'Features':<14}{'Hidden units':<16}{'Dropout':<10}{'LR':>9}{'Batch':>7}{'Params':>10}"
+          f"{'Latency (ms)':>14}{'Val acc':>9}{'Val loss':>10}{'Epochs':>8}  Status")
+    for result in results:
+        config = result['config']
+        settings = (f"{result['trial']:>4}  {config['features']:<14}{str(config['hidden_units']):<16}"
+                    f"{str(config['dropout']):<10}{config['learning_rate']:>9g}{config['batch_size']:>7}")
+        if result['status'] == 'failed':
+            print(f"{settings}{'-':>10}{'-':>14}{'-':>9}{'-':>10}{'-':>8}  failed: {result['error']}")
+            continue
+        print(f"{settings}{result['params']:>10,}"
+              f"{result['latency_ms']:>14.3f}{result['val_accuracy']:>9.4f}{result['val_loss']:>10.4f}"
+              f"{result['epochs']:>8}  {result['status']}")
+
+    if target_accuracy is not None:
+        qualifying = [r for r in results if r['status'] != 'failed' and r['val_accuracy'] >= target_accuracy]
+        if qualifying:
+            best = min(qualifying, key=lambda r: (r['params'], r['latency_ms']))
+            print(f"\nSmallest model with val accuracy >= {target_accuracy}: trial {best['trial']} "
+                  f"({best['params']:,} params, {best['latency_ms']:.3f} ms)")
+            # Compare feature specs when the sweep covered several
+            specs = sorted({r['config']['features'] for r in results})
+            if len(specs) > 1:
+                for spec in specs:
+                    spec_results = [r for r in qualifying if r['config']['features'] == spec]
+                    if spec_results:
+                        best = min(spec_results, key=lambda r: (r['params'], r['latency_ms']))
+                        print(f"  {spec}: trial {best['trial']} ({best['params']:,} params, "
+                              f"{best['latency_ms']:.3f} ms)")
+                    else:
+                        print(f"  {spec}: no trial reached the target")
+        else:
+            print(f"\nNo trial reached val accuracy {target_accuracy}")
+
+
+def run_sweep(input_path: Path, output_path: Path, space: Optional[dict] = None,
+              max_trials: Optional[int] = None, epochs: int = 50, workers: int = 2,
+              threads_per_trial: Optional[int] = None, prune: bool = True,
+              target_accuracy: Optional[float] = None) -> List[dict]:
+    """
+    Run a hyperparameter sweep
+
+    Trials run in `workers` spawned processes, each with TensorFlow pinned to
+    `threads_per_trial` intra-op threads (default: CPU count / workers) so
+    parallel trials do not oversubscribe the CPU. Epoch val_loss reports are
+    shared through history.jsonl for median-stopping pruning.
+    """
+    print("=" * 60)
+    print("Hyperparameter Sweep")
+    print("=" * 60)
+
+    trials = expand_search_space(space or DEFAULT_SEARCH_SPACE, max_trials)
+    threads_per_trial = threads_per_trial or max(1, (os.cpu_count() or 1) // workers)
+
+    output_path.mkdir(parents=True, exist_ok=True)
+    history_path = output_path / HISTORY_FILE
+    history_path.unlink(missing_ok=True)
+
+    print(f"Trials: {len(trials)}, workers: {workers}, threads per trial: {threads_per_trial}, "
+          f"pruning: {'on' if prune else 'off'}")
+
+    start = time.perf_counter()
+    results = []
+    context = mp_proc.get_context('spawn')
+    with context.Pool(workers, initializer=_init_trial_worker,
+                      initargs=(str(input_path), threads_per_trial)) as pool:
+        async_results = [
+            pool.apply_async(run_trial, (trial_id, config, epochs, str(history_path), prune))
+            for trial_id, config in enumerate(trials)
+        ]
+        for async_result in async_results:
+            result = async_result.get()
+            results.append(result)
+            if result['status'] == 'failed':
+                print(f"Warning: Trial {result['trial']} failed: {result['error']}")
+                continue
+            print(f"Trial {result['trial']}: {result['status']} after {result['epochs']} epochs, "
+                  f"val accuracy {result['val_accuracy']:.4f}")
+
+    elapsed = time.perf_counter() - start
+    # Failed trials go last
+    results.sort(key=lambda r: (r['status'] == 'failed', -(r['val_accuracy'] or 0.0), r['params'] or 0, r['trial']))
+    print_leaderboard(results, target_accuracy)
+
+    leaderboard_path = output_path / LEADERBOARD_FILE
+    with open(leaderboard_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'input': str(input_path),
+            'epochs': epochs,
+            'workers': workers,
+            'threads_per_trial': threads_per_trial,
+            'elapsed_seconds': elapsed,
+            'trials': results
+        }, f, indent=2)
+
+    print(f"\nSweep finished in {elapsed:.0f}s. Leaderboard saved to {leaderboard_path}")
+    print("Retrain a trial with: python train_model.py --features ... --hidden-units ... --dropout ... "
+          "--learning-rate ... --batch-size ...")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Hyperparameter sweep for the landmark MLP')
+    parser.add_argument('--input', type=str, required=True, help='Input landmark store or CSV file')
+    parser.add_argument('--output', type=str, default='./sweep', help='Output directory')
+    parser.add_argument('--space', type=str, default=None, help='JSON file with the search space')
+    parser.add_argument('--max-trials', type=int, default=None, help='Randomly sample this many trials')
+    parser.add_argument('--epochs', type=int, default=50, help='Max epochs per trial')
+    parser.add_argument('--workers', type=int, default=2, help='Parallel trial processes')
+    parser.add_argument('--threads-per-trial', type=int, default=None, help='TensorFlow threads per trial')
+    parser.add_argument('--no-prune', action='store_true', help='Disable median-stopping pruning')
+    parser.add_argument('--target-accuracy', type=float, default=None,
+                        help='Report the smallest model reaching this val accuracy')
+    parser.add_argument('--features', type=str, nargs='+', default=None, choices=list(FEATURE_SPECS),
+                        help='Feature specs to add to the search space (e.g. raw-v1 geometric-v1)')
+
+    args = parser.parse_args()
+
+    space = None
+    if args.space:
+        with open(args.space, 'r', encoding='utf-8') as f:
+            space = json.load(f)
+    if args.features:
+        space = {**(space or DEFAULT_SEARCH_SPACE), 'features': args.features}
+
+    run_sweep(
+        Path(args.input), Path(args.output),
+        space=space,
+        max_trials=args.max_trials,
+        epochs=args.epochs,
+        workers=args.workers,
+        threads_per_trial=args.threads_per_trial,
+        prune=not args.no_prune,
+        target_accuracy=args.target_accuracy
+    )
+
+
+if __name__ == '__main__':
+    main()
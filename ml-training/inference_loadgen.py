@@ -0,0 +1,164 @@
+"""
+Inference Load Generator
+Concurrent load test and latency histogram for the inference server
+"""
+
+import argparse
+import http.client
+import json
+import socket
+import threading
+import time
+import numpy as np
+from pathlib import Path
+from typing import List, Optional
+from features import NUM_FEATURES
+
+HISTOGRAM_BUCKETS_MS = [0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000]
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """
+    HTTP connection over a Unix domain socket
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 10.0):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def _connect(host: str, port: int, unix_socket: Optional[str]) -> http.client.HTTPConnection:
+    if unix_socket:
+        return UnixHTTPConnection(unix_socket)
+    return http.client.HTTPConnection(host, port, timeout=10.0)
+
+
+def latency_report(latencies_ms: List[float], elapsed: float, errors: int) -> dict:
+    """
+    Summarize request latencies with percentiles and a bucketed histogram
+    """
+    latencies = np.array(latencies_ms)
+    if len(latencies) == 0:
+        return {'requests': 0, 'errors': errors}
+
+    counts, _ = np.histogram(latencies, bins=[0] + HISTOGRAM_BUCKETS_MS + [np.inf])
+    histogram = {f'<={bucket}ms': int(count) for bucket, count in zip(HISTOGRAM_BUCKETS_MS, counts)}
+    histogram[f'>{HISTOGRAM_BUCKETS_MS[-1]}ms'] = int(counts[-1])
+
+    return {
+        'requests': int(len(latencies)),
+        'errors': errors,
+        'requests_per_sec': len(latencies) / elapsed,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'max_ms': float(latencies.max()),
+        'histogram': histogram
+    }
+
+
+def run_load(host: str = '127.0.0.1', port: int = 8765, unix_socket: Optional[str] = None,
+             concurrency: int = 16, duration: float = 10.0, samples_per_request: int = 1) -> dict:
+    """
+    Send /predict requests from `concurrency` threads for `duration` seconds
+    """
+    rng = np.random.default_rng(0)
+    payloads = [
+        json.dumps({'landmarks': rng.random((samples_per_request, NUM_FEATURES)).tolist()})
+        for _ in range(64)
+    ]
+
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def worker(worker_id: int):
+        connection = _connect(host, port, unix_socket)
+        local_latencies = []
+        local_errors = 0
+        i = worker_id
+
+        while time.perf_counter() < stop_at:
+            body = payloads[i % len(payloads)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                connection.request('POST', '/predict', body, {'Content-Type': 'application/json'})
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    local_errors += 1
+                    continue
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                connection.close()
+                connection = _connect(host, port, unix_socket)
+                continue
+            local_latencies.append((time.perf_counter() - start) * 1000)
+
+        connection.close()
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return latency_report(latencies, elapsed, errors[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the inference server')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Server address')
+    parser.add_argument('--port', type=int, default=8765, help='Server port')
+    parser.add_argument('--unix-socket', type=str, default=None, help='Connect to a Unix socket instead of TCP')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent client threads')
+    parser.add_argument('--duration', type=float, default=10.0, help='Test duration in seconds')
+    parser.add_argument('--samples-per-request', type=int, default=1, help='Landmark vectors per request')
+    parser.add_argument('--output', type=str, default=None, help='Write the report as JSON')
+
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Inference Load Test")
+    print("=" * 60)
+
+    report = run_load(
+        args.host, args.port, args.unix_socket,
+        args.concurrency, args.duration, args.samples_per_request
+    )
+
+    if not report['requests']:
+        print(f"No successful requests ({report['errors']} errors)")
+        return
+
+    print(f"Requests: {report['requests']} ({report['errors']} errors)")
+    print(f"Throughput: {report['requests_per_sec']:.1f} requests/sec")
+    print(f"Latency p50: {report['p50_ms']:.2f} ms  p95: {report['p95_ms']:.2f} ms  "
+          f"p99: {report['p99_ms']:.2f} ms  max: {report['max_ms']:.2f} ms")
+
+    print("\nLatency histogram:")
+    peak = max(report['histogram'].values()) or 1
+    for bucket, count in report['histogram'].items():
+        bar = '#' * int(40 * count / peak)
+        print(f"{bucket:>10} {count:>8} {bar}")
+
+    if args.output:
+        with open(Path(args.output), 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,301 @@
+"""
+Inference Server
+Local HTTP / Unix-socket landmark classification with dynamic micro-batching
+"""
+
+import os
+import argparse
+import json
+import queue
+import socketserver
+import threading
+import time
+import numpy as np
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Optional
+from features import NUM_FEATURES, compute_features, handedness_code, load_feature_spec
+
+
+def load_keras_predictor(model_dir: Path):
+    """
+    Load model.h5 once and return a batched predict function
+    """
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(model_dir / 'model.h5')
+
+    def predict(batch: np.ndarray) -> np.ndarray:
+        return model(batch, training=False).numpy()
+
+    return predict
+
+
+def load_numpy_predictor(model_dir: Path):
+    """
+    Load model.h5 into the TensorFlow-free NumPy engine
+    """
+    from numpy_inference import NumpyMLP
+
+    return NumpyMLP.load(model_dir).predict
+
+
+def load_label_mapping(model_dir: Path) -> List[str]:
+    """
+    Load label_mapping.json as a list indexed by class id
+    """
+    with open(model_dir / 'label_mapping.json', 'r', encoding='utf-8') as f:
+        label_mapping = json.load(f)
+    return [label_mapping[str(i)] for i in range(len(label_mapping))]
+
+
+class MicroBatcher:
+    """
+    Collect concurrent requests into single forward passes
+
+    Requests are queued and a single worker thread drains up to `max_batch`
+    samples, waiting at most `max_wait_ms` after the first one arrives before
+    running the model on the combined batch.
+    """
+
+    def __init__(self, predict, max_batch: int = 64, max_wait_ms: float = 2.0):
+        self.predict = predict
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.batch_sizes: List[int] = []
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, samples: np.ndarray) -> Future:
+        """
+        Queue feature rows of shape (n, num_features) and return a Future of probabilities
+        """
+        future = Future()
+        self._queue.put((samples, future))
+        return future
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            count = len(items[0][0])
+            deadline = time.perf_counter() + self.max_wait
+
+            while count < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                items.append(item)
+                count += len(item[0])
+
+            batch = np.concatenate([samples for samples, _ in items]).astype(np.float32)
+            try:
+                probabilities = self.predict(batch)
+            except Exception as e:
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+
+            with self._lock:
+                self.batch_sizes.append(len(batch))
+
+            offset = 0
+            for samples, future in items:
+                future.set_result(probabilities[offset:offset + len(samples)])
+                offset += len(samples)
+
+    def stats(self) -> dict:
+        """
+        Batch size summary since startup
+        """
+        with self._lock:
+            sizes = np.array(self.batch_sizes)
+        if len(sizes) == 0:
+            return {'batches': 0}
+        return {
+            'batches': int(len(sizes)),
+            'samples': int(sizes.sum()),
+            'mean_batch_size': float(sizes.mean()),
+            'max_batch_size': int(sizes.max())
+        }
+
+
+def request_handedness(request: dict, num_samples: int, spec: Optional[dict]) -> Optional[np.ndarray]:
+    """
+    Handedness codes of the samples in a /predict request
+
+    'handedness' is one 'Left' / 'Right' label for all samples or a list with
+    one label per sample. Models trained on canonicalized hands require it.
+    """
+    labels = request.get('handedness')
+    if labels is None:
+        if spec and spec.get('canonicalize_handedness'):
+            raise ValueError("the model was trained on canonicalized hands, 'handedness' is required")
+        return None
+    if isinstance(labels, str):
+        labels = [labels] * num_samples
+    if len(labels) != num_samples:
+        raise ValueError(f"expected {num_samples} handedness labels, got {len(labels)}")
+    return np.array([handedness_code(label) for label in labels], dtype=np.int8)
+
+
+def make_handler(batcher: MicroBatcher, labels: List[str], top_k: int = 5, tcp: bool = True,
+                 spec: Optional[dict] = None):
+    """
+    Build the request handler class bound to a batcher
+    """
+
+    class InferenceHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        # Headers and body are separate writes; avoid Nagle/delayed-ACK stalls on keep-alive
+        disable_nagle_algorithm = tcp
+
+        def address_string(self):
+            # Unix-socket clients have no host address
+            return self.client_address[0] if self.client_address else 'unix'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, payload: dict):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send_json(200, {'status': 'ok', 'classes': len(labels)})
+            elif self.path == '/stats':
+                self._send_json(200, batcher.stats())
+            else:
+                self._send_json(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if self.path != '/predict':
+                self._send_json(404, {'error': 'not found'})
+                return
+
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length))
+                samples = np.asarray(request['landmarks'], dtype=np.float64).reshape(-1, NUM_FEATURES)
+                handedness = request_handedness(request, len(samples), spec)
+            except (KeyError, ValueError, TypeError) as e:
+                self._send_json(400, {'error': f'invalid request: {e}'})
+                return
+
+            # Same normalization and features the model was trained on
+            features = compute_features(samples, spec, handedness)
+
+            try:
+                probabilities = batcher.submit(features).result()
+            except Exception as e:
+                self._send_json(500, {'error': str(e)})
+                return
+
+            predictions = []
+            for row in probabilities:
+                top = np.argsort(row)[::-1][:top_k]
+                predictions.append({
+                    'letter': labels[top[0]],
+                    'confidence': float(row[top[0]]),
+                    'top': [{'letter': labels[i], 'confidence': float(row[i])} for i in top]
+                })
+
+            self._send_json(200, {'predictions': predictions})
+
+    return InferenceHandler
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Threaded HTTP server listening on a Unix domain socket
+    """
+    daemon_threads = True
+
+
+def serve(model_dir: Path, host: str = '127.0.0.1', port: int = 8765,
+          unix_socket: Optional[Path] = None, max_batch: int = 64, max_wait_ms: float = 2.0,
+          backend: str = 'keras'):
+    """
+    Start the inference server
+
+    backend='numpy' runs the forward pass with numpy_inference and never
+    imports TensorFlow.
+    """
+    print("=" * 60)
+    print("Inference Server")
+    print("=" * 60)
+
+    print(f"Loading model from {model_dir} ({backend} backend)...")
+    if backend == 'numpy':
+        predict = load_numpy_predictor(model_dir)
+    else:
+        predict = load_keras_predictor(model_dir)
+    labels = load_label_mapping(model_dir)
+    spec = load_feature_spec(model_dir)
+
+    # Warm up so the first request does not pay for tracing
+    predict(np.zeros((1, spec['num_features']), dtype=np.float32))
+
+    batcher = MicroBatcher(predict, max_batch, max_wait_ms)
+    handler = make_handler(batcher, labels, tcp=unix_socket is None, spec=spec)
+
+    if unix_socket is not None:
+        if unix_socket.exists():
+            os.unlink(unix_socket)
+        server = ThreadingUnixHTTPServer(str(unix_socket), handler)
+        address = f"unix:{unix_socket}"
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        address = f"http://{host}:{port}"
+
+    print(f"Serving {len(labels)} classes on {address} (max batch {max_batch}, max wait {max_wait_ms} ms)")
+    print("Endpoints: POST /predict, GET /health, GET /stats")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if unix_socket is not None and unix_socket.exists():
+            os.unlink(unix_socket)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the landmark classifier over HTTP')
+    parser.add_argument('--model', type=str, default='./model', help='Directory with model.h5 and label_mapping.json')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Bind address')
+    parser.add_argument('--port', type=int, default=8765, help='Bind port')
+    parser.add_argument('--unix-socket', type=str, default=None, help='Listen on a Unix socket instead of TCP')
+    parser.add_argument('--max-batch', type=int, default=64, help='Maximum samples per forward pass')
+    parser.add_argument('--backend', type=str, default='keras', choices=['keras', 'numpy'],
+                        help='Inference backend (numpy avoids importing TensorFlow)')
+    parser.add_argument('--max-wait-ms', type=float, default=2.0, help='Maximum time to wait for a batch to fill')
+
+    args = parser.parse_args()
+
+    serve(
+        Path(args.model),
+        host=args.host,
+        port=args.port,
+        unix_socket=Path(args.unix_socket) if args.unix_socket else None,
+        max_batch=args.max_batch,
+        max_wait_ms=args.max_wait_ms,
+        backend=args.backend
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Input Pipeline
+tf.data input pipeline and throughput reporting for model training
+"""
+
+import time
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from typing import Callable, List, Optional
+
+AUTOTUNE = tf.data.AUTOTUNE
+
+# Rows gathered from the (possibly memory-mapped) landmark matrix per read
+LOAD_CHUNK_SIZE = 4096
+
+
+def make_dataset(X: np.ndarray, y: np.ndarray, indices: np.ndarray, batch_size: int = 32,
+                 training: bool = True, shuffle_buffer: int = 10000,
+                 cache: Optional[str] = None, augment_fn: Optional[Callable] = None,
+                 seed: Optional[int] = None, feature_fn: Optional[Callable] = None) -> tf.data.Dataset:
+    """
+    Build a tf.data pipeline over the rows of X selected by `indices`
+
+    Rows are gathered from X in chunks, so a memory-mapped landmark store is
+    read on demand instead of being copied into a tensor up front.
+
+    Args:
+        X: Landmark matrix of shape (N, features) or windows of shape
+            (N, T, features), may be a np.memmap
+        y: Encoded labels of shape (N,)
+        indices: Row indices belonging to this split
+        training: Shuffle and augment when True
+        shuffle_buffer: Size of the bounded shuffle buffer
+        cache: None to disable, 'memory' for an in-memory cache, or a file
+            path prefix for an on-disk cache
+        augment_fn: Batched augmentation applied to (features, labels),
+            e.g. augmentation.make_augment_fn()
+        feature_fn: NumPy function from landmark rows to model inputs, e.g.
+            a features.compute_features spec. Applied when rows are loaded,
+            or after augment_fn so augmentation still sees raw landmarks.
+    """
+    sample_shape = list(X.shape[1:])
+    features_on_load = feature_fn is not None and not (training and augment_fn is not None)
+    output_shape = sample_shape
+    if feature_fn is not None:
+        output_shape = list(feature_fn(np.zeros([1] + sample_shape, dtype=np.float32)).shape[1:])
+
+    def load_rows(batch_indices):
+        # Sorted reads keep memory-mapped access sequential
+        batch_indices = np.sort(batch_indices)
+        rows = np.asarray(X[batch_indices], dtype=np.float32)
+        if features_on_load:
+            rows = feature_fn(rows)
+        return rows.astype(np.float32), np.asarray(y[batch_indices], dtype=np.int32)
+
+    def load_chunk(batch_indices):
+        features, labels = tf.numpy_function(load_rows, [batch_indices], (tf.float32, tf.int32))
+        features.set_shape([None] + (output_shape if features_on_load else sample_shape))
+        labels.set_shape([None])
+        return features, labels
+
+    def apply_features(features, labels):
+        features = tf.numpy_function(lambda rows: feature_fn(rows).astype(np.float32), [features], tf.float32)
+        features.set_shape([None] + output_shape)
+        return features, labels
+
+    ds = tf.data.Dataset.from_tensor_slices(np.asarray(indices, dtype=np.int64))
+    ds = ds.batch(LOAD_CHUNK_SIZE).map(load_chunk, num_parallel_calls=AUTOTUNE).unbatch()
+
+    if cache == 'memory':
+        ds = ds.cache()
+    elif cache:
+        ds = ds.cache(cache)
+
+    if training:
+        ds = ds.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+
+    ds = ds.batch(batch_size)
+
+    if training and augment_fn is not None:
+        ds = ds.map(augment_fn, num_parallel_calls=AUTOTUNE)
+        if feature_fn is not None:
+            ds = ds.map(apply_features, num_parallel_calls=AUTOTUNE)
+
+    return ds.prefetch(AUTOTUNE)
+
+
+class ThroughputCallback(keras.callbacks.Callback):
+    """
+    Record training throughput in samples/sec for each epoch
+    """
+
+    def __init__(self, num_samples: int):
+        super().__init__()
+        self.num_samples = num_samples
+        self.samples_per_sec: List[float] = []
+        self._epoch_start = 0.0
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch_start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        elapsed = time.perf_counter() - self._epoch_start
+        throughput = self.num_samples / elapsed if elapsed > 0 else 0.0
+        self.samples_per_sec.append(throughput)
+        if logs is not None:
+            logs['samples_per_sec'] = throughput
+
+    def report(self) -> dict:
+        """
+        Summary of per-epoch throughput
+        """
+        if not self.samples_per_sec:
+            return {'epochs': 0}
+
+        # The first epoch includes tracing and cache warm-up
+        steady = self.samples_per_sec[1:] or self.samples_per_sec
+        return {
+            'epochs': len(self.samples_per_sec),
+            'first_epoch_samples_per_sec': self.samples_per_sec[0],
+            'mean_samples_per_sec': float(np.mean(steady)),
+            'per_epoch_samples_per_sec': self.samples_per_sec
+        }
@@ -0,0 +1,199 @@
+"""
+Landmark Cache
+Persistent content-addressed cache of extracted landmarks
+"""
+
+import os
+import argparse
+import hashlib
+import json
+import shutil
+import tempfile
+import zipfile
+import numpy as np
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# Bump when the cached array layout changes
+CACHE_FORMAT_VERSION = 3
+
+# Arrays stored in each cache entry, in the order get() returns them
+ENTRY_ARRAYS = ['landmarks', 'frame_indices', 'handedness', 'hand_scores']
+
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def hash_file(file_path: Path) -> str:
+    """
+    Compute the SHA-256 hex digest of a file's content
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_settings(settings: dict) -> str:
+    """
+    Compute a stable digest of extractor settings
+    """
+    payload = json.dumps(
+        {'cache_format': CACHE_FORMAT_VERSION, **settings},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LandmarkCache:
+    """
+    On-disk cache mapping (file content, extractor settings) to landmarks
+
+    Entries are stored as .npz files under `<cache_dir>/<key[:2]>/<key>.npz`,
+    where the key combines the file's content hash with the settings hash.
+    Changing any extractor setting therefore misses the cache instead of
+    returning stale landmarks.
+    """
+
+    def __init__(self, cache_dir: Path, settings: dict, max_size_bytes: Optional[int] = None):
+        self.cache_dir = Path(cache_dir)
+        self.settings_hash = hash_settings(settings)
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def key_for(self, file_path: Path, content_hash: Optional[str] = None) -> str:
+        """
+        Build the cache key for a file under the current settings
+
+        A known SHA-256 (e.g. from the dataset manifest) skips re-hashing.
+        """
+        if content_hash is None:
+            content_hash = hash_file(file_path)
+        return hashlib.sha256((content_hash + self.settings_hash).encode('ascii')).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f'{key}.npz'
+
+    def get(self, key: str) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Return cached (landmarks, frame indices, handedness, hand scores) for a key, or None on a miss
+
+        An unreadable entry (e.g. truncated by a crash) counts as a miss and is removed.
+        """
+        entry_path = self._entry_path(key)
+        try:
+            with np.load(entry_path, allow_pickle=False) as entry:
+                result = tuple(entry[name] for name in ENTRY_ARRAYS)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (KeyError, ValueError, OSError, EOFError, zipfile.BadZipFile):
+            print(f"Warning: Dropping unreadable cache entry {entry_path}")
+            entry_path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+
+        # Refresh mtime so eviction drops least recently used entries first
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+
+        self.hits += 1
+        return result
+
+    def put(self, key: str, landmarks: np.ndarray, frame_indices: np.ndarray,
+            handedness: np.ndarray, hand_scores: np.ndarray):
+        """
+        Store landmarks with their source frame indices and handedness for a key
+        """
+        entry_path = self._entry_path(key)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a unique temporary file first so readers never see partial entries
+        fd, tmp_name = tempfile.mkstemp(prefix=f'{entry_path.stem}.', suffix='.tmp', dir=entry_path.parent)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, landmarks=landmarks, frame_indices=frame_indices,
+                         handedness=handedness, hand_scores=hand_scores)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_name, entry_path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def _entries(self) -> List[Path]:
+        return list(self.cache_dir.glob('*/*.npz'))
+
+    def size_bytes(self) -> int:
+        """
+        Total size of all cache entries
+        """
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def evict(self) -> int:
+        """
+        Remove least recently used entries until the cache fits max_size_bytes
+
+        Returns:
+            Number of entries removed
+        """
+        if self.max_size_bytes is None:
+            return 0
+
+        entries = []
+        for entry in self._entries():
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+
+        for _, size, entry in sorted(entries):
+            if total <= self.max_size_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+
+        return removed
+
+    def clear(self):
+        """
+        Invalidate the whole cache
+        """
+        if self.cache_dir.exists():
+            shutil.rmtree(self.cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect or invalidate the landmark cache')
+    parser.add_argument('--cache-dir', type=str, default='./.landmark_cache', help='Cache directory')
+    parser.add_argument('--clear', action='store_true', help='Remove all cache entries')
+    parser.add_argument('--max-size-mb', type=float, default=None, help='Evict entries down to this size')
+
+    args = parser.parse_args()
+
+    max_size_bytes = int(args.max_size_mb * 1024 * 1024) if args.max_size_mb is not None else None
+    cache = LandmarkCache(Path(args.cache_dir), {}, max_size_bytes)
+
+    if args.clear:
+        cache.clear()
+        print(f"Cache cleared: {cache.cache_dir}")
+        return
+
+    removed = cache.evict()
+    if removed:
+        print(f"Evicted {removed} entries")
+
+    print(f"Cache directory: {cache.cache_dir}")
+    print(f"Entries: {len(cache._entries())}")
+    print(f"Size: {cache.size_bytes() / (1024 * 1024):.2f} MB")
+
+
+if __name__ == '__main__':
+    main()
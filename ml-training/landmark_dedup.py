@@ -0,0 +1,356 @@
+"""
+Landmark Deduplication
+Prune near-duplicate samples from a landmark store after extraction
+"""
+
+import argparse
+import json
+import tempfile
+import time
+import numpy as np
+from pathlib import Path
+from typing import Optional
+from landmark_store import LandmarkStoreWriter, is_store, open_store
+
+# threshold: max per-coordinate difference (normalized image units) for two samples to count as duplicates
+# scope: 'source' compares samples of the same source file; 'label' also hashes samples across all
+#        files of a label onto a grid of `threshold`-sized cells and keeps one sample per cell
+DEFAULT_DEDUP = {'threshold': 0.01, 'scope': 'source'}
+DEDUP_SCOPES = ['source', 'label']
+
+# Rows of the pairwise distance matrix computed at once, bounding memory for long videos
+DISTANCE_CHUNK = 256
+
+# A pruned run may lose at most this much test accuracy and still count as equal
+DEFAULT_MAX_ACCURACY_DROP = 0.005
+
+
+def pairwise_max_distance(landmarks: np.ndarray) -> np.ndarray:
+    """
+    Chebyshev (max absolute coordinate) distance between all pairs of samples
+
+    Args:
+        landmarks: Array of shape (n, 63)
+
+    Returns:
+        Array of shape (n, n)
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float32)
+    distances = np.empty((len(landmarks), len(landmarks)), dtype=np.float32)
+    for start in range(0, len(landmarks), DISTANCE_CHUNK):
+        chunk = landmarks[start:start + DISTANCE_CHUNK]
+        distances[start:start + len(chunk)] = np.abs(chunk[:, None, :] - landmarks[None, :, :]).max(axis=2)
+    return distances
+
+
+def radius_keep_mask(landmarks: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Greedily keep samples farther than `threshold` from every kept sample
+
+    Samples are visited in order (frame order within a source file), so the
+    first frame of a run of near-identical frames is the one kept.
+    """
+    count = len(landmarks)
+    keep = np.zeros(count, dtype=bool)
+    if count < 2:
+        keep[:] = True
+        return keep
+
+    near = pairwise_max_distance(landmarks) <= threshold
+    covered = np.zeros(count, dtype=bool)
+    for i in range(count):
+        if not covered[i]:
+            keep[i] = True
+            covered |= near[i]
+    return keep
+
+
+def source_keep_mask(landmarks: np.ndarray, source_ids: np.ndarray, handedness: np.ndarray,
+                     threshold: float) -> np.ndarray:
+    """
+    Radius deduplication within each source file and hand
+
+    Samples of one source are contiguous in a store, so groups are found
+    from the boundaries of the source id column.
+    """
+    source_ids = np.asarray(source_ids)
+    handedness = np.asarray(handedness)
+    keep = np.ones(len(source_ids), dtype=bool)
+
+    boundaries = np.flatnonzero(np.diff(source_ids)) + 1
+    for start, end in zip(np.r_[0, boundaries], np.r_[boundaries, len(source_ids)]):
+        if end - start < 2:
+            continue
+        group_hands = handedness[start:end]
+        for code in np.unique(group_hands):
+            indices = start + np.flatnonzero(group_hands == code)
+            keep[indices] = radius_keep_mask(np.asarray(landmarks[indices]), threshold)
+    return keep
+
+
+def label_keep_mask(landmarks: np.ndarray, label_codes: np.ndarray, handedness: np.ndarray,
+                    threshold: float, candidates: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Grid-hash deduplication across all source files of each label
+
+    Landmarks are quantized to cells of `threshold` per coordinate and the
+    first sample of each (label, hand, cell) key is kept. This is exact
+    hashing rather than a radius query: two samples closer than `threshold`
+    that straddle a cell boundary are both kept.
+    """
+    keep = np.zeros(len(label_codes), dtype=bool)
+    indices = np.flatnonzero(candidates) if candidates is not None else np.arange(len(label_codes))
+    if len(indices) == 0:
+        return keep
+
+    cells = np.floor(np.asarray(landmarks[indices], dtype=np.float64) / threshold).astype(np.int32)
+    keys = np.column_stack([np.asarray(label_codes)[indices], np.asarray(handedness)[indices], cells])
+    _, first = np.unique(keys, axis=0, return_index=True)
+    keep[indices[first]] = True
+    return keep
+
+
+def dedup_keep_mask(store, threshold: float, scope: str = 'source') -> np.ndarray:
+    """
+    Boolean mask of the samples of a store kept by deduplication
+    """
+    if scope not in DEDUP_SCOPES:
+        raise ValueError(f"Unknown dedup scope: {scope} (choose from {DEDUP_SCOPES})")
+    if threshold <= 0:
+        return np.ones(len(store), dtype=bool)
+
+    keep = source_keep_mask(store.landmarks, store.source_ids, store.handedness, threshold)
+    if scope == 'label':
+        keep = label_keep_mask(store.landmarks, store.label_codes, store.handedness, threshold, candidates=keep)
+    return keep
+
+
+def write_pruned_store(store, keep: np.ndarray, output_path: Path, metadata: dict):
+    """
+    Write the kept samples to a new store, one append per source file
+    """
+    source_ids = np.asarray(store.source_ids)
+    boundaries = np.flatnonzero(np.diff(source_ids)) + 1
+    with LandmarkStoreWriter(output_path, metadata) as writer:
+        for start, end in zip(np.r_[0, boundaries], np.r_[boundaries, len(source_ids)]):
+            if start == end:
+                continue
+            rows = start + np.flatnonzero(keep[start:end])
+            if len(rows) == 0:
+                continue
+            writer.append(
+                np.asarray(store.landmarks[rows]),
+                store.classes[int(store.label_codes[start])],
+                store.sources[int(source_ids[start])],
+                frame_indices=np.asarray(store.frame_indices[rows]),
+                handedness=np.asarray(store.handedness[rows]),
+                hand_scores=np.asarray(store.hand_scores[rows])
+            )
+
+
+def _holdout_accuracy(model_dir: Path, X: np.ndarray, labels: np.ndarray) -> float:
+    """
+    Accuracy of a trained model on raw landmark samples
+    """
+    from tensorflow import keras
+    from features import compute_features, load_feature_spec
+
+    with open(model_dir / 'label_mapping.json', 'r', encoding='utf-8') as f:
+        codes = {label: int(index) for index, label in json.load(f).items()}
+    model = keras.models.load_model(model_dir / 'model.h5')
+    X = compute_features(X, load_feature_spec(model_dir))
+    predictions = np.argmax(model.predict(X, batch_size=4096, verbose=0), axis=1)
+    # A class missing from the training store can never be predicted
+    y = np.array([codes.get(label, -1) for label in labels])
+    return float(np.mean(predictions == y))
+
+
+def compare_training(full_path: Path, pruned_path: Path, train_settings: Optional[dict] = None,
+                     max_accuracy_drop: float = DEFAULT_MAX_ACCURACY_DROP) -> dict:
+    """
+    Train on the full and the pruned store with the same settings
+
+    Source files are split once on the full store (grouped and stratified,
+    see train_model.split_indices). Both runs train on the remaining files
+    of their store and are scored on the same held-out samples of the full
+    store, so the accuracies are comparable. Each run reports its wall time.
+    Pruning counts as free if accuracy drops by at most `max_accuracy_drop`.
+    """
+    from sklearn.preprocessing import LabelEncoder
+    from train_model import load_data, split_indices, train_model
+
+    train_settings = train_settings or {}
+    X, y, groups = load_data(full_path, **(train_settings.get('sample_filter') or {}), return_groups=True)
+    _, test_idx = split_indices(LabelEncoder().fit_transform(y), groups)
+    full_store = open_store(full_path)
+    holdout_sources = {full_store.sources[source_id] for source_id in np.unique(groups[test_idx])}
+    X_holdout, y_holdout = np.asarray(X[test_idx]), np.asarray(y[test_idx])
+    print(f"\nHeld out {len(holdout_sources)} source files ({len(test_idx)} samples) for scoring both runs")
+
+    runs = {}
+    with tempfile.TemporaryDirectory(prefix='dedup_train_') as tmp_dir:
+        for name, data_path in [('full', full_path), ('pruned', pruned_path)]:
+            print("\n" + "=" * 60)
+            print(f"Training on the {name} dataset: {data_path}")
+            print("=" * 60)
+            store = full_store if name == 'full' else open_store(data_path)
+            in_holdout = np.array([source in holdout_sources for source in store.sources], dtype=bool)
+            train_path = Path(tmp_dir) / f'{name}_train'
+            write_pruned_store(store, ~in_holdout[np.asarray(store.source_ids)], train_path,
+                               store.header.get('metadata', {}))
+
+            model_dir = Path(tmp_dir) / name
+            start = time.perf_counter()
+            train_model(train_path, model_dir, **train_settings)
+            seconds = time.perf_counter() - start
+            with open(model_dir / 'model_metadata.json', 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+            runs[name] = {
+                'seconds': seconds,
+                'test_accuracy': _holdout_accuracy(model_dir, X_holdout, y_holdout),
+                'epochs_trained': metadata['epochs_trained'],
+                'train_samples': metadata['train_samples'],
+                'seconds_per_epoch': seconds / max(metadata['epochs_trained'], 1)
+            }
+
+    full, pruned = runs['full'], runs['pruned']
+    return {
+        **runs,
+        'holdout_sources': len(holdout_sources),
+        'holdout_samples': int(len(test_idx)),
+        'seconds_saved': full['seconds'] - pruned['seconds'],
+        'time_saved': 1.0 - pruned['seconds'] / full['seconds'] if full['seconds'] else 0.0,
+        'accuracy_delta': pruned['test_accuracy'] - full['test_accuracy'],
+        'equal_accuracy': pruned['test_accuracy'] >= full['test_accuracy'] - max_accuracy_drop
+    }
+
+
+def dedup_landmarks(input_path: Path, output_path: Path, threshold: float = DEFAULT_DEDUP['threshold'],
+                    scope: str = DEFAULT_DEDUP['scope'], compare: bool = False,
+                    train_settings: Optional[dict] = None,
+                    max_accuracy_drop: float = DEFAULT_MAX_ACCURACY_DROP,
+                    report_path: Optional[Path] = None, metrics=None) -> dict:
+    """
+    Drop near-duplicate samples of a landmark store
+
+    Two samples are near-duplicates when no coordinate differs by more than
+    `threshold`. Within a source file (and hand), samples are compared
+    pairwise and the first of each cluster is kept; scope='label' then also
+    hashes the survivors of every file of a label onto a grid. The pruned
+    store keeps per-sample frame indices, so sequence windows built from it
+    have gaps where frames were dropped.
+
+    `compare` trains on both stores (see compare_training) to measure the
+    training time saved.
+    """
+    print("=" * 60)
+    print("Landmark Deduplication")
+    print("=" * 60)
+
+    if not is_store(input_path):
+        raise ValueError(f"Deduplication needs a landmark store (a CSV has no source files): {input_path}")
+
+    store = open_store(input_path)
+    print(f"Input: {input_path} ({len(store)} samples, {len(store.sources)} source files)")
+    print(f"Threshold: {threshold}, scope: {scope}")
+
+    start = time.perf_counter()
+    keep = dedup_keep_mask(store, threshold, scope)
+    seconds = time.perf_counter() - start
+
+    kept = int(keep.sum())
+    settings = {'threshold': threshold, 'scope': scope}
+    metadata = {**store.header.get('metadata', {}), 'dedup': {**settings, 'input_samples': len(store)}}
+    write_pruned_store(store, keep, output_path, metadata)
+
+    label_codes = np.asarray(store.label_codes)
+    before_by_label = np.bincount(label_codes, minlength=len(store.classes))
+    after_by_label = np.bincount(label_codes[keep], minlength=len(store.classes))
+    shrink = 1.0 - kept / len(store) if len(store) else 0.0
+
+    print(f"\nKept {kept} of {len(store)} samples ({shrink:.1%} removed) in {seconds:.2f}s")
+    print(f"\n{'Label':<12}{'Before':>9}{'After':>9}{'Removed':>10}")
+    for code, label in enumerate(store.classes):
+        before, after = int(before_by_label[code]), int(after_by_label[code])
+        removed = 1.0 - after / before if before else 0.0
+        print(f"{label:<12}{before:>9}{after:>9}{removed:>10.1%}")
+
+    report = {
+        'input': str(input_path),
+        'output': str(output_path),
+        **settings,
+        'samples_before': len(store),
+        'samples_after': kept,
+        'shrink': shrink,
+        'seconds': seconds,
+        'by_label': {
+            label: {'before': int(before_by_label[code]), 'after': int(after_by_label[code])}
+            for code, label in enumerate(store.classes)
+        }
+    }
+
+    if compare:
+        training = compare_training(input_path, output_path, train_settings, max_accuracy_drop)
+        report['training'] = training
+        full, pruned = training['full'], training['pruned']
+        print("\n" + "=" * 60)
+        print(f"Accuracy on {training['holdout_samples']} samples of {training['holdout_sources']} "
+              f"held-out source files of the full store")
+        print(f"{'Dataset':<10}{'Train samples':>15}{'Epochs':>8}{'Seconds':>10}{'s/epoch':>9}{'Accuracy':>10}")
+        for name, run in [('full', full), ('pruned', pruned)]:
+            print(f"{name:<10}{run['train_samples']:>15}{run['epochs_trained']:>8}{run['seconds']:>10.1f}"
+                  f"{run['seconds_per_epoch']:>9.2f}{run['test_accuracy']:>10.4f}")
+        print(f"\nTraining time saved: {training['seconds_saved']:.1f}s ({training['time_saved']:.1%}), "
+              f"accuracy delta {training['accuracy_delta']:+.4f}")
+        if not training['equal_accuracy']:
+            print(f"Warning: Pruned accuracy dropped by more than {max_accuracy_drop}; "
+                  f"try a smaller --threshold")
+
+    if metrics is not None:
+        metrics.emit('dedup_summary', **{key: value for key, value in report.items() if key != 'by_label'})
+
+    if report_path is not None:
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nReport saved to {report_path}")
+
+    print("\n" + "=" * 60)
+    print(f"Pruned store saved to: {output_path}")
+    print("=" * 60)
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Remove near-duplicate samples from a landmark store')
+    parser.add_argument('--input', type=str, required=True, help='Input landmark store')
+    parser.add_argument('--output', type=str, required=True, help='Output landmark store')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_DEDUP['threshold'],
+                        help='Max per-coordinate difference of near-duplicates (0 keeps everything)')
+    parser.add_argument('--scope', type=str, default=DEFAULT_DEDUP['scope'], choices=DEDUP_SCOPES,
+                        help="'source': within each file; 'label': also across files of a label")
+    parser.add_argument('--compare-training', action='store_true',
+                        help='Train on the full and pruned stores and compare time and accuracy')
+    parser.add_argument('--epochs', type=int, default=100, help='Epochs for --compare-training')
+    parser.add_argument('--batch-size', type=int, default=32, help='Batch size for --compare-training')
+    parser.add_argument('--max-accuracy-drop', type=float, default=DEFAULT_MAX_ACCURACY_DROP,
+                        help='Accuracy loss still counted as equal in --compare-training')
+    parser.add_argument('--report', type=str, default=None, help='Write the report to this JSON file')
+
+    args = parser.parse_args()
+
+    dedup_landmarks(
+        Path(args.input),
+        Path(args.output),
+        threshold=args.threshold,
+        scope=args.scope,
+        compare=args.compare_training,
+        train_settings={'epochs': args.epochs, 'batch_size': args.batch_size},
+        max_accuracy_drop=args.max_accuracy_drop,
+        report_path=Path(args.report) if args.report else None
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,423 @@
+"""
+Landmark Store
+Binary columnar landmark dataset with memory-mapped reads
+"""
+
+import os
+import argparse
+import json
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import List, Optional
+from features import HANDEDNESS_LABELS, UNKNOWN_HANDEDNESS
+
+STORE_FORMAT = 'tida-landmarks'
+STORE_VERSION = 2
+
+NUM_FEATURES = 63
+LANDMARK_COLUMNS = [f'{axis}{i}' for i in range(21) for axis in ['x', 'y', 'z']]
+
+# Per-sample hand columns in the CSV layout, between label and landmarks
+HAND_COLUMNS = ['handedness', 'hand_score']
+
+HEADER_FILE = 'header.json'
+
+# Column name -> (file name, dtype, values per sample)
+COLUMNS = {
+    'landmarks': ('landmarks.f32', np.dtype('<f4'), NUM_FEATURES),
+    'label_codes': ('labels.i32', np.dtype('<i4'), 1),
+    'source_ids': ('sources.i32', np.dtype('<i4'), 1),
+    'frame_indices': ('frames.i32', np.dtype('<i4'), 1),
+    'handedness': ('handedness.i8', np.dtype('i1'), 1),
+    'hand_scores': ('hand_scores.f32', np.dtype('<f4'), 1)
+}
+
+# Fill values for columns missing from stores written by older versions
+COLUMN_DEFAULTS = {
+    'handedness': UNKNOWN_HANDEDNESS,
+    'hand_scores': np.nan
+}
+
+
+def handedness_labels(codes: np.ndarray) -> np.ndarray:
+    """
+    Decode handedness codes to 'Left' / 'Right' ('' if unknown)
+    """
+    names = np.asarray(HANDEDNESS_LABELS + [''], dtype=object)
+    codes = np.asarray(codes, dtype=np.int64)
+    return names[np.where(codes == UNKNOWN_HANDEDNESS, len(HANDEDNESS_LABELS), codes)]
+
+
+def handedness_canonicalized(path: Path) -> bool:
+    """
+    Whether a landmark or sequence store was extracted with left hands mirrored
+
+    CSV files do not record it and count as not canonicalized.
+    """
+    header_path = Path(path) / HEADER_FILE
+    if not Path(path).is_dir() or not header_path.exists():
+        return False
+    with open(header_path, 'r', encoding='utf-8') as f:
+        return bool(json.load(f).get('metadata', {}).get('canonicalize_handedness', False))
+
+
+def is_store(path: Path) -> bool:
+    """
+    Check whether a path is a landmark store directory
+    """
+    return Path(path).is_dir() and (Path(path) / HEADER_FILE).exists()
+
+
+class LandmarkStoreWriter:
+    """
+    Append-only writer for a landmark store
+
+    Each column is written to its own raw little-endian file as samples
+    arrive, so memory use does not grow with dataset size. The header with
+    the sample count, class list and source list is written on close().
+
+    Passing a `resume_state` previously returned by state() reopens an
+    interrupted store and truncates any samples written after that state.
+    A column file that is missing or shorter than the saved state raises
+    ValueError, since the columns would no longer line up.
+    """
+
+    def __init__(self, path: Path, metadata: Optional[dict] = None, resume_state: Optional[dict] = None):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        # A missing header marks the store as incomplete while writing
+        (self.path / HEADER_FILE).unlink(missing_ok=True)
+
+        self.metadata = metadata or {}
+        self.classes: List[str] = []
+        self.sources: List[str] = []
+        self.num_samples = 0
+
+        if resume_state is not None:
+            self.classes = list(resume_state['classes'])
+            self.sources = list(resume_state['sources'])
+            self.num_samples = resume_state['num_samples']
+
+            for file_name, dtype, width in COLUMNS.values():
+                column_path = self.path / file_name
+                expected = self.num_samples * dtype.itemsize * width
+                size = column_path.stat().st_size if column_path.exists() else None
+                if size is None or size < expected:
+                    raise ValueError(
+                        f"Cannot resume {self.path}: {file_name} is "
+                        f"{'missing' if size is None else f'{size} bytes'}, expected at least {expected} "
+                        f"for {self.num_samples} samples; rerun without --resume"
+                    )
+
+        self._class_codes = {label: code for code, label in enumerate(self.classes)}
+        self._files = {}
+        for name, (file_name, dtype, width) in COLUMNS.items():
+            column_path = self.path / file_name
+            if resume_state is not None:
+                f = open(column_path, 'r+b')
+                f.truncate(self.num_samples * dtype.itemsize * width)
+                f.seek(0, os.SEEK_END)
+            else:
+                f = open(column_path, 'wb')
+            self._files[name] = f
+
+    def append(self, landmarks: np.ndarray, label: str, source: str, frame_indices: Optional[List[int]] = None,
+               handedness: Optional[List[int]] = None, hand_scores: Optional[List[float]] = None):
+        """
+        Append the samples extracted from one source file
+
+        Args:
+            landmarks: Array of shape (n, 63)
+            label: Class label shared by all samples
+            source: Source file path relative to the dataset root
+            frame_indices: Frame index of each sample (0 for images)
+            handedness: Handedness code of each sample (see features.HANDEDNESS_LABELS)
+            hand_scores: Handedness classification score of each sample
+        """
+        landmarks = np.asarray(landmarks, dtype=COLUMNS['landmarks'][1]).reshape(-1, NUM_FEATURES)
+        count = len(landmarks)
+        if count == 0:
+            return
+
+        if label not in self._class_codes:
+            self._class_codes[label] = len(self.classes)
+            self.classes.append(label)
+
+        source_id = len(self.sources)
+        self.sources.append(source)
+
+        if frame_indices is None:
+            frame_indices = np.zeros(count)
+        if handedness is None:
+            handedness = np.full(count, COLUMN_DEFAULTS['handedness'])
+        if hand_scores is None:
+            hand_scores = np.full(count, COLUMN_DEFAULTS['hand_scores'])
+
+        columns = {
+            'landmarks': landmarks,
+            'label_codes': np.full(count, self._class_codes[label]),
+            'source_ids': np.full(count, source_id),
+            'frame_indices': np.asarray(frame_indices),
+            'handedness': np.asarray(handedness),
+            'hand_scores': np.asarray(hand_scores)
+        }
+        for name, values in columns.items():
+            self._files[name].write(values.astype(COLUMNS[name][1]).tobytes())
+
+        self.num_samples += count
+
+    def flush(self):
+        """
+        Flush buffered column data to disk
+        """
+        for f in self._files.values():
+            f.flush()
+            os.fsync(f.fileno())
+
+    def state(self) -> dict:
+        """
+        Writer state needed to resume after an interruption
+        """
+        return {
+            'num_samples': self.num_samples,
+            'classes': list(self.classes),
+            'sources': list(self.sources)
+        }
+
+    def close(self):
+        """
+        Flush columns and write the header
+        """
+        for f in self._files.values():
+            f.close()
+
+        header = {
+            'format': STORE_FORMAT,
+            'version': STORE_VERSION,
+            'num_samples': self.num_samples,
+            'num_features': NUM_FEATURES,
+            'columns': LANDMARK_COLUMNS,
+            'classes': self.classes,
+            'sources': self.sources,
+            'metadata': self.metadata
+        }
+
+        tmp_path = self.path / f'{HEADER_FILE}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(header, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path / HEADER_FILE)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Leave the store without a header so it is not mistaken for complete
+            for f in self._files.values():
+                f.close()
+
+
+class LandmarkCsvWriter:
+    """
+    Append-only writer for the landmarks.csv format
+
+    Mirrors LandmarkStoreWriter so extraction can stream to either format.
+    """
+
+    def __init__(self, path: Path, resume_state: Optional[dict] = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.num_samples = 0
+
+        if resume_state is not None and self.path.exists():
+            self.num_samples = resume_state['num_samples']
+            self._file = open(self.path, 'r+b')
+            self._file.truncate(resume_state['bytes'])
+            self._file.seek(0, os.SEEK_END)
+        else:
+            self._file = open(self.path, 'wb')
+            header_line = ','.join(['label'] + HAND_COLUMNS + LANDMARK_COLUMNS) + os.linesep
+            self._file.write(header_line.encode('utf-8'))
+
+    def append(self, landmarks: np.ndarray, label: str, source: str, frame_indices: Optional[List[int]] = None,
+               handedness: Optional[List[int]] = None, hand_scores: Optional[List[float]] = None):
+        """
+        Append the samples extracted from one source file
+        """
+        landmarks = np.asarray(landmarks).reshape(-1, NUM_FEATURES)
+        count = len(landmarks)
+        if count == 0:
+            return
+
+        if handedness is None:
+            handedness = np.full(count, COLUMN_DEFAULTS['handedness'])
+        if hand_scores is None:
+            hand_scores = np.full(count, COLUMN_DEFAULTS['hand_scores'])
+
+        df = pd.DataFrame(landmarks, columns=LANDMARK_COLUMNS)
+        df.insert(0, 'label', label)
+        df.insert(1, 'handedness', handedness_labels(handedness))
+        df.insert(2, 'hand_score', np.asarray(hand_scores))
+        self._file.write(df.to_csv(header=False, index=False).encode('utf-8'))
+        self.num_samples += len(landmarks)
+
+    def flush(self):
+        """
+        Flush buffered rows to disk
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def state(self) -> dict:
+        """
+        Writer state needed to resume after an interruption
+        """
+        return {
+            'num_samples': self.num_samples,
+            'bytes': self._file.tell()
+        }
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class LandmarkStore:
+    """
+    Read-only view of a landmark store
+
+    Columns are numpy memmaps, so opening a store does not parse or copy
+    the landmark matrix.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+        header_path = self.path / HEADER_FILE
+        if not header_path.exists():
+            raise ValueError(f"Landmark store header not found (incomplete store?): {header_path}")
+
+        with open(header_path, 'r', encoding='utf-8') as f:
+            self.header = json.load(f)
+
+        if self.header.get('format') != STORE_FORMAT:
+            raise ValueError(f"Not a landmark store: {self.path}")
+
+        self.num_samples = self.header['num_samples']
+        self.classes = self.header['classes']
+        self.sources = self.header['sources']
+
+        for name, (file_name, dtype, width) in COLUMNS.items():
+            shape = (self.num_samples, width) if width > 1 else (self.num_samples,)
+            if self.num_samples == 0:
+                column = np.empty(shape, dtype=dtype)
+            elif not (self.path / file_name).exists() and name in COLUMN_DEFAULTS:
+                column = np.full(shape, COLUMN_DEFAULTS[name], dtype=dtype)
+            else:
+                column = np.memmap(self.path / file_name, dtype=dtype, mode='r', shape=shape)
+            setattr(self, name, column)
+
+    def __len__(self) -> int:
+        return self.num_samples
+
+    def labels(self) -> np.ndarray:
+        """
+        Decode label codes to label strings
+        """
+        return np.asarray(self.classes, dtype=object)[self.label_codes]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Build a DataFrame in the landmarks.csv layout
+        """
+        df = pd.DataFrame(np.asarray(self.landmarks), columns=LANDMARK_COLUMNS)
+        df.insert(0, 'label', self.labels())
+        df.insert(1, 'handedness', handedness_labels(self.handedness))
+        df.insert(2, 'hand_score', np.asarray(self.hand_scores))
+        return df
+
+
+def open_store(path: Path) -> LandmarkStore:
+    """
+    Open a landmark store for memory-mapped reading
+    """
+    return LandmarkStore(path)
+
+
+def reorder_sources(path: Path, source_order: List[int]):
+    """
+    Rewrite a store so the samples of its sources appear in `source_order`
+
+    `source_order` lists source ids in their new order. The rewritten
+    columns and header replace the originals, and the header goes last.
+    """
+    store = open_store(path)
+    tmp_path = Path(path).with_name(Path(path).name + '.reorder')
+    source_ids = np.asarray(store.source_ids)
+    boundaries = np.flatnonzero(np.diff(source_ids)) + 1
+    ranges = {
+        int(source_ids[start]): (start, end)
+        for start, end in zip(np.r_[0, boundaries], np.r_[boundaries, len(source_ids)])
+        if end > start
+    }
+
+    with LandmarkStoreWriter(tmp_path, store.header.get('metadata')) as writer:
+        for source_id in source_order:
+            start, end = ranges[source_id]
+            writer.append(
+                np.asarray(store.landmarks[start:end]),
+                store.classes[int(store.label_codes[start])],
+                store.sources[source_id],
+                frame_indices=np.asarray(store.frame_indices[start:end]),
+                handedness=np.asarray(store.handedness[start:end]),
+                hand_scores=np.asarray(store.hand_scores[start:end])
+            )
+    del store
+
+    for file_name, _, _ in COLUMNS.values():
+        os.replace(tmp_path / file_name, Path(path) / file_name)
+    os.replace(tmp_path / HEADER_FILE, Path(path) / HEADER_FILE)
+    os.rmdir(tmp_path)
+
+
+def export_csv(store_path: Path, csv_path: Path):
+    """
+    Export a landmark store to the landmarks.csv format
+    """
+    store = open_store(store_path)
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    store.to_dataframe().to_csv(csv_path, index=False)
+    print(f"Exported {len(store)} samples to {csv_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect or export a landmark store')
+    parser.add_argument('--input', type=str, required=True, help='Landmark store directory')
+    parser.add_argument('--export-csv', type=str, default=None, help='Write the store as a CSV file')
+
+    args = parser.parse_args()
+
+    store_path = Path(args.input)
+
+    if args.export_csv:
+        export_csv(store_path, Path(args.export_csv))
+        return
+
+    store = open_store(store_path)
+    print(f"Landmark store: {store_path}")
+    print(f"Samples: {len(store)}")
+    print(f"Sources: {len(store.sources)}")
+    print(f"Classes: {store.classes}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,323 @@
+"""
+NumPy Inference
+TensorFlow-free forward pass for the trained landmark MLP
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+import numpy as np
+from pathlib import Path
+from typing import List, Optional
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0.0, out=x),
+    'sigmoid': lambda x: 1.0 / (1.0 + np.exp(-x)),
+    'tanh': np.tanh,
+    'softmax': None  # handled separately for numerical stability
+}
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    x = x - x.max(axis=1, keepdims=True)
+    np.exp(x, out=x)
+    x /= x.sum(axis=1, keepdims=True)
+    return x
+
+
+def layer_spec(class_name: str, config: dict, weights: dict) -> Optional[dict]:
+    """
+    Convert a Keras layer config and its weights into a layer spec
+
+    Returns:
+        {'type': 'dense', ...}, {'type': 'affine', ...} for BatchNormalization,
+        or None for layers that are identities at inference
+    """
+    if class_name == 'Dense':
+        return {
+            'type': 'dense',
+            'kernel': weights['kernel'].astype(np.float32),
+            'bias': weights['bias'].astype(np.float32) if 'bias' in weights else None,
+            'activation': config.get('activation', 'linear')
+        }
+
+    if class_name == 'BatchNormalization':
+        mean = weights['moving_mean'].astype(np.float64)
+        variance = weights['moving_variance'].astype(np.float64)
+        gamma = weights['gamma'].astype(np.float64) if 'gamma' in weights else np.ones_like(mean)
+        beta = weights['beta'].astype(np.float64) if 'beta' in weights else np.zeros_like(mean)
+
+        scale = gamma / np.sqrt(variance + config.get('epsilon', 1e-3))
+        return {'type': 'affine', 'scale': scale, 'shift': beta - mean * scale}
+
+    if class_name in ('InputLayer', 'Dropout'):
+        return None
+
+    raise ValueError(f"Unsupported layer type for NumPy inference: {class_name}")
+
+
+def fold_layers(specs: List[dict]) -> List[dict]:
+    """
+    Fold affine (BatchNormalization) specs into the following Dense layer
+
+    In create_model() each BatchNormalization follows a ReLU, so its affine
+    map is applied to the next Dense layer's input:
+    W'(x) = (scale * x + shift) @ W + b = x @ (scale[:, None] * W) + (shift @ W + b)
+    """
+    folded = []
+    pending = None  # (scale, shift) awaiting the next Dense layer
+
+    for spec in specs:
+        if spec['type'] == 'affine':
+            scale, shift = spec['scale'], spec['shift']
+            if pending is not None:
+                scale, shift = pending[0] * scale, pending[1] * scale + shift
+            pending = (scale, shift)
+            continue
+
+        kernel = spec['kernel'].astype(np.float64)
+        bias = spec['bias'].astype(np.float64) if spec['bias'] is not None else np.zeros(kernel.shape[1])
+        if pending is not None:
+            scale, shift = pending
+            bias = bias + shift @ kernel
+            kernel = scale[:, None] * kernel
+            pending = None
+
+        folded.append({
+            'type': 'dense',
+            'kernel': np.ascontiguousarray(kernel, dtype=np.float32),
+            'bias': bias.astype(np.float32),
+            'activation': spec['activation']
+        })
+
+    if pending is not None:
+        raise ValueError("BatchNormalization after the last Dense layer cannot be folded")
+
+    return folded
+
+
+def weight_key(weight_name: str) -> str:
+    """
+    Short weight name, e.g. 'dense/kernel:0' -> 'kernel'
+    """
+    return weight_name.split('/')[-1].split(':')[0]
+
+
+def _model_layers(model_config: dict) -> List[dict]:
+    config = model_config['config']
+    return config['layers'] if isinstance(config, dict) else config
+
+
+def load_h5_specs(model_path: Path) -> List[dict]:
+    """
+    Read layer specs from a Keras .h5 file written by train_model()
+
+    Requires only h5py, not TensorFlow.
+    """
+    import h5py
+
+    specs = []
+    with h5py.File(model_path, 'r') as f:
+        model_config = f.attrs['model_config']
+        if isinstance(model_config, bytes):
+            model_config = model_config.decode('utf-8')
+        model_config = json.loads(model_config)
+
+        weights_group = f['model_weights']
+        for layer in _model_layers(model_config):
+            name = layer['config']['name']
+            weights = {}
+            if name in weights_group:
+                group = weights_group[name]
+                for weight_name in group.attrs.get('weight_names', []):
+                    if isinstance(weight_name, bytes):
+                        weight_name = weight_name.decode('utf-8')
+                    weights[weight_key(weight_name)] = np.asarray(group[weight_name])
+
+            spec = layer_spec(layer['class_name'], layer['config'], weights)
+            if spec is not None:
+                specs.append(spec)
+
+    return specs
+
+
+def load_tfjs_specs(model_json_path: Path) -> List[dict]:
+    """
+    Read layer specs from TensorFlow.js artifacts written by export_model()
+
+    Quantized weights (float16, uint8, uint16) are dequantized to float32.
+    """
+    with open(model_json_path, 'r', encoding='utf-8') as f:
+        model_json = json.load(f)
+
+    topology = model_json['modelTopology']
+    model_config = topology.get('model_config', topology)
+
+    # Decode weights from the concatenated shards
+    weights_by_layer = {}
+    for group in model_json['weightsManifest']:
+        buffer = b''.join((model_json_path.parent / path).read_bytes() for path in group['paths'])
+        offset = 0
+        for entry in group['weights']:
+            shape = entry['shape']
+            count = int(np.prod(shape)) if shape else 1
+            quantization = entry.get('quantization')
+            dtype = np.dtype(quantization['dtype'] if quantization else entry['dtype']).newbyteorder('<')
+
+            values = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+            offset += count * dtype.itemsize
+
+            if quantization and quantization['dtype'] in ('uint8', 'uint16'):
+                values = values.astype(np.float32) * quantization['scale'] + quantization['min']
+            values = values.astype(np.float32).reshape(shape)
+
+            layer_path, _, _ = entry['name'].rpartition('/')
+            layer_name = layer_path.split('/')[-1]
+            weights_by_layer.setdefault(layer_name, {})[weight_key(entry['name'])] = values
+
+    specs = []
+    for layer in _model_layers(model_config):
+        spec = layer_spec(layer['class_name'], layer['config'], weights_by_layer.get(layer['config']['name'], {}))
+        if spec is not None:
+            specs.append(spec)
+
+    return specs
+
+
+class NumpyMLP:
+    """
+    Batched float32 forward pass over BatchNormalization-folded Dense layers
+    """
+
+    def __init__(self, specs: List[dict]):
+        self.layers = fold_layers(specs)
+
+    @classmethod
+    def load(cls, path: Path) -> 'NumpyMLP':
+        """
+        Load from model.h5, a model directory, or a TensorFlow.js model.json
+        """
+        path = Path(path)
+        if path.is_dir():
+            path = path / 'model.h5' if (path / 'model.h5').exists() else path / 'model.json'
+        if path.suffix == '.json':
+            return cls(load_tfjs_specs(path))
+        return cls(load_h5_specs(path))
+
+    @property
+    def num_parameters(self) -> int:
+        return sum(layer['kernel'].size + layer['bias'].size for layer in self.layers)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Class probabilities for a batch of shape (N, features) or a single sample
+        """
+        x = np.asarray(X, dtype=np.float32)
+        if x.ndim == 1:
+            x = x[None, :]
+
+        for layer in self.layers:
+            x = x @ layer['kernel']
+            x += layer['bias']
+            if layer['activation'] == 'softmax':
+                x = _softmax(x)
+            else:
+                x = ACTIVATIONS[layer['activation']](x)
+
+        return x
+
+
+def _median_ms(fn, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def benchmark(model_dir: Path, batch_sizes: List[int], repeats: int = 200) -> dict:
+    """
+    Compare NumPy and Keras outputs, import time and latency
+    """
+    # Import cost in a fresh interpreter, minus interpreter startup
+    script_dir = str(Path(__file__).resolve().parent)
+    import_times = {}
+    for module in ['sys', 'numpy_inference', 'tensorflow']:
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', f'import {module}'], cwd=script_dir, check=True)
+        import_times[module] = (time.perf_counter() - start) * 1000
+    startup = import_times.pop('sys')
+    import_times = {module: elapsed - startup for module, elapsed in import_times.items()}
+
+    numpy_model = NumpyMLP.load(model_dir)
+
+    import tensorflow as tf
+    keras_model = tf.keras.models.load_model(model_dir / 'model.h5')
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(scale=0.1, size=(max(batch_sizes), keras_model.input_shape[1])).astype(np.float32)
+
+    max_abs_diff = float(np.max(np.abs(numpy_model.predict(X) - keras_model.predict(X, verbose=0))))
+
+    latencies = []
+    for batch_size in batch_sizes:
+        batch = X[:batch_size]
+        keras_model(batch, training=False)  # warm up
+        latencies.append({
+            'batch_size': batch_size,
+            'numpy_ms': _median_ms(lambda: numpy_model.predict(batch), repeats),
+            'keras_call_ms': _median_ms(lambda: keras_model(batch, training=False).numpy(), repeats),
+            'keras_predict_ms': _median_ms(lambda: keras_model.predict(batch, verbose=0), max(10, repeats // 10))
+        })
+
+    return {
+        'import_ms': import_times,
+        'max_abs_diff': max_abs_diff,
+        'num_parameters': numpy_model.num_parameters,
+        'latency': latencies
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='NumPy inference for the landmark MLP')
+    parser.add_argument('--model', type=str, default='./model', help='Model directory, model.h5 or model.json')
+    parser.add_argument('--benchmark', action='store_true', help='Compare against Keras (imports TensorFlow)')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 32, 1024], help='Benchmark batch sizes')
+    parser.add_argument('--tolerance', type=float, default=1e-4, help='Max allowed output difference vs Keras')
+
+    args = parser.parse_args()
+
+    model_path = Path(args.model)
+
+    if not args.benchmark:
+        model = NumpyMLP.load(model_path)
+        print(f"Loaded {len(model.layers)} Dense layers ({model.num_parameters} parameters)")
+        return
+
+    print("=" * 60)
+    print("NumPy vs Keras Inference Benchmark")
+    print("=" * 60)
+
+    model_dir = model_path if model_path.is_dir() else model_path.parent
+    report = benchmark(model_dir, args.batch_sizes)
+
+    print(f"Import time: numpy_inference {report['import_ms']['numpy_inference']:.0f} ms, "
+          f"tensorflow {report['import_ms']['tensorflow']:.0f} ms (excluding interpreter startup)")
+    print(f"Max abs difference vs Keras: {report['max_abs_diff']:.2e}")
+
+    print(f"\n{'Batch':>8}{'NumPy (ms)':>14}{'Keras call (ms)':>18}{'Keras predict (ms)':>20}")
+    for row in report['latency']:
+        print(f"{row['batch_size']:>8}{row['numpy_ms']:>14.3f}{row['keras_call_ms']:>18.3f}"
+              f"{row['keras_predict_ms']:>20.3f}")
+
+    if report['max_abs_diff'] > args.tolerance:
+        print(f"\nWarning: Outputs differ from Keras by more than {args.tolerance}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
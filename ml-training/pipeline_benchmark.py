@@ -0,0 +1,336 @@
+"""
+Pipeline Benchmark
+Times each ml-training stage on synthetic datasets and flags regressions
+"""
+
+import os
+import sys
+import argparse
+import contextlib
+import json
+import platform
+import shutil
+import subprocess
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+from typing import List, Optional
+from pipeline_metrics import peak_rss_mb
+
+STAGES = ['prepare', 'extract', 'load', 'train', 'export']
+
+# Stages that run on generated images/videos; the rest use synthetic landmark stores
+MEDIA_STAGES = {'prepare', 'extract'}
+
+DEFAULT_MEDIA_SIZES = [20, 100]
+DEFAULT_LANDMARK_SIZES = [10000, 100000]
+
+SYNTHETIC_CLASSES = ['A', 'B', 'C', 'D', 'E']
+SYNTHETIC_IMAGE_SIZE = (480, 640)
+SYNTHETIC_VIDEO_FRAMES = 60
+
+# Every fifth synthetic media file is a video
+VIDEO_EVERY = 5
+
+
+def make_synthetic_media(output_path: Path, num_files: int, seed: int = 0):
+    """
+    Write `num_files` synthetic images and videos in the folder-per-letter layout
+
+    Content is random shapes on noise, so MediaPipe rarely finds hands; the
+    timings measure decode and detection cost, not landmark yield.
+    """
+    import cv2
+
+    rng = np.random.default_rng(seed)
+    height, width = SYNTHETIC_IMAGE_SIZE
+
+    def frame():
+        image = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        cv2.circle(image, center, int(rng.integers(20, 120)), (0, 200, 255), -1)
+        return image
+
+    for i in range(num_files):
+        label_dir = output_path / SYNTHETIC_CLASSES[i % len(SYNTHETIC_CLASSES)]
+        label_dir.mkdir(parents=True, exist_ok=True)
+
+        if i % VIDEO_EVERY == VIDEO_EVERY - 1:
+            writer = cv2.VideoWriter(
+                str(label_dir / f'synthetic_{i:05d}.mp4'), cv2.VideoWriter_fourcc(*'mp4v'), 30, (width, height)
+            )
+            for _ in range(SYNTHETIC_VIDEO_FRAMES):
+                writer.write(frame())
+            writer.release()
+        else:
+            cv2.imwrite(str(label_dir / f'synthetic_{i:05d}.jpg'), frame())
+
+
+def make_synthetic_store(output_path: Path, num_samples: int, seed: int = 0):
+    """
+    Write a landmark store of `num_samples` clustered random samples
+
+    Each class is a Gaussian blob around its own center, so training
+    converges like it would on real landmarks.
+    """
+    from landmark_store import NUM_FEATURES, LandmarkStoreWriter
+
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(scale=0.1, size=(len(SYNTHETIC_CLASSES), NUM_FEATURES))
+    samples_per_source = 100
+
+    with LandmarkStoreWriter(output_path, {'synthetic': True}) as writer:
+        for start in range(0, num_samples, samples_per_source):
+            count = min(samples_per_source, num_samples - start)
+            class_index = (start // samples_per_source) % len(SYNTHETIC_CLASSES)
+            landmarks = centers[class_index] + rng.normal(scale=0.02, size=(count, NUM_FEATURES))
+            writer.append(landmarks, SYNTHETIC_CLASSES[class_index], f'synthetic_{start:08d}',
+                          np.arange(count))
+
+
+def _run_stage(stage: str, work_dir: str, size: int, epochs: int, verbose: bool) -> dict:
+    """
+    Run one stage in a fresh process and return its wall time and peak RSS
+    """
+    work_dir = Path(work_dir)
+
+    with contextlib.ExitStack() as stack:
+        if not verbose:
+            stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, 'w'))))
+
+        start = time.perf_counter()
+
+        if stage == 'prepare':
+            from prepare_dataset import prepare_dataset
+            prepare_dataset(work_dir / f'media_{size}', work_dir / f'prepared_{size}', mode='copy')
+
+        elif stage == 'extract':
+            from extract_landmarks import extract_landmarks
+            extract_landmarks(work_dir / f'prepared_{size}', work_dir / f'extracted_{size}')
+
+        elif stage == 'load':
+            from train_model import load_data
+            X, _ = load_data(work_dir / f'store_{size}')
+            # Touch every row so memory-mapped reads are included
+            float(np.asarray(X).sum())
+
+        elif stage == 'train':
+            from train_model import train_model
+            train_model(work_dir / f'store_{size}', work_dir / f'model_{size}', epochs=epochs, batch_size=256)
+
+        elif stage == 'export':
+            from export_model import export_model
+            export_model(work_dir / f'model_{size}', work_dir / f'tfjs_{size}')
+
+        seconds = time.perf_counter() - start
+
+    return {'seconds': seconds, 'peak_rss_mb': peak_rss_mb()}
+
+
+def _stage_ready(stage: str, work_dir: Path, size: int) -> Optional[str]:
+    """
+    Reason a stage cannot run at this size, or None
+    """
+    required = {
+        'extract': work_dir / f'prepared_{size}' / 'metadata.json',
+        'export': work_dir / f'model_{size}' / 'model.h5'
+    }
+    if stage in required and not required[stage].exists():
+        return f"missing {required[stage].name} from the previous stage"
+    return None
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(work_dir: Path, stages: List[str], media_sizes: List[int], landmark_sizes: List[int],
+                  repeats: int = 1, epochs: int = 3, verbose: bool = False) -> dict:
+    """
+    Benchmark pipeline stages across dataset sizes
+
+    Each repeat of each stage runs in a new spawned process, so peak RSS is
+    per stage and imports are not shared. The fastest repeat is reported.
+    Stages whose dependencies are not installed are recorded as skipped.
+    """
+    work_dir.mkdir(parents=True, exist_ok=True)
+    context = get_context('spawn')
+    results = []
+
+    for stage in STAGES:
+        if stage not in stages:
+            continue
+
+        sizes = media_sizes if stage in MEDIA_STAGES else landmark_sizes
+        for size in sizes:
+            record = {'stage': stage, 'size': size}
+
+            # Inputs are generated untimed, once per size
+            try:
+                if stage == 'prepare' and not (work_dir / f'media_{size}').exists():
+                    print(f"Generating {size} synthetic media files...")
+                    make_synthetic_media(work_dir / f'media_{size}', size)
+                if stage in ('load', 'train') and not (work_dir / f'store_{size}' / 'header.json').exists():
+                    print(f"Generating synthetic landmark store with {size} samples...")
+                    make_synthetic_store(work_dir / f'store_{size}', size)
+            except ImportError as e:
+                record.update({'status': 'skipped', 'reason': str(e)})
+                results.append(record)
+                print(f"{stage:>8} size {size:>8}: skipped ({e})")
+                continue
+
+            reason = _stage_ready(stage, work_dir, size)
+            if reason:
+                record.update({'status': 'skipped', 'reason': reason})
+                results.append(record)
+                print(f"{stage:>8} size {size:>8}: skipped ({reason})")
+                continue
+
+            runs = []
+            for _ in range(repeats):
+                # Outputs are removed so incremental stages redo their work
+                _clear_outputs(stage, work_dir, size)
+
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    try:
+                        runs.append(executor.submit(_run_stage, stage, str(work_dir), size, epochs, verbose).result())
+                    except ImportError as e:
+                        record.update({'status': 'skipped', 'reason': str(e)})
+                        break
+                    except Exception as e:
+                        record.update({'status': 'failed', 'reason': f'{type(e).__name__}: {e}'})
+                        break
+
+            if runs and 'status' not in record:
+                best = min(runs, key=lambda run: run['seconds'])
+                record.update({
+                    'status': 'ok',
+                    'seconds': best['seconds'],
+                    'peak_rss_mb': max((run['peak_rss_mb'] or 0) for run in runs) or None,
+                    'runs': [run['seconds'] for run in runs]
+                })
+                rss = f"{record['peak_rss_mb']:.0f} MB" if record['peak_rss_mb'] else 'n/a'
+                print(f"{stage:>8} size {size:>8}: {record['seconds']:.2f}s, peak RSS {rss}")
+            else:
+                print(f"{stage:>8} size {size:>8}: {record['status']} ({record['reason']})")
+
+            results.append(record)
+
+    return {
+        'commit': _git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'repeats': repeats,
+        'epochs': epochs,
+        'results': results
+    }
+
+
+def _clear_outputs(stage: str, work_dir: Path, size: int):
+    """
+    Remove a stage's previous outputs so it does not reuse them
+    """
+    output_names = {
+        'prepare': f'prepared_{size}',
+        'extract': f'extracted_{size}',
+        'train': f'model_{size}',
+        'export': f'tfjs_{size}'
+    }
+    if stage in output_names:
+        shutil.rmtree(work_dir / output_names[stage], ignore_errors=True)
+
+
+def compare_results(current: dict, baseline: dict, threshold: float = 0.1) -> List[dict]:
+    """
+    Find stages that got slower or used more memory than the baseline
+
+    A stage regresses when its time or peak RSS exceeds the baseline by more
+    than `threshold` (a fraction, 0.1 = 10%).
+    """
+    baseline_records = {
+        (record['stage'], record['size']): record
+        for record in baseline['results'] if record.get('status') == 'ok'
+    }
+
+    regressions = []
+    for record in current['results']:
+        previous = baseline_records.get((record['stage'], record['size']))
+        if record.get('status') != 'ok' or previous is None:
+            continue
+
+        for metric in ['seconds', 'peak_rss_mb']:
+            if not record.get(metric) or not previous.get(metric):
+                continue
+            change = record[metric] / previous[metric] - 1
+            if change > threshold:
+                regressions.append({
+                    'stage': record['stage'],
+                    'size': record['size'],
+                    'metric': metric,
+                    'baseline': previous[metric],
+                    'current': record[metric],
+                    'change': change
+                })
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ml-training pipeline stages')
+    parser.add_argument('--work-dir', type=str, default='./.benchmark', help='Directory for synthetic data and outputs')
+    parser.add_argument('--stages', type=str, nargs='+', default=STAGES, choices=STAGES, help='Stages to run')
+    parser.add_argument('--media-sizes', type=int, nargs='+', default=DEFAULT_MEDIA_SIZES,
+                        help='Synthetic image/video counts for prepare and extract')
+    parser.add_argument('--landmark-sizes', type=int, nargs='+', default=DEFAULT_LANDMARK_SIZES,
+                        help='Synthetic sample counts for load, train and export')
+    parser.add_argument('--repeats', type=int, default=1, help='Runs per stage (fastest is reported)')
+    parser.add_argument('--epochs', type=int, default=3, help='Training epochs')
+    parser.add_argument('--output', type=str, default='benchmark_results.json', help='Results JSON file')
+    parser.add_argument('--baseline', type=str, default=None, help='Previous results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Allowed slowdown before flagging (0.1 = 10%%)')
+    parser.add_argument('--verbose', action='store_true', help='Show stage output')
+
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Pipeline Benchmark")
+    print("=" * 60)
+
+    report = run_benchmark(
+        Path(args.work_dir), args.stages, args.media_sizes, args.landmark_sizes,
+        repeats=args.repeats, epochs=args.epochs, verbose=args.verbose
+    )
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+        regressions = compare_results(report, baseline, args.threshold)
+        print(f"\nCompared with {args.baseline} (commit {baseline.get('commit') or 'unknown'}):")
+        if not regressions:
+            print(f"No regressions above {args.threshold:.0%}")
+            return
+
+        for regression in regressions:
+            print(f"Warning: {regression['stage']} size {regression['size']} {regression['metric']}: "
+                  f"{regression['baseline']:.2f} -> {regression['current']:.2f} ({regression['change']:+.0%})")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
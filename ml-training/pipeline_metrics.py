@@ -0,0 +1,148 @@
+"""
+Pipeline Metrics
+JSON-lines stage timings, counters, memory high-water marks and profiling
+"""
+
+import os
+import sys
+import cProfile
+import json
+import pstats
+import shutil
+import signal
+import subprocess
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+PROFILERS = ['cprofile', 'py-spy']
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Peak resident set size of the current process in MB (None if unavailable)
+    """
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def current_rss_mb() -> Optional[float]:
+    """
+    Current resident set size in MB (Linux only, None elsewhere)
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+class MetricsWriter:
+    """
+    Append metric records to a JSON-lines file
+
+    Every record carries the run id, a wall-clock timestamp and an event
+    name. Lines are flushed as they are written, so a crashed run still
+    leaves the metrics of the stages it finished.
+    """
+
+    def __init__(self, path: Path, run_id: Optional[str] = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def emit(self, event: str, **fields):
+        record = {'run_id': self.run_id, 'time': time.time(), 'event': event, **fields}
+        self._file.write(json.dumps(record, ensure_ascii=False, default=float) + '\n')
+        self._file.flush()
+
+    @contextmanager
+    def stage(self, name: str, profile: Optional[str] = None, profile_dir: Path = Path('.')):
+        """
+        Time a stage and emit 'stage_start' / 'stage_end' records
+
+        Yields a dict; counters added to it are included in the stage_end
+        record. `profile` ('cprofile' or 'py-spy') profiles just this stage.
+        """
+        counters = {}
+        self.emit('stage_start', stage=name, rss_mb=current_rss_mb())
+        start = time.perf_counter()
+        status = 'ok'
+
+        with profile_stage(name, profile, profile_dir) as profile_path:
+            try:
+                yield counters
+            except BaseException:
+                status = 'failed'
+                raise
+            finally:
+                self.emit(
+                    'stage_end', stage=name, status=status,
+                    seconds=time.perf_counter() - start,
+                    rss_mb=current_rss_mb(), peak_rss_mb=peak_rss_mb(),
+                    profile=str(profile_path) if profile_path else None,
+                    **counters
+                )
+
+    def close(self):
+        self._file.close()
+
+
+@contextmanager
+def profile_stage(name: str, profiler: Optional[str], output_dir: Path = Path('.')):
+    """
+    Profile the enclosed block
+
+    'cprofile' writes <name>.prof (pstats format, e.g. for snakeviz) and
+    prints the top functions by cumulative time. 'py-spy' attaches
+    `py-spy record` to this process for the duration of the block and writes
+    a <name>.svg flame graph. Yields the output path, or None.
+    """
+    if profiler is None:
+        yield None
+        return
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    if profiler == 'cprofile':
+        output_path = output_dir / f'{name}.prof'
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield output_path
+        finally:
+            profile.disable()
+            profile.dump_stats(output_path)
+            print(f"\nProfile of '{name}' saved to {output_path}; top functions by cumulative time:")
+            pstats.Stats(profile).sort_stats('cumulative').print_stats(15)
+        return
+
+    if profiler == 'py-spy':
+        if shutil.which('py-spy') is None:
+            print("Warning: py-spy not found on PATH, profiling disabled")
+            yield None
+            return
+
+        output_path = output_dir / f'{name}.svg'
+        sampler = subprocess.Popen(
+            ['py-spy', 'record', '--pid', str(os.getpid()), '--output', str(output_path), '--subprocesses']
+        )
+        try:
+            yield output_path
+        finally:
+            # py-spy writes its output when interrupted
+            sampler.send_signal(signal.SIGINT)
+            sampler.wait()
+            print(f"\nFlame graph of '{name}' saved to {output_path}")
+        return
+
+    raise ValueError(f"Unknown profiler: {profiler} (choose from {PROFILERS})")
@@ -0,0 +1,474 @@
+"""
+Pipeline Runner
+Runs prepare -> extract -> train -> export as a DAG of cached stages
+"""
+
+import os
+import argparse
+import ast
+import hashlib
+import importlib
+import inspect
+import json
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import ExitStack, redirect_stderr, redirect_stdout
+from datetime import datetime, timezone
+from functools import lru_cache
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, List, Optional
+from pipeline_metrics import MetricsWriter, peak_rss_mb
+
+CODE_DIR = Path(__file__).resolve().parent
+
+STATE_DIR = '.pipeline'
+STATE_FILE = 'state.json'
+
+# Pipeline settings; a --config JSON file overrides these per section
+DEFAULT_CONFIG = {
+    'dataset': None,  # dataset root; downloaded with kagglehub when not set
+    'kaggle_dataset': 'berkaykocaoglu/tr-sign-language',
+    'work_dir': '.',
+    'prepare': {},
+    'extract': {'max_frames_per_video': 100, 'cache_dir': './.landmark_cache'},
+    # Near-duplicate pruning between extract and train (landmark_dedup settings), off when None
+    'dedup': None,
+    'train': {'epochs': 100, 'batch_size': 32},
+    # Export variant name -> export_model settings; variants run concurrently
+    'exports': {'default': {'output': '../public/model'}}
+}
+
+# Stage parameters that are paths
+PATH_PARAMS = {'cache_dir', 'data_path', 'sequence_path', 'report_path'}
+
+
+@lru_cache(maxsize=None)
+def _local_imports(file_name: str) -> List[str]:
+    """
+    Source files of this directory imported by a file, at any depth in it
+    """
+    tree = ast.parse((CODE_DIR / file_name).read_text(encoding='utf-8'), filename=file_name)
+    modules = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            modules.add(node.module.split('.')[0])
+    return sorted(f'{module}.py' for module in modules if (CODE_DIR / f'{module}.py').is_file())
+
+
+def source_files(module: str) -> List[str]:
+    """
+    Source files a stage runs: its module and the local modules it imports, transitively
+
+    Imports inside functions count too, so lazily imported helpers are covered.
+    """
+    seen = set()
+    pending = [f'{module}.py']
+    while pending:
+        file_name = pending.pop()
+        if file_name not in seen:
+            seen.add(file_name)
+            pending.extend(_local_imports(file_name))
+    return sorted(seen)
+
+
+def _path_params(params: dict, work_dir: Path) -> dict:
+    # Relative paths are relative to the work dir, not the current directory
+    return {key: work_dir / value if key in PATH_PARAMS and value is not None else value
+            for key, value in params.items()}
+
+
+def resolve_config_paths(config: dict, base_dir: Path) -> dict:
+    """
+    Make the work dir and dataset absolute, relative to `base_dir`
+
+    `base_dir` is the directory of the --config file (the current directory
+    without one). Stage paths are then resolved against the work dir by
+    build_stages, so a run gives the same paths and cache from any directory.
+    """
+    config = dict(config)
+    config['work_dir'] = (base_dir / config['work_dir']).resolve()
+    if config.get('dataset') is not None:
+        config['dataset'] = (base_dir / config['dataset']).resolve()
+    return config
+
+
+def build_stages(config: dict, dataset_path: Path) -> List[dict]:
+    """
+    Declare the pipeline stages
+
+    Each stage names the function it calls, its positional args and keyword
+    params, the data paths it reads (`inputs`), the source files it runs
+    (`code`, see source_files) and the paths it writes (`outputs`).
+    Dependencies between stages are derived from inputs and outputs. Relative
+    paths in the config are relative to `work_dir`.
+    """
+    work_dir = Path(config['work_dir'])
+    processed_dir = work_dir / 'processed_data'
+    landmarks_path = work_dir / 'landmarks'
+    model_dir = work_dir / 'model'
+    model_files = [model_dir / 'model.h5', model_dir / 'model_metadata.json', model_dir / 'label_mapping.json']
+
+    stages = [
+        {
+            'name': 'prepare',
+            'function': 'prepare_dataset:prepare_dataset',
+            'args': [dataset_path, processed_dir],
+            'params': _path_params(config['prepare'], work_dir),
+            'inputs': [dataset_path],
+            'code': source_files('prepare_dataset'),
+            'outputs': [processed_dir]
+        },
+        {
+            'name': 'extract',
+            'function': 'extract_landmarks:extract_landmarks',
+            'args': [processed_dir, landmarks_path],
+            'params': _path_params(config['extract'], work_dir),
+            'inputs': [processed_dir],
+            'code': source_files('extract_landmarks'),
+            'outputs': [landmarks_path]
+        }
+    ]
+
+    train_data_path = landmarks_path
+    if config.get('dedup') is not None:
+        train_data_path = work_dir / 'landmarks_dedup'
+        stages.append({
+            'name': 'dedup',
+            'function': 'landmark_dedup:dedup_landmarks',
+            'args': [landmarks_path, train_data_path],
+            'params': _path_params(config['dedup'], work_dir),
+            'inputs': [landmarks_path],
+            'code': source_files('landmark_dedup'),
+            'outputs': [train_data_path]
+        })
+
+    stages += [
+        {
+            'name': 'train',
+            'function': 'train_model:train_model',
+            'args': [train_data_path, model_dir],
+            'params': _path_params(config['train'], work_dir),
+            'inputs': [train_data_path],
+            'code': source_files('train_model'),
+            'outputs': model_files
+        }
+    ]
+
+    for variant, export in config['exports'].items():
+        params = _path_params({key: value for key, value in export.items() if key != 'output'}, work_dir)
+        output_path = work_dir / export['output']
+        stages.append({
+            'name': f'export:{variant}',
+            'function': 'export_model:export_model',
+            'args': [model_dir, output_path],
+            'params': params,
+            'inputs': model_files + ([params['data_path']] if params.get('data_path') else []),
+            'code': source_files('export_model'),
+            'outputs': [output_path]
+        })
+
+    return stages
+
+
+def _is_within(path: Path, parent: Path) -> bool:
+    path, parent = path.resolve(), parent.resolve()
+    return path == parent or parent in path.parents
+
+
+def resolve_dependencies(stages: List[dict]) -> Dict[str, List[str]]:
+    """
+    Map each stage to the stages producing its inputs
+
+    Raises:
+        ValueError: If the stages do not form a DAG
+    """
+    dependencies = {}
+    for stage in stages:
+        dependencies[stage['name']] = [
+            other['name'] for other in stages
+            if other is not stage and any(
+                _is_within(input_path, output) or _is_within(output, input_path)
+                for input_path in stage['inputs'] for output in other['outputs']
+            )
+        ]
+
+    # Kahn's algorithm: every stage must become ready eventually
+    remaining = {name: set(deps) for name, deps in dependencies.items()}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Pipeline stages form a cycle: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+    return dependencies
+
+
+def path_fingerprint(path: Path) -> str:
+    """
+    Cheap fingerprint of a file or directory tree from paths, sizes and mtimes
+    """
+    path = Path(path)
+    if not path.exists():
+        return 'missing'
+
+    digest = hashlib.sha256()
+    if path.is_file():
+        entries = [(path, '')]
+    else:
+        entries = []
+        for root, dirs, file_names in os.walk(path):
+            dirs.sort()
+            for file_name in sorted(file_names):
+                file_path = Path(root) / file_name
+                entries.append((file_path, file_path.relative_to(path).as_posix()))
+
+    for file_path, rel_path in entries:
+        stat = file_path.stat()
+        digest.update(f'{rel_path}\0{stat.st_size}\0{stat.st_mtime_ns}\n'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def stage_fingerprint(stage: dict) -> str:
+    """
+    Fingerprint of everything that determines a stage's outputs
+
+    Covers the function, its arguments and params, the state of the input
+    paths and the contents of the stage's source files.
+    """
+    code_hashes = {}
+    for file_name in stage['code']:
+        with open(CODE_DIR / file_name, 'rb') as f:
+            code_hashes[file_name] = hashlib.sha256(f.read()).hexdigest()
+
+    description = {
+        'function': stage['function'],
+        'args': [str(arg) for arg in stage['args']],
+        'params': stage['params'],
+        'inputs': {str(path): path_fingerprint(path) for path in stage['inputs']},
+        'code': code_hashes
+    }
+    return hashlib.sha256(json.dumps(description, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def outputs_fingerprint(stage: dict) -> Dict[str, str]:
+    return {str(path): path_fingerprint(path) for path in stage['outputs']}
+
+
+def is_up_to_date(stage: dict, fingerprint: str, state: dict) -> bool:
+    """
+    A stage is up to date if it last ran with the same fingerprint and its
+    outputs still exist unmodified
+    """
+    entry = state.get(stage['name'])
+    if entry is None or entry['fingerprint'] != fingerprint:
+        return False
+    outputs = outputs_fingerprint(stage)
+    return 'missing' not in outputs.values() and outputs == entry['outputs']
+
+
+def load_state(state_path: Path) -> dict:
+    if not state_path.exists():
+        return {}
+    with open(state_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(state_path: Path, state: dict):
+    """
+    Atomically write the stage state
+    """
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = state_path.with_name(state_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, state_path)
+
+
+def _run_stage(stage: dict, log_path: str, metrics_path: Optional[str], run_id: Optional[str]) -> dict:
+    """
+    Run one stage in a worker process with its output sent to a log file
+    """
+    module_name, function_name = stage['function'].split(':')
+    start = time.perf_counter()
+
+    with ExitStack() as stack:
+        log = stack.enter_context(open(log_path, 'w', encoding='utf-8'))
+        stack.enter_context(redirect_stdout(log))
+        stack.enter_context(redirect_stderr(log))
+
+        function = getattr(importlib.import_module(module_name), function_name)
+        params = dict(stage['params'])
+
+        if metrics_path is not None:
+            metrics = MetricsWriter(Path(metrics_path), run_id)
+            stack.callback(metrics.close)
+            stack.enter_context(metrics.stage(stage['name']))
+            if 'metrics' in inspect.signature(function).parameters:
+                params['metrics'] = metrics
+
+        try:
+            function(*stage['args'], **params)
+        except Exception:
+            traceback.print_exc()
+            raise
+
+    return {'seconds': time.perf_counter() - start, 'peak_rss_mb': peak_rss_mb()}
+
+
+def run_pipeline(stages: List[dict], state_dir: Path, workers: int = 2, force: Optional[List[str]] = None,
+                 dry_run: bool = False, metrics_path: Optional[Path] = None) -> Dict[str, str]:
+    """
+    Run the stages in dependency order
+
+    A stage becomes ready when all stages it depends on have run or were
+    skipped. Its fingerprint is then compared with the one recorded after
+    its last successful run; up-to-date stages are skipped. Ready stages run
+    concurrently in up to `workers` spawned processes. Stages depending on a
+    failed stage are blocked. `force` names stages to rerun regardless ('all'
+    for every stage).
+
+    Returns:
+        Stage name -> 'ran', 'skipped', 'failed', 'blocked' (or 'stale' in a dry run)
+    """
+    force = set(force or [])
+    dependencies = resolve_dependencies(stages)
+    stages_by_name = {stage['name']: stage for stage in stages}
+
+    state_path = state_dir / STATE_FILE
+    log_dir = state_dir / 'logs'
+    log_dir.mkdir(parents=True, exist_ok=True)
+    state = load_state(state_path)
+
+    metrics = MetricsWriter(metrics_path) if metrics_path is not None else None
+    status: Dict[str, str] = {}
+    fingerprints: Dict[str, str] = {}
+    running = {}
+
+    context = get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        while len(status) < len(stages):
+            # Start or skip every stage whose dependencies are done
+            for name, stage in stages_by_name.items():
+                if name in status or name in running.values():
+                    continue
+
+                dep_status = [status.get(dep) for dep in dependencies[name]]
+                if any(s in ('failed', 'blocked') for s in dep_status):
+                    status[name] = 'blocked'
+                    print(f"[blocked] {name}: a dependency failed")
+                    continue
+                if not all(s in ('ran', 'skipped', 'stale') for s in dep_status):
+                    continue
+
+                forced = 'all' in force or name in force
+                if dry_run:
+                    stale = forced or 'stale' in dep_status or not is_up_to_date(stage, stage_fingerprint(stage), state)
+                    status[name] = 'stale' if stale else 'skipped'
+                    print(f"[{'would run' if stale else 'up to date'}] {name}")
+                    continue
+
+                fingerprint = stage_fingerprint(stage)
+                if not forced and is_up_to_date(stage, fingerprint, state):
+                    status[name] = 'skipped'
+                    print(f"[up to date] {name}")
+                    if metrics is not None:
+                        metrics.emit('stage_skipped', stage=name, fingerprint=fingerprint)
+                    continue
+
+                log_path = log_dir / (name.replace(':', '_') + '.log')
+                print(f"[running] {name} (log: {log_path})")
+                future = executor.submit(
+                    _run_stage, stage, str(log_path),
+                    str(metrics_path) if metrics_path is not None else None,
+                    metrics.run_id if metrics is not None else None
+                )
+                fingerprints[name] = fingerprint
+                running[future] = name
+
+            if not running:
+                break
+
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                stage = stages_by_name[name]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    status[name] = 'failed'
+                    print(f"[failed] {name}: {e}")
+                    continue
+
+                status[name] = 'ran'
+                state[name] = {
+                    'fingerprint': fingerprints[name],
+                    'outputs': outputs_fingerprint(stage),
+                    'finished': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                    **result
+                }
+                save_state(state_path, state)
+                print(f"[done] {name} in {result['seconds']:.1f}s")
+
+    if metrics is not None:
+        metrics.close()
+
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the training pipeline, skipping up-to-date stages')
+    parser.add_argument('--config', type=str, default=None, help='JSON file overriding DEFAULT_CONFIG sections')
+    parser.add_argument('--dataset', type=str, default=None, help='Dataset root (default: download with kagglehub)')
+    parser.add_argument('--workers', type=int, default=2, help='Stages run concurrently when independent')
+    parser.add_argument('--force', type=str, action='append', default=[],
+                        help="Rerun a stage even if up to date (repeatable, 'all' for every stage)")
+    parser.add_argument('--dry-run', action='store_true', help='Only report which stages would run')
+    parser.add_argument('--metrics', type=str, default=None, help='Append JSON-lines stage metrics to this file')
+
+    args = parser.parse_args()
+
+    config = dict(DEFAULT_CONFIG)
+    base_dir = Path.cwd()
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            config.update(json.load(f))
+        base_dir = Path(args.config).resolve().parent
+    config = resolve_config_paths(config, base_dir)
+
+    print("=" * 60)
+    print("Pipeline Runner")
+    print("=" * 60)
+
+    dataset = args.dataset or config['dataset']
+    if dataset is None:
+        import kagglehub
+        dataset = kagglehub.dataset_download(config['kaggle_dataset'])
+    print(f"Dataset: {dataset}\n")
+
+    stages = build_stages(config, Path(dataset).resolve())
+    status = run_pipeline(
+        stages, Path(config['work_dir']) / STATE_DIR,
+        workers=args.workers,
+        force=args.force,
+        dry_run=args.dry_run,
+        metrics_path=Path(args.metrics) if args.metrics else None
+    )
+
+    print("\n" + "=" * 60)
+    for stage in stages:
+        print(f"{stage['name']:<20}{status.get(stage['name'], 'not run')}")
+    print("=" * 60)
+
+    if any(s in ('failed', 'blocked') for s in status.values()):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,10 +5,21 @@ Organizes and validates the Turkish Sign Language dataset
 
 import os
 import argparse
+import re
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict
 import json
+from dataset_manifest import (
+    MANIFEST_FILE, PREVIOUS_MANIFEST_FILE, diff_manifests, find_duplicates,
+    load_manifest, print_diff, save_manifest, update_manifest
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
 # Turkish alphabet
 TSL_ALPHABET = [
@@ -20,6 +31,11 @@ TSL_ALPHABET = [
 SUPPORTED_IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp'}
 SUPPORTED_VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv'}
 
+STAGE_MODES = ['auto', 'copy', 'hardlink', 'symlink', 'reflink']
+
+# Linux FICLONE ioctl (copy-on-write clone on btrfs, XFS, etc.)
+FICLONE = 0x40049409
+
 
 def validate_dataset_structure(input_path: Path) -> Dict[str, List[Path]]:
     """
@@ -35,13 +51,13 @@ def validate_dataset_structure(input_path: Path) -> Dict[str, List[Path]]:
     
     # Check if it's a folder-based dataset
     if input_path.is_dir():
-        for item in input_path.iterdir():
+        for item in sorted(input_path.iterdir()):
             if item.is_dir() and item.name in TSL_ALPHABET:
                 # Folder-based dataset (e.g., A/, B/, ...)
                 label = item.name
                 files = []
                 
-                for file in item.iterdir():
+                for file in sorted(item.iterdir()):
                     if file.suffix.lower() in SUPPORTED_IMAGE_EXTENSIONS:
                         files.append(file)
                     elif file.suffix.lower() in SUPPORTED_VIDEO_EXTENSIONS:
@@ -64,40 +80,217 @@ def validate_dataset_structure(input_path: Path) -> Dict[str, List[Path]]:
     return dataset
 
 
-def prepare_dataset(input_path: Path, output_path: Path):
+def _reflink(src: Path, dest: Path):
+    """
+    Clone a file with copy-on-write (raises OSError if unsupported)
+    """
+    if fcntl is None:
+        raise OSError("reflink is not supported on this platform")
+
+    with open(src, 'rb') as src_file, open(dest, 'wb') as dest_file:
+        try:
+            fcntl.ioctl(dest_file.fileno(), FICLONE, src_file.fileno())
+        except OSError:
+            dest_file.close()
+            dest.unlink(missing_ok=True)
+            raise
+    shutil.copystat(src, dest)
+
+
+def _is_unchanged(src: Path, dest: Path, mode: str) -> bool:
+    """
+    Check whether a staged file already matches its source
+    """
+    if dest.is_symlink():
+        return mode == 'symlink' and os.readlink(dest) == str(src.resolve())
+
+    if not dest.exists() or mode == 'symlink':
+        return False
+
+    src_stat = src.stat()
+    dest_stat = dest.stat()
+
+    # Hardlinks share the inode; an explicit copy must not stay linked
+    if os.path.samestat(src_stat, dest_stat):
+        return mode in ('auto', 'hardlink')
+
+    return (mode != 'hardlink' and
+            src_stat.st_size == dest_stat.st_size and
+            src_stat.st_mtime_ns == dest_stat.st_mtime_ns)
+
+
+def stage_file(src: Path, dest: Path, mode: str = 'auto') -> str:
+    """
+    Place a source file at dest without copying when possible
+
+    Modes:
+        copy: always copy (shutil.copy2)
+        hardlink / symlink / reflink: link or clone, falling back to a copy
+        auto: reflink, then hardlink when source and destination share a
+            filesystem, otherwise copy
+
+    Returns:
+        The action taken: 'unchanged', 'reflink', 'hardlink', 'symlink' or 'copy'
+    """
+    if _is_unchanged(src, dest, mode):
+        return 'unchanged'
+
+    if dest.exists() or dest.is_symlink():
+        dest.unlink()
+
+    same_device = src.stat().st_dev == dest.parent.stat().st_dev
+
+    if mode == 'symlink':
+        os.symlink(src.resolve(), dest)
+        return 'symlink'
+
+    if same_device and mode in ('auto', 'reflink'):
+        try:
+            _reflink(src, dest)
+            return 'reflink'
+        except OSError:
+            pass
+
+    if same_device and mode in ('auto', 'hardlink'):
+        try:
+            os.link(src, dest)
+            return 'hardlink'
+        except OSError:
+            pass
+
+    shutil.copy2(src, dest)
+    return 'copy'
+
+
+def _source_key(file_path: Path, input_path: Path) -> str:
+    """
+    Stable manifest key for a source file, relative to the dataset root
+    """
+    if input_path.is_dir():
+        return file_path.relative_to(input_path).as_posix()
+    return file_path.name
+
+
+def remove_stale_files(label_dir: Path, label: str, staged_names: set) -> int:
+    """
+    Delete staged files (<label>_NNNN.<ext>) of a label that are not in `staged_names`
+
+    Other files are never touched. Returns the number of files removed.
+    """
+    pattern = re.compile(rf'{re.escape(label)}_\d{{4}}\..+')
+    removed = 0
+    for stale in label_dir.iterdir():
+        if (pattern.fullmatch(stale.name) and stale.name not in staged_names
+                and (stale.is_file() or stale.is_symlink())):
+            stale.unlink()
+            removed += 1
+    return removed
+
+
+def _write_json_atomic(path: Path, data: dict):
+    """
+    Write JSON to a temporary file and rename it into place
+    """
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def prepare_dataset(input_path: Path, output_path: Path, mode: str = 'auto', workers: int = 8):
     """
     Prepare and organize dataset
+
+    Files are staged into output_path with `mode` (see stage_file) on a
+    thread pool. Files whose staged copy is unchanged since the last run
+    are skipped, and metadata.json is written atomically at the end.
+
+    manifest.json records size, mtime, SHA-256, media type, frame count,
+    resolution and a perceptual hash per source file. Only files whose size
+    or mtime changed are re-read; the previous manifest is kept as
+    manifest.prev.json and the changes are printed.
     """
     print("=" * 60)
     print("Turkish Sign Language Dataset Preparation")
     print("=" * 60)
     
+    # Staging deletes stale files in the output, so it must not overlap the input
+    resolved_input, resolved_output = input_path.resolve(), output_path.resolve()
+    if (resolved_output == resolved_input or resolved_input in resolved_output.parents
+            or resolved_output in resolved_input.parents):
+        raise ValueError(f"Output path {output_path} must not be or overlap the input path {input_path}")
+
     # Validate input
     dataset = validate_dataset_structure(input_path)
     
     # Create output directory
     output_path.mkdir(parents=True, exist_ok=True)
     
-    # Copy and organize files
+    # Plan the staged layout with standardized naming
     organized_dataset = {}
+    tasks = []
     
     for label, files in dataset.items():
         label_dir = output_path / label
         label_dir.mkdir(exist_ok=True)
         
         organized_files = []
+        staged_names = set()
         
         for i, file in enumerate(files):
-            # Copy file with standardized naming
             new_name = f"{label}_{i:04d}{file.suffix}"
             dest = label_dir / new_name
             
-            shutil.copy2(file, dest)
+            tasks.append((file, dest, label))
+            staged_names.add(new_name)
             organized_files.append(str(dest.relative_to(output_path)))
         
+        # Remove staged files left over from a previous, larger dataset
+        remove_stale_files(label_dir, label, staged_names)
+        
         organized_dataset[label] = organized_files
+    
+    # Labels that are no longer in the dataset
+    for label_dir in sorted(path for path in output_path.iterdir() if path.is_dir()):
+        if label_dir.name not in dataset and remove_stale_files(label_dir, label_dir.name, set()):
+            if any(label_dir.iterdir()):
+                print(f"Warning: Left {label_dir} in place, it holds files that were not staged")
+            else:
+                label_dir.rmdir()
+                print(f"Removed '{label_dir.name}', which is no longer in the dataset")
+    
+    # Stage files in parallel
+    print(f"\nStaging {len(tasks)} files (mode: {mode}, workers: {workers})...")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        actions = list(executor.map(lambda task: stage_file(task[0], task[1], mode), tasks))
+    
+    action_counts = {action: actions.count(action) for action in sorted(set(actions))}
+    print("Staging summary: " + ", ".join(f"{count} {action}" for action, count in action_counts.items()))
+    
+    for label, organized_files in organized_dataset.items():
         print(f"Organized {len(organized_files)} files for '{label}'")
     
+    # Update the manifest, re-reading only new or modified files
+    manifest_path = output_path / MANIFEST_FILE
+    previous_manifest = load_manifest(manifest_path)
+    manifest_files = [
+        (_source_key(src, input_path), src, label, dest.relative_to(output_path).as_posix())
+        for src, dest, label in tasks
+    ]
+    print(f"\nUpdating manifest ({len(previous_manifest)} previous entries)...")
+    manifest, reread = update_manifest(manifest_files, previous_manifest, workers)
+    print(f"Manifest: {reread} files hashed, {len(manifest) - reread} reused")
+    
+    if previous_manifest:
+        print_diff(diff_manifests(previous_manifest, manifest))
+        os.replace(manifest_path, output_path / PREVIOUS_MANIFEST_FILE)
+    save_manifest(manifest_path, manifest)
+    
+    duplicates = find_duplicates(manifest)
+    if duplicates['exact'] or duplicates['near']:
+        print(f"Warning: {len(duplicates['exact'])} exact and {len(duplicates['near'])} near-duplicate "
+              f"groups across letters (python dataset_manifest.py duplicates --manifest {manifest_path})")
+    
     # Save metadata
     metadata = {
         'alphabet': TSL_ALPHABET,
@@ -107,8 +300,7 @@ def prepare_dataset(input_path: Path, output_path: Path):
     }
     
     metadata_path = output_path / 'metadata.json'
-    with open(metadata_path, 'w', encoding='utf-8') as f:
-        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    _write_json_atomic(metadata_path, metadata)
     
     print("\n" + "=" * 60)
     print(f"Dataset prepared successfully!")
@@ -116,6 +308,7 @@ def prepare_dataset(input_path: Path, output_path: Path):
     print(f"Total files: {metadata['total_files']}")
     print(f"Output directory: {output_path}")
     print(f"Metadata saved to: {metadata_path}")
+    print(f"Manifest saved to: {manifest_path}")
     print("=" * 60)
 
 
@@ -123,13 +316,16 @@ def main():
     parser = argparse.ArgumentParser(description='Prepare TSL dataset')
     parser.add_argument('--input', type=str, required=True, help='Input dataset path')
     parser.add_argument('--output', type=str, default='./processed_data', help='Output directory')
+    parser.add_argument('--mode', type=str, default='auto', choices=STAGE_MODES,
+                        help='How files are staged (auto: reflink/hardlink on the same filesystem, else copy)')
+    parser.add_argument('--workers', type=int, default=8, help='Staging threads')
     
     args = parser.parse_args()
     
     input_path = Path(args.input)
     output_path = Path(args.output)
     
-    prepare_dataset(input_path, output_path)
+    prepare_dataset(input_path, output_path, mode=args.mode, workers=args.workers)
 
 
 if __name__ == '__main__':
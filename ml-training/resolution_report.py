@@ -0,0 +1,258 @@
+"""
+Resolution Report
+Accuracy vs throughput of reduced-resolution decoding for landmark extraction
+"""
+
+import argparse
+import itertools
+import json
+import random
+import time
+import numpy as np
+from pathlib import Path
+from typing import List, Optional
+from extract_landmarks import (
+    DEFAULT_RESOLUTION, HANDS_CONFIG, REDUCE_FACTORS, SUPPORTED_IMAGE_EXTENSIONS, SUPPORTED_VIDEO_EXTENSIONS,
+    _timed_extract, mp_hands
+)
+from frame_sampling import DEFAULT_SAMPLING
+
+DEFAULT_REPORT_FILES = 200
+
+# Defaults for picking a setting: at most this drop in detected samples and
+# this 95th-percentile landmark delta (in normalized image units) vs full resolution
+DEFAULT_MAX_HIT_DROP = 0.01
+DEFAULT_MAX_DELTA = 0.01
+
+
+def candidate_resolutions(reduce_factors: List[int], max_sides: List[Optional[int]]) -> List[dict]:
+    """
+    Every reduce / max_side combination, with full resolution first
+    """
+    candidates = [dict(DEFAULT_RESOLUTION)]
+    for reduce, max_side in itertools.product(reduce_factors, max_sides):
+        candidate = {'reduce': reduce, 'max_side': max_side}
+        if candidate not in candidates:
+            candidates.append(candidate)
+    return candidates
+
+
+def resolution_name(resolution: dict) -> str:
+    parts = [f"1/{resolution['reduce']}" if resolution['reduce'] > 1 else 'full']
+    if resolution['max_side']:
+        parts.append(f"<= {resolution['max_side']}px")
+    return ' '.join(parts)
+
+
+def sample_files(input_path: Path, count: int, seed: int = 42) -> List[Path]:
+    """
+    Randomly pick `count` images and videos listed in metadata.json
+    """
+    with open(input_path / 'metadata.json', 'r', encoding='utf-8') as f:
+        metadata = json.load(f)
+
+    files = [
+        input_path / file_rel_path
+        for label_files in metadata['dataset'].values()
+        for file_rel_path in label_files
+        if Path(file_rel_path).suffix.lower() in SUPPORTED_IMAGE_EXTENSIONS | SUPPORTED_VIDEO_EXTENSIONS
+    ]
+    files = [file_path for file_path in files if file_path.exists()]
+    if count < len(files):
+        files = random.Random(seed).sample(files, count)
+    return files
+
+
+def run_resolution(files: List[Path], hands_config: dict, resolution: dict,
+                   max_frames: int, sampling: dict) -> dict:
+    """
+    Extract `files` at one resolution and time it
+
+    Returns:
+        Dict with per-file results, wall time and frame counters
+    """
+    hands = mp_hands.Hands(**hands_config)
+    results = []
+    totals = {'decoded': 0, 'used': 0}
+    start = time.perf_counter()
+    for file_path in files:
+        result, stats = _timed_extract(file_path, hands, max_frames, sampling, None, None, resolution)
+        results.append(result)
+        totals['decoded'] += stats['decoded']
+        totals['used'] += stats['used']
+    seconds = time.perf_counter() - start
+    hands.close()
+    return {'results': results, 'seconds': seconds, **totals}
+
+
+def _samples_by_key(result) -> dict:
+    """
+    Map (frame index, handedness) to landmarks for matching samples across runs
+    """
+    landmarks, frame_indices, handedness, _ = result
+    samples = {}
+    for sample, frame_index, code in zip(landmarks, frame_indices.tolist(), handedness.tolist()):
+        samples.setdefault((frame_index, code), sample)
+    return samples
+
+
+def landmark_deltas(baseline: List, candidate: List) -> dict:
+    """
+    Compare samples extracted at a candidate resolution with full resolution
+
+    Samples are matched by file, frame index and handedness. The delta of a
+    pair is the mean absolute difference of its 63 normalized coordinates.
+    """
+    deltas = []
+    lost = 0
+    gained = 0
+    for base_result, result in zip(baseline, candidate):
+        base_samples = _samples_by_key(base_result)
+        samples = _samples_by_key(result)
+        for key, base_landmarks in base_samples.items():
+            if key in samples:
+                deltas.append(float(np.mean(np.abs(samples[key] - base_landmarks))))
+            else:
+                lost += 1
+        gained += sum(1 for key in samples if key not in base_samples)
+
+    deltas = np.asarray(deltas)
+    return {
+        'matched': len(deltas),
+        'lost': lost,
+        'gained': gained,
+        'delta_mean': float(deltas.mean()) if len(deltas) else None,
+        'delta_p95': float(np.percentile(deltas, 95)) if len(deltas) else None
+    }
+
+
+def compare_resolutions(input_path: Path, num_files: int = DEFAULT_REPORT_FILES,
+                        reduce_factors: Optional[List[int]] = None, max_sides: Optional[List[Optional[int]]] = None,
+                        max_frames: int = 100, sampling: Optional[dict] = None, max_hands: int = 1,
+                        max_hit_drop: float = DEFAULT_MAX_HIT_DROP, max_delta: float = DEFAULT_MAX_DELTA,
+                        output_path: Optional[Path] = None) -> dict:
+    """
+    Extract a sample of the dataset at each candidate resolution
+
+    Reports throughput, detection hit rate and landmark deltas against full
+    resolution, and recommends the fastest setting within `max_hit_drop`
+    (fraction of full-resolution samples lost) and `max_delta` (95th
+    percentile landmark delta).
+    """
+    print("=" * 60)
+    print("Resolution Report")
+    print("=" * 60)
+
+    sampling = {**DEFAULT_SAMPLING, **(sampling or {})}
+    hands_config = {**HANDS_CONFIG, 'max_num_hands': max_hands}
+    candidates = candidate_resolutions(reduce_factors or REDUCE_FACTORS, max_sides or [None])
+    files = sample_files(input_path, num_files)
+    if not files:
+        raise ValueError(f"No images or videos found in {input_path / 'metadata.json'}")
+
+    # Read every file once so the first candidate does not pay for a cold disk cache
+    for file_path in files:
+        file_path.read_bytes()
+
+    print(f"Files: {len(files)}, candidates: {len(candidates)}\n")
+
+    rows = []
+    baseline = None
+    for resolution in candidates:
+        run = run_resolution(files, hands_config, resolution, max_frames, sampling)
+        if baseline is None:
+            baseline = run
+
+        samples = sum(len(result[0]) for result in run['results'])
+        base_samples = sum(len(result[0]) for result in baseline['results'])
+        row = {
+            'resolution': resolution,
+            'name': resolution_name(resolution),
+            'seconds': run['seconds'],
+            'files_per_sec': len(files) / run['seconds'] if run['seconds'] else None,
+            'speedup': baseline['seconds'] / run['seconds'] if run['seconds'] else None,
+            'samples': samples,
+            'file_hit_rate': sum(1 for result in run['results'] if len(result[0])) / len(files),
+            'frame_hit_rate': run['used'] / run['decoded'] if run['decoded'] else None,
+            **landmark_deltas(baseline['results'], run['results'])
+        }
+        row['hit_drop'] = row['lost'] / base_samples if base_samples else 0.0
+        rows.append(row)
+        print(f"  {row['name']}: {row['seconds']:.1f}s")
+
+    acceptable = [
+        row for row in rows
+        if row['hit_drop'] <= max_hit_drop and (row['delta_p95'] is None or row['delta_p95'] <= max_delta)
+    ]
+    recommended = max(acceptable, key=lambda row: row['files_per_sec'] or 0.0)
+
+    def fmt(value, spec):
+        return format(value, spec) if value is not None else '-'
+
+    print(f"\n{'Setting':<18}{'Files/s':>9}{'Speedup':>9}{'File hits':>11}{'Frame hits':>12}"
+          f"{'Lost':>7}{'Gained':>8}{'Delta mean':>12}{'Delta p95':>11}")
+    for row in rows:
+        marker = ' *' if row is recommended else ''
+        print(f"{row['name']:<18}{fmt(row['files_per_sec'], '>9.1f')}{fmt(row['speedup'], '>8.2f')}x"
+              f"{row['file_hit_rate']:>11.1%}{fmt(row['frame_hit_rate'], '>12.1%')}"
+              f"{row['lost']:>7}{row['gained']:>8}{fmt(row['delta_mean'], '>12.4f')}"
+              f"{fmt(row['delta_p95'], '>11.4f')}{marker}")
+
+    resolution = recommended['resolution']
+    print(f"\n* Fastest setting losing at most {max_hit_drop:.0%} of detections with p95 delta <= {max_delta}: "
+          f"{recommended['name']}")
+    print(f"  python extract_landmarks.py --reduce {resolution['reduce']}"
+          + (f" --max-side {resolution['max_side']}" if resolution['max_side'] else ''))
+
+    report = {
+        'input': str(input_path),
+        'files': len(files),
+        'max_frames': max_frames,
+        'sampling': sampling,
+        'max_hit_drop': max_hit_drop,
+        'max_delta': max_delta,
+        'candidates': rows,
+        'recommended': resolution
+    }
+    if output_path is not None:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to {output_path}")
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare landmark extraction at reduced decode resolutions')
+    parser.add_argument('--input', type=str, required=True, help='Input directory (processed dataset)')
+    parser.add_argument('--files', type=int, default=DEFAULT_REPORT_FILES, help='Number of files to sample')
+    parser.add_argument('--reduce', type=int, nargs='+', default=REDUCE_FACTORS, choices=REDUCE_FACTORS,
+                        help='Reduce factors to compare')
+    parser.add_argument('--max-sides', type=int, nargs='+', default=None,
+                        help='Long-side caps to combine with each reduce factor')
+    parser.add_argument('--max-frames', type=int, default=100, help='Max frames per video')
+    parser.add_argument('--max-hands', type=int, default=1, help='Max hands extracted per image or frame')
+    parser.add_argument('--max-hit-drop', type=float, default=DEFAULT_MAX_HIT_DROP,
+                        help='Acceptable fraction of full-resolution detections lost')
+    parser.add_argument('--max-delta', type=float, default=DEFAULT_MAX_DELTA,
+                        help='Acceptable 95th percentile landmark delta')
+    parser.add_argument('--output', type=str, default=None, help='Write the report to this JSON file')
+
+    args = parser.parse_args()
+
+    compare_resolutions(
+        Path(args.input),
+        num_files=args.files,
+        reduce_factors=args.reduce,
+        max_sides=[None] + args.max_sides if args.max_sides else None,
+        max_frames=args.max_frames,
+        max_hands=args.max_hands,
+        max_hit_drop=args.max_hit_drop,
+        max_delta=args.max_delta,
+        output_path=Path(args.output) if args.output else None
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+"""
+Sequence Dataset
+Fixed-length landmark windows from videos for dynamic sign models
+"""
+
+import os
+import argparse
+import json
+import numpy as np
+from pathlib import Path
+from typing import Tuple
+from landmark_store import NUM_FEATURES, open_store
+
+SEQUENCE_FORMAT = 'tida-sequences'
+SEQUENCE_VERSION = 1
+
+HEADER_FILE = 'header.json'
+
+DEFAULT_WINDOW = 16
+DEFAULT_WINDOW_STRIDE = 4
+
+# Column name -> (file name, dtype, shape per window given the window length)
+SEQUENCE_COLUMNS = {
+    'windows': ('windows.f32', np.dtype('<f4'), lambda window: (window, NUM_FEATURES)),
+    'masks': ('masks.u8', np.dtype('u1'), lambda window: (window,)),
+    'label_codes': ('labels.i32', np.dtype('<i4'), lambda window: ()),
+    'source_ids': ('sources.i32', np.dtype('<i4'), lambda window: ()),
+    'start_frames': ('starts.i32', np.dtype('<i4'), lambda window: ())
+}
+
+
+def is_sequence_store(path: Path) -> bool:
+    """
+    Check whether a path is a sequence store directory
+    """
+    header_path = Path(path) / HEADER_FILE
+    if not header_path.exists():
+        return False
+    with open(header_path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('format') == SEQUENCE_FORMAT
+
+
+def frame_track(landmarks: np.ndarray, frame_indices: np.ndarray,
+                hand_scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduce one source's samples to a single hand per frame in temporal order
+
+    When a frame has several hands the one with the highest handedness score
+    is kept.
+
+    Returns:
+        Tuple of (landmarks of shape (n, 63), frame indices of shape (n,))
+    """
+    scores = np.nan_to_num(np.asarray(hand_scores, dtype=np.float64), nan=-1.0)
+    order = np.lexsort((-scores, frame_indices))
+    frame_indices = np.asarray(frame_indices)[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = frame_indices[1:] != frame_indices[:-1]
+    return np.asarray(landmarks)[order[first]], frame_indices[first]
+
+
+def make_windows(frames: np.ndarray, window: int, stride: int,
+                 pad: bool = True) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Cut a (n, 63) frame track into windows of `window` frames every `stride` frames
+
+    Tracks shorter than a window become one zero-padded window. With
+    `pad=True` a final partial window covers frames after the last full one.
+
+    Returns:
+        Tuple of (windows (w, T, 63) float32, masks (w, T) bool,
+        start offsets (w,) into the track)
+    """
+    n = len(frames)
+    if n == 0:
+        return np.empty((0, window, NUM_FEATURES), np.float32), np.empty((0, window), bool), np.empty(0, np.int64)
+
+    starts = np.arange(0, max(n - window, 0) + 1, stride)
+    if pad and starts[-1] + window < n:
+        starts = np.append(starts, starts[-1] + stride)
+
+    positions = starts[:, None] + np.arange(window)[None, :]
+    masks = positions < n
+    windows = np.asarray(frames, dtype=np.float32)[np.minimum(positions, n - 1)]
+    windows[~masks] = 0.0
+    return windows, masks, starts
+
+
+def build_sequence_store(store_path: Path, output_path: Path, window: int = DEFAULT_WINDOW,
+                         stride: int = DEFAULT_WINDOW_STRIDE, pad: bool = True, min_frames: int = 1):
+    """
+    Build a sequence store from a landmark store
+
+    Samples of each source file are ordered by frame index and windowed
+    (see make_windows). Sources with fewer than `min_frames` frames with
+    hands (e.g. images when min_frames > 1) are skipped. Windows are
+    streamed to raw column files, like the landmark store.
+    """
+    print("=" * 60)
+    print("Sequence Dataset")
+    print("=" * 60)
+
+    store = open_store(store_path)
+    source_ids = np.asarray(store.source_ids)
+    output_path.mkdir(parents=True, exist_ok=True)
+    (output_path / HEADER_FILE).unlink(missing_ok=True)
+
+    files = {name: open(output_path / file_name, 'wb') for name, (file_name, _, _) in SEQUENCE_COLUMNS.items()}
+
+    # Samples of a source are contiguous in the store
+    boundaries = np.flatnonzero(np.diff(source_ids)) + 1
+    starts = np.concatenate([[0], boundaries]) if len(source_ids) else np.empty(0, np.int64)
+    ends = np.concatenate([boundaries, [len(source_ids)]]) if len(source_ids) else np.empty(0, np.int64)
+
+    num_windows = 0
+    padded_frames = 0
+    skipped = 0
+    for start, end in zip(starts, ends):
+        frames, frame_indices = frame_track(
+            store.landmarks[start:end], store.frame_indices[start:end], store.hand_scores[start:end]
+        )
+        if len(frames) < min_frames:
+            skipped += 1
+            continue
+
+        windows, masks, offsets = make_windows(frames, window, stride, pad)
+        columns = {
+            'windows': windows,
+            'masks': masks,
+            'label_codes': np.full(len(windows), store.label_codes[start]),
+            'source_ids': np.full(len(windows), source_ids[start]),
+            'start_frames': frame_indices[offsets]
+        }
+        for name, values in columns.items():
+            files[name].write(np.asarray(values).astype(SEQUENCE_COLUMNS[name][1]).tobytes())
+
+        num_windows += len(windows)
+        padded_frames += int((~masks).sum())
+
+    for f in files.values():
+        f.close()
+
+    header = {
+        'format': SEQUENCE_FORMAT,
+        'version': SEQUENCE_VERSION,
+        'num_windows': num_windows,
+        'window': window,
+        'stride': stride,
+        'pad': pad,
+        'num_features': NUM_FEATURES,
+        'classes': store.classes,
+        'sources': store.sources,
+        'landmark_store': str(store_path),
+        'metadata': store.header.get('metadata', {})
+    }
+    tmp_path = output_path / f'{HEADER_FILE}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(header, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, output_path / HEADER_FILE)
+
+    size_mb = sum((output_path / file_name).stat().st_size for file_name, _, _ in SEQUENCE_COLUMNS.values()) / 1e6
+    print(f"Windows: {num_windows} of {window} frames (stride {stride}) from {len(starts) - skipped} sources")
+    print(f"Padded frames: {padded_frames} ({padded_frames / max(num_windows * window, 1):.1%})")
+    if skipped:
+        print(f"Skipped {skipped} sources with fewer than {min_frames} frames")
+    print(f"Sequence store saved to: {output_path} ({size_mb:.1f} MB)")
+
+
+class SequenceStore:
+    """
+    Read-only, memory-mapped view of a sequence store
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        if not is_sequence_store(self.path):
+            raise ValueError(f"Not a sequence store (or incomplete): {self.path}")
+
+        with open(self.path / HEADER_FILE, 'r', encoding='utf-8') as f:
+            self.header = json.load(f)
+
+        self.num_windows = self.header['num_windows']
+        self.window = self.header['window']
+        self.classes = self.header['classes']
+        self.sources = self.header['sources']
+
+        for name, (file_name, dtype, shape_fn) in SEQUENCE_COLUMNS.items():
+            shape = (self.num_windows,) + shape_fn(self.window)
+            if self.num_windows == 0:
+                column = np.empty(shape, dtype=dtype)
+            else:
+                column = np.memmap(self.path / file_name, dtype=dtype, mode='r', shape=shape)
+            setattr(self, name, column)
+
+    def __len__(self) -> int:
+        return self.num_windows
+
+    def labels(self) -> np.ndarray:
+        """
+        Decode label codes to label strings
+        """
+        return np.asarray(self.classes, dtype=object)[self.label_codes]
+
+
+def open_sequence_store(path: Path) -> SequenceStore:
+    """
+    Open a sequence store for memory-mapped reading
+    """
+    return SequenceStore(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build landmark windows from a landmark store')
+    parser.add_argument('--input', type=str, required=True, help='Landmark store directory')
+    parser.add_argument('--output', type=str, default='./sequences', help='Output sequence store directory')
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW, help='Frames per window')
+    parser.add_argument('--stride', type=int, default=DEFAULT_WINDOW_STRIDE, help='Frames between window starts')
+    parser.add_argument('--no-pad', action='store_true', help='Drop the trailing partial window')
+    parser.add_argument('--min-frames', type=int, default=1,
+                        help='Skip sources with fewer frames (e.g. 2 to skip images)')
+
+    args = parser.parse_args()
+
+    build_sequence_store(
+        Path(args.input), Path(args.output),
+        window=args.window,
+        stride=args.stride,
+        pad=not args.no_pad,
+        min_frames=args.min_frames
+    )
+
+
+if __name__ == '__main__':
+    main()
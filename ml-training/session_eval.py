@@ -0,0 +1,370 @@
+"""
+Session Evaluation
+Replays recorded landmark streams through the model and the app's letter buffer
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing as mp_proc
+import time
+import numpy as np
+from pathlib import Path
+from typing import List, Optional
+from features import canonicalize_handedness, compute_features, handedness_code, load_feature_spec, normalize_landmarks
+from inference_server import load_keras_predictor, load_label_mapping, load_numpy_predictor
+from landmark_store import handedness_canonicalized, is_store, open_store
+from sequence_dataset import frame_track
+
+# useLetterBuffer(10, 0.6, 0.7) as called in src/App.tsx
+DEFAULT_BUFFER = {
+    'window_size': 10,
+    'min_confidence': 0.6,
+    'consistency_threshold': 0.7
+}
+
+DEFAULT_FPS = 30.0
+
+# Set by _init_replay_worker in each sweep process
+_worker_sessions = None
+
+
+class LetterBuffer:
+    """
+    Port of src/hooks/useLetterBuffer.ts
+
+    Predictions below min_confidence are dropped. Once the buffer holds
+    window_size predictions, the most common letter is shown if it fills at
+    least consistency_threshold of the window and the mean confidence is at
+    least min_confidence; otherwise nothing is shown. Ties go to the letter
+    that entered the window first, as with the Map iteration in the hook.
+    """
+
+    def __init__(self, window_size: int = 10, min_confidence: float = 0.6, consistency_threshold: float = 0.7):
+        self.window_size = window_size
+        self.min_confidence = min_confidence
+        self.consistency_threshold = consistency_threshold
+        self.reset()
+
+    def add_prediction(self, letter: str, confidence: float):
+        if confidence < self.min_confidence:
+            return
+
+        self.buffer.append((letter, confidence))
+        if len(self.buffer) > self.window_size:
+            self.buffer.pop(0)
+
+        if len(self.buffer) >= self.window_size:
+            letter_counts = {}
+            total_confidence = 0.0
+            for buffered_letter, buffered_confidence in self.buffer:
+                letter_counts[buffered_letter] = letter_counts.get(buffered_letter, 0) + 1
+                total_confidence += buffered_confidence
+
+            max_count = 0
+            most_common_letter = ''
+            for buffered_letter, count in letter_counts.items():
+                if count > max_count:
+                    max_count = count
+                    most_common_letter = buffered_letter
+
+            consistency = max_count / self.window_size
+            avg_confidence = total_confidence / self.window_size
+
+            if consistency >= self.consistency_threshold and avg_confidence >= self.min_confidence:
+                self.current_letter = most_common_letter
+                self.confidence = avg_confidence
+            else:
+                self.current_letter = None
+                self.confidence = 0.0
+
+    def reset(self):
+        self.buffer = []
+        self.current_letter: Optional[str] = None
+        self.confidence = 0.0
+
+
+def load_sessions(input_path: Path, fps: float = DEFAULT_FPS, min_frames: int = 2,
+                  canonicalize: bool = False) -> List[dict]:
+    """
+    Load recorded landmark streams
+
+    A landmark store yields one session per video, with the best-scoring
+    hand of each frame in frame order and timestamps from `fps`. A JSON-lines
+    file holds one recording per line:
+    {"label": "A", "timestamps_ms": [...], "landmarks": [[63 values] or null, ...]}
+    with raw MediaPipe landmarks (null where no hand was found). Sessions
+    with fewer than `min_frames` frames with a hand are dropped.
+
+    `canonicalize` mirrors left hands for models trained with
+    canonicalize_handedness. Stores use their handedness column (a store
+    extracted with --canonicalize-hands is already mirrored); JSON-lines
+    records then need a "handedness" list of 'Left' / 'Right' per frame.
+
+    Returns:
+        List of {'source', 'label', 'landmarks' (n, 63), 'timestamps_ms' (n,)}
+    """
+    sessions = []
+
+    if is_store(input_path):
+        store = open_store(input_path)
+        canonicalize = canonicalize and not handedness_canonicalized(input_path)
+        source_ids = np.asarray(store.source_ids)
+        boundaries = np.flatnonzero(np.diff(source_ids)) + 1
+        for start, end in zip(np.concatenate([[0], boundaries]), np.concatenate([boundaries, [len(source_ids)]])):
+            if end <= start:
+                continue
+            landmarks = store.landmarks[start:end]
+            if canonicalize:
+                landmarks = canonicalize_handedness(landmarks, store.handedness[start:end])
+            landmarks, frame_indices = frame_track(
+                landmarks, store.frame_indices[start:end], store.hand_scores[start:end]
+            )
+            sessions.append({
+                'source': store.sources[source_ids[start]],
+                'label': store.classes[store.label_codes[start]],
+                'landmarks': np.asarray(landmarks, dtype=np.float32),
+                'timestamps_ms': frame_indices * (1000.0 / fps)
+            })
+    else:
+        with open(input_path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if canonicalize and 'handedness' not in record:
+                    raise ValueError(f"{input_path}:{line_number}: the model was trained on canonicalized hands, "
+                                     f"recordings need a 'handedness' list")
+                hands = record.get('handedness', [None] * len(record['landmarks']))
+                frames = [(t, lm, hand) for t, lm, hand in zip(record['timestamps_ms'], record['landmarks'], hands)
+                          if lm is not None]
+                timestamps = np.asarray([t for t, _, _ in frames], dtype=np.float64)
+                landmarks = normalize_landmarks(np.asarray([lm for _, lm, _ in frames], dtype=np.float32).reshape(-1, 63))
+                if canonicalize:
+                    landmarks = canonicalize_handedness(landmarks, [handedness_code(hand) for _, _, hand in frames])
+                sessions.append({
+                    'source': record.get('source', f'{input_path.name}:{line_number}'),
+                    'label': record['label'],
+                    'landmarks': np.asarray(landmarks, dtype=np.float32),
+                    'timestamps_ms': timestamps
+                })
+
+    return [session for session in sessions if len(session['landmarks']) >= min_frames]
+
+
+def predict_sessions(sessions: List[dict], predict, labels: List[str], batch_size: int = 4096,
+                     spec: Optional[dict] = None):
+    """
+    Run the model over every frame of every session in large batches
+
+    Adds 'letters' (top-1 label per frame) and 'confidences' to each session.
+    `spec` is the feature spec the model was trained with.
+    """
+    X = compute_features(np.concatenate([session['landmarks'] for session in sessions]), spec)
+    probabilities = np.concatenate([predict(X[i:i + batch_size]) for i in range(0, len(X), batch_size)])
+    top = np.argmax(probabilities, axis=1)
+    confidences = probabilities[np.arange(len(top)), top]
+    letters = np.asarray(labels, dtype=object)[top]
+
+    offset = 0
+    for session in sessions:
+        n = len(session['landmarks'])
+        session['letters'] = letters[offset:offset + n].tolist()
+        session['confidences'] = confidences[offset:offset + n].tolist()
+        offset += n
+
+
+def replay_session(session: dict, buffer_settings: dict) -> dict:
+    """
+    Feed a session's per-frame predictions through a fresh LetterBuffer
+
+    The first letter the buffer shows is what the user would commit.
+
+    Returns:
+        Dict with the committed letter (None if nothing was shown), the number
+        of frames and ms from the session start until it was shown
+    """
+    buffer = LetterBuffer(**buffer_settings)
+    timestamps = session['timestamps_ms']
+    for i, (letter, confidence) in enumerate(zip(session['letters'], session['confidences'])):
+        buffer.add_prediction(letter, confidence)
+        if buffer.current_letter is not None:
+            return {
+                'letter': buffer.current_letter,
+                'frames': i + 1,
+                'ms': float(timestamps[i] - timestamps[0])
+            }
+    return {'letter': None, 'frames': None, 'ms': None}
+
+
+def summarize(sessions: List[dict], replays: List[dict], buffer_settings: dict) -> dict:
+    """
+    Letter-level accuracy and time-to-commit over replayed sessions
+    """
+    committed = [(s, r) for s, r in zip(sessions, replays) if r['letter'] is not None]
+    correct = sum(1 for s, r in committed if r['letter'] == s['label'])
+    frames = np.asarray([r['frames'] for _, r in committed], dtype=np.float64)
+    ms = np.asarray([r['ms'] for _, r in committed], dtype=np.float64)
+
+    def percentile(values: np.ndarray, q: float) -> Optional[float]:
+        return float(np.percentile(values, q)) if len(values) else None
+
+    return {
+        **buffer_settings,
+        'sessions': len(sessions),
+        'letter_accuracy': correct / len(sessions) if sessions else 0.0,
+        'commit_rate': len(committed) / len(sessions) if sessions else 0.0,
+        'wrong_commit_rate': (len(committed) - correct) / len(sessions) if sessions else 0.0,
+        'commit_frames_p50': percentile(frames, 50),
+        'commit_frames_p90': percentile(frames, 90),
+        'commit_ms_p50': percentile(ms, 50),
+        'commit_ms_p90': percentile(ms, 90)
+    }
+
+
+def _init_replay_worker(sessions: List[dict]):
+    """
+    Pool initializer: receive the predicted sessions once per process
+    """
+    global _worker_sessions
+    _worker_sessions = sessions
+
+
+def _replay_task(buffer_settings: dict) -> dict:
+    replays = [replay_session(session, buffer_settings) for session in _worker_sessions]
+    return summarize(_worker_sessions, replays, buffer_settings)
+
+
+def sweep_buffer_settings(sessions: List[dict], window_sizes: List[int], min_confidences: List[float],
+                          consistency_thresholds: List[float], workers: int = 4) -> List[dict]:
+    """
+    Replay all sessions under every buffer setting combination in parallel
+    """
+    grid = [
+        {'window_size': w, 'min_confidence': c, 'consistency_threshold': t}
+        for w, c, t in itertools.product(window_sizes, min_confidences, consistency_thresholds)
+    ]
+    # Only the replay inputs are shipped to the workers
+    replay_sessions = [
+        {'label': s['label'], 'letters': s['letters'], 'confidences': s['confidences'],
+         'timestamps_ms': s['timestamps_ms']}
+        for s in sessions
+    ]
+
+    if workers <= 1:
+        _init_replay_worker(replay_sessions)
+        return [_replay_task(settings) for settings in grid]
+
+    context = mp_proc.get_context('spawn')
+    with context.Pool(workers, initializer=_init_replay_worker, initargs=(replay_sessions,)) as pool:
+        return pool.map(_replay_task, grid)
+
+
+def print_results(results: List[dict]):
+    """
+    Print buffer settings ranked by letter accuracy, then commit latency
+    """
+    def fmt(value, spec):
+        return format(value, spec) if value is not None else '-'
+
+    print(f"\n{'Window':>7}{'Min conf':>10}{'Consist.':>10}{'Accuracy':>10}{'Commit':>8}{'Wrong':>7}"
+          f"{'Frames p50':>12}{'ms p50':>9}{'ms p90':>9}")
+    for r in results:
+        print(f"{r['window_size']:>7}{r['min_confidence']:>10g}{r['consistency_threshold']:>10g}"
+              f"{r['letter_accuracy']:>10.1%}{r['commit_rate']:>8.0%}{r['wrong_commit_rate']:>7.0%}"
+              f"{fmt(r['commit_frames_p50'], '>12.0f')}{fmt(r['commit_ms_p50'], '>9.0f')}"
+              f"{fmt(r['commit_ms_p90'], '>9.0f')}")
+
+
+def evaluate_sessions(model_dir: Path, input_path: Path, output_path: Optional[Path] = None,
+                      backend: str = 'numpy', fps: float = DEFAULT_FPS,
+                      window_sizes: Optional[List[int]] = None, min_confidences: Optional[List[float]] = None,
+                      consistency_thresholds: Optional[List[float]] = None, workers: int = 4) -> List[dict]:
+    """
+    Evaluate letter-level accuracy and time-to-commit of recorded sessions
+
+    Every frame is classified in batch, then the per-frame predictions are
+    replayed through LetterBuffer for each buffer setting (default: the
+    app's settings only).
+    """
+    print("=" * 60)
+    print("Session Evaluation")
+    print("=" * 60)
+
+    spec = load_feature_spec(model_dir)
+    sessions = load_sessions(input_path, fps, canonicalize=spec['canonicalize_handedness'])
+    if not sessions:
+        raise ValueError(f"No sessions with at least 2 frames found in {input_path}")
+    labels = load_label_mapping(model_dir)
+    predict = load_numpy_predictor(model_dir) if backend == 'numpy' else load_keras_predictor(model_dir)
+
+    start = time.perf_counter()
+    predict_sessions(sessions, predict, labels, spec=spec)
+    num_frames = sum(len(s['letters']) for s in sessions)
+    predict_seconds = time.perf_counter() - start
+
+    frame_accuracy = np.mean([
+        letter == s['label'] for s in sessions for letter in s['letters']
+    ])
+    print(f"Sessions: {len(sessions)}, frames: {num_frames} "
+          f"(classified in {predict_seconds:.2f}s, per-frame accuracy {frame_accuracy:.1%})")
+
+    start = time.perf_counter()
+    results = sweep_buffer_settings(
+        sessions,
+        window_sizes or [DEFAULT_BUFFER['window_size']],
+        min_confidences or [DEFAULT_BUFFER['min_confidence']],
+        consistency_thresholds or [DEFAULT_BUFFER['consistency_threshold']],
+        workers
+    )
+    results.sort(key=lambda r: (-r['letter_accuracy'], r['commit_ms_p50'] if r['commit_ms_p50'] is not None else np.inf))
+    print(f"Replayed {len(results)} buffer setting(s) in {time.perf_counter() - start:.2f}s")
+    print_results(results)
+
+    if output_path is not None:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'model': str(model_dir),
+                'input': str(input_path),
+                'fps': fps,
+                'sessions': len(sessions),
+                'frames': num_frames,
+                'frame_accuracy': float(frame_accuracy),
+                'results': results
+            }, f, indent=2)
+        print(f"\nReport saved to {output_path}")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded sessions through the model and the app's letter buffer")
+    parser.add_argument('--model', type=str, default='./model', help='Model directory (model.h5, label_mapping.json)')
+    parser.add_argument('--input', type=str, required=True, help='Landmark store or JSON-lines session recordings')
+    parser.add_argument('--output', type=str, default=None, help='Write the results to this JSON file')
+    parser.add_argument('--backend', type=str, default='numpy', choices=['keras', 'numpy'], help='Inference backend')
+    parser.add_argument('--fps', type=float, default=DEFAULT_FPS, help='Frame rate of videos in a landmark store')
+    parser.add_argument('--window-sizes', type=int, nargs='+', default=None, help='Buffer window sizes to sweep')
+    parser.add_argument('--min-confidences', type=float, nargs='+', default=None,
+                        help='Minimum confidences to sweep')
+    parser.add_argument('--consistency-thresholds', type=float, nargs='+', default=None,
+                        help='Consistency thresholds to sweep')
+    parser.add_argument('--workers', type=int, default=4, help='Parallel replay processes')
+
+    args = parser.parse_args()
+
+    evaluate_sessions(
+        Path(args.model), Path(args.input),
+        output_path=Path(args.output) if args.output else None,
+        backend=args.backend,
+        fps=args.fps,
+        window_sizes=args.window_sizes,
+        min_confidences=args.min_confidences,
+        consistency_thresholds=args.consistency_thresholds,
+        workers=args.workers
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -5,7 +5,32 @@ Downloads TR Sign Language dataset and trains the model
 
 import os
 import sys
+import argparse
+import json
 from pathlib import Path
+from pipeline_metrics import PROFILERS, MetricsWriter
+
+STAGES = ['install', 'download', 'prepare', 'extract', 'train', 'export']
+
+parser = argparse.ArgumentParser(description='Complete training pipeline with the Kaggle dataset')
+parser.add_argument('--metrics', type=str, default='./pipeline_metrics.jsonl',
+                    help='JSON-lines file that stage timings, counters and memory are appended to')
+parser.add_argument('--profile-stage', type=str, default=None, choices=STAGES, help='Profile a single stage')
+parser.add_argument('--profiler', type=str, default='cprofile', choices=PROFILERS,
+                    help='cprofile writes <stage>.prof, py-spy writes a <stage>.svg flame graph')
+parser.add_argument('--profile-dir', type=str, default='./profiles', help='Directory for profiler output')
+args = parser.parse_args()
+
+metrics = MetricsWriter(Path(args.metrics))
+
+
+def stage(name: str):
+    """
+    Metrics context for one pipeline step, profiled if selected with --profile-stage
+    """
+    profiler = args.profiler if args.profile_stage == name else None
+    return metrics.stage(name, profile=profiler, profile_dir=Path(args.profile_dir))
+
 
 print("=" * 70)
 print("TÜRK İŞARET DİLİ MODEL EĞİTİM PİPELINE'I")
@@ -30,18 +55,21 @@ required_packages = [
 
 import subprocess
 
-for package in required_packages:
-    try:
-        if '==' in package:
-            pkg_name = package.split('==')[0]
-        else:
-            pkg_name = package
-        __import__(pkg_name.replace('-', '_'))
-        print(f"✓ {package} zaten yüklü")
-    except ImportError:
-        print(f"⚙ {package} yükleniyor...")
-        subprocess.check_call([sys.executable, '-m', 'pip', 'install', package, '-q'])
-        print(f"✓ {package} yüklendi")
+with stage('install') as counters:
+    counters['installed'] = 0
+    for package in required_packages:
+        try:
+            if '==' in package:
+                pkg_name = package.split('==')[0]
+            else:
+                pkg_name = package
+            __import__(pkg_name.replace('-', '_'))
+            print(f"✓ {package} zaten yüklü")
+        except ImportError:
+            print(f"⚙ {package} yükleniyor...")
+            subprocess.check_call([sys.executable, '-m', 'pip', 'install', package, '-q'])
+            print(f"✓ {package} yüklendi")
+            counters['installed'] += 1
 
 # Step 2: Download dataset
 print("\n[2/6] Kaggle veri seti indiriliyor...")
@@ -49,15 +77,17 @@ print("-" * 70)
 
 import kagglehub
 
-try:
-    path = kagglehub.dataset_download("berkaykocaoglu/tr-sign-language")
-    print(f"✓ Veri seti indirildi: {path}")
-except Exception as e:
-    print(f"✗ Veri seti indirme hatası: {e}")
-    print("\nKaggle kimlik doğrulaması gerekebilir:")
-    print("1. https://www.kaggle.com/settings/account adresinden API token oluşturun")
-    print("2. kaggle.json dosyasını ~/.kaggle/ klasörüne kopyalayın")
-    sys.exit(1)
+with stage('download') as counters:
+    try:
+        path = kagglehub.dataset_download("berkaykocaoglu/tr-sign-language")
+        print(f"✓ Veri seti indirildi: {path}")
+    except Exception as e:
+        print(f"✗ Veri seti indirme hatası: {e}")
+        print("\nKaggle kimlik doğrulaması gerekebilir:")
+        print("1. https://www.kaggle.com/settings/account adresinden API token oluşturun")
+        print("2. kaggle.json dosyasını ~/.kaggle/ klasörüne kopyalayın")
+        sys.exit(1)
+    counters['dataset_mb'] = sum(f.stat().st_size for f in Path(path).rglob('*') if f.is_file()) / 1e6
 
 dataset_path = Path(path)
 print(f"Veri seti konumu: {dataset_path}")
@@ -69,14 +99,17 @@ print("-" * 70)
 from prepare_dataset import prepare_dataset
 
 output_dir = Path("./processed_data")
-try:
-    prepare_dataset(dataset_path, output_dir)
-    print("✓ Veri seti hazırlandı")
-except Exception as e:
-    print(f"✗ Veri seti hazırlama hatası: {e}")
-    import traceback
-    traceback.print_exc()
-    sys.exit(1)
+with stage('prepare') as counters:
+    try:
+        prepare_dataset(dataset_path, output_dir)
+        print("✓ Veri seti hazırlandı")
+    except Exception as e:
+        print(f"✗ Veri seti hazırlama hatası: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+    with open(output_dir / 'metadata.json', 'r', encoding='utf-8') as f:
+        counters['files'] = sum(len(label_files) for label_files in json.load(f)['dataset'].values())
 
 # Step 4: Extract landmarks
 print("\n[4/6] Hand landmark'lar çıkarılıyor...")
@@ -84,15 +117,18 @@ print("-" * 70)
 
 from extract_landmarks import extract_landmarks
 
-landmarks_file = Path("./landmarks.csv")
-try:
-    extract_landmarks(output_dir, landmarks_file, max_frames_per_video=100)
-    print("✓ Landmark'lar çıkarıldı")
-except Exception as e:
-    print(f"✗ Landmark çıkarma hatası: {e}")
-    import traceback
-    traceback.print_exc()
-    sys.exit(1)
+landmarks_file = Path("./landmarks")
+landmark_cache_dir = Path("./.landmark_cache")
+with stage('extract'):
+    try:
+        extract_landmarks(output_dir, landmarks_file, max_frames_per_video=100, cache_dir=landmark_cache_dir,
+                          metrics=metrics)
+        print("✓ Landmark'lar çıkarıldı")
+    except Exception as e:
+        print(f"✗ Landmark çıkarma hatası: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
 
 # Step 5: Train model
 print("\n[5/6] Model eğitiliyor...")
@@ -101,14 +137,19 @@ print("-" * 70)
 from train_model import train_model
 
 model_dir = Path("./model")
-try:
-    train_model(landmarks_file, model_dir, epochs=100, batch_size=32)
-    print("✓ Model eğitildi")
-except Exception as e:
-    print(f"✗ Model eğitme hatası: {e}")
-    import traceback
-    traceback.print_exc()
-    sys.exit(1)
+with stage('train') as counters:
+    try:
+        train_model(landmarks_file, model_dir, epochs=100, batch_size=32)
+        print("✓ Model eğitildi")
+    except Exception as e:
+        print(f"✗ Model eğitme hatası: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+    with open(model_dir / 'model_metadata.json', 'r', encoding='utf-8') as f:
+        model_metadata = json.load(f)
+    counters['test_accuracy'] = model_metadata.get('test_accuracy')
+    counters['epochs'] = model_metadata.get('epochs_trained')
 
 # Step 6: Export to TensorFlow.js
 print("\n[6/6] Model TensorFlow.js formatına dönüştürülüyor...")
@@ -117,14 +158,17 @@ print("-" * 70)
 from export_model import export_model
 
 tfjs_output = Path("../public/model")
-try:
-    export_model(model_dir, tfjs_output)
-    print("✓ Model export edildi")
-except Exception as e:
-    print(f"✗ Model export hatası: {e}")
-    import traceback
-    traceback.print_exc()
-    sys.exit(1)
+with stage('export'):
+    try:
+        export_model(model_dir, tfjs_output)
+        print("✓ Model export edildi")
+    except Exception as e:
+        print(f"✗ Model export hatası: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+metrics.close()
 
 # Success!
 print("\n" + "=" * 70)
@@ -133,6 +177,7 @@ print("=" * 70)
 print(f"\n📊 Model konumu: {tfjs_output}")
 print(f"📁 Landmark verisi: {landmarks_file}")
 print(f"🎯 Eğitim klasörü: {model_dir}")
+print(f"⏱ Aşama metrikleri: {args.metrics}")
 print("\n🚀 Sonraki adımlar:")
 print("1. src/App.tsx dosyasındaki gerçek model kodunu aktif edin")
 print("2. Development server'ı yeniden başlatın: npm run dev")
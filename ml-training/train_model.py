@@ -3,18 +3,28 @@ Model Training Script
 Trains an MLP classifier for Turkish Sign Language recognition
 """
 
+import os
 import argparse
+import multiprocessing as mp_proc
 import numpy as np
 import pandas as pd
 from pathlib import Path
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import StratifiedGroupKFold, StratifiedKFold, train_test_split
 from sklearn.preprocessing import LabelEncoder
-from sklearn.metrics import classification_report, confusion_matrix
+from sklearn.metrics import classification_report, confusion_matrix, f1_score
 import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras import layers
 import matplotlib.pyplot as plt
 import json
+import time
+from functools import partial
+from typing import List, Optional
+from landmark_store import LANDMARK_COLUMNS, handedness_canonicalized, is_store, open_store
+from features import DEFAULT_FEATURE_SPEC, FEATURE_SPECS, HANDEDNESS_LABELS, NUM_FEATURES, compute_features, feature_spec
+from sequence_dataset import is_sequence_store, open_sequence_store
+from input_pipeline import ThroughputCallback, make_dataset
+from augmentation import DEFAULT_AUGMENTATION, benchmark_augmentation, make_augment_fn
 
 # Turkish alphabet
 TSL_ALPHABET = [
@@ -23,53 +33,219 @@ TSL_ALPHABET = [
     'R', 'S', 'Ş', 'T', 'U', 'Ü', 'V', 'Y', 'Z'
 ]
 
+# Datasets at least this large use the tf.data pipeline with pipeline='auto'
+TFDATA_MIN_SAMPLES = 200000
 
-def load_data(csv_path: Path):
+# MLP hidden layers and optimizer settings (see create_model)
+# dropout None derives one rate per hidden layer (see default_dropout)
+DEFAULT_ARCHITECTURE = {
+    'hidden_units': [256, 128, 64],
+    'dropout': None,
+    'learning_rate': 0.001
+}
+
+# 'mlp' classifies single frames; the others classify sequence windows
+MODEL_TYPES = ['mlp', 'conv1d', 'gru']
+
+
+def load_data(input_path: Path, handedness: Optional[str] = None, min_hand_score: float = 0.0,
+              return_groups: bool = False):
     """
-    Load landmarks from CSV
+    Load landmarks from a landmark store directory or CSV
+
+    Stores are memory-mapped, so X is not parsed or copied up front.
+    `handedness` ('Left' / 'Right') and `min_hand_score` keep only matching
+    samples, using the hand columns written by extract_landmarks.
+
+    A sequence store (see sequence_dataset.py) loads windows of shape
+    (N, T, 63) instead; the hand filters do not apply to it.
+
+    With `return_groups=True` the source file id of each sample is returned
+    as a third value (None for a CSV, which has no source column).
     """
     print("Loading data...")
-    df = pd.read_csv(csv_path)
+    if is_sequence_store(input_path):
+        store = open_sequence_store(input_path)
+        print(f"Loaded {len(store)} windows of {store.window} frames")
+        if return_groups:
+            return store.windows, store.labels(), np.asarray(store.source_ids)
+        return store.windows, store.labels()
+    
+    groups = None
+    if is_store(input_path):
+        store = open_store(input_path)
+        X = store.landmarks
+        y = store.labels()
+        groups = np.asarray(store.source_ids)
+        hand_codes = np.asarray(store.handedness)
+        hand_scores = np.asarray(store.hand_scores)
+    else:
+        df = pd.read_csv(input_path, keep_default_na=False, na_values={'hand_score': ['']})
+        
+        # Separate features and labels
+        X = df[LANDMARK_COLUMNS].values
+        y = df['label'].values
+        hand_codes = np.array([HANDEDNESS_LABELS.index(name) if name in HANDEDNESS_LABELS else -1
+                               for name in df.get('handedness', [''] * len(df))])
+        hand_scores = df['hand_score'].values if 'hand_score' in df else np.full(len(df), np.nan)
     
-    # Separate features and labels
-    X = df.drop('label', axis=1).values
-    y = df['label'].values
+    if handedness is not None or min_hand_score > 0:
+        mask = np.ones(len(X), dtype=bool)
+        if handedness is not None:
+            mask &= hand_codes == HANDEDNESS_LABELS.index(handedness)
+        if min_hand_score > 0:
+            mask &= hand_scores >= min_hand_score
+        print(f"Keeping {int(mask.sum())} of {len(X)} samples (handedness: {handedness or 'any'}, "
+              f"min hand score: {min_hand_score})")
+        X, y = np.asarray(X[mask]), y[mask]
+        if groups is not None:
+            groups = groups[mask]
     
     print(f"Loaded {len(X)} samples with {X.shape[1]} features")
     print(f"Classes: {sorted(set(y))}")
     
+    if return_groups:
+        return X, y, groups
     return X, y
 
 
-def create_model(input_shape: int, num_classes: int):
+def split_indices(y_encoded: np.ndarray, groups: Optional[np.ndarray] = None):
+    """
+    Stratified 80/20 train/test split of sample indices
+
+    With `groups` (the source file of each sample) every source lands on one
+    side of the split; sequence stores need this because the overlapping
+    windows of a video are near copies of each other.
+
+    Shared with export_model so held-out metrics use the same test set.
+    """
+    if groups is None:
+        return train_test_split(
+            np.arange(len(y_encoded)), test_size=0.2, random_state=42, stratify=y_encoded
+        )
+
+    splitter = StratifiedGroupKFold(n_splits=5, shuffle=True, random_state=42)
+    return next(splitter.split(np.arange(len(y_encoded)), y_encoded, groups))
+
+
+def fold_indices(y_encoded: np.ndarray, groups: Optional[np.ndarray], folds: int, seed: int = 42):
+    """
+    Stratified k-fold splits of sample indices, grouped by source file
+
+    All samples of a source file (e.g. every frame of a video) land in the
+    same fold, so no file is in both train and test. Without groups (CSV
+    input) samples are split individually.
+
+    Returns:
+        List of (train_idx, test_idx) pairs
+    """
+    indices = np.arange(len(y_encoded))
+    if groups is None:
+        print("Warning: No source files in the input (CSV?), folds are not grouped by file")
+        splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+        return list(splitter.split(indices, y_encoded))
+
+    splitter = StratifiedGroupKFold(n_splits=folds, shuffle=True, random_state=seed)
+    return list(splitter.split(indices, y_encoded, groups))
+
+
+def default_dropout(num_layers: int) -> List[float]:
+    """
+    Dropout rates for an MLP: 0.3 after each hidden layer, 0.2 before the output
+    """
+    return [0.3] * (num_layers - 1) + [0.2]
+
+
+def resolve_architecture(architecture: Optional[dict] = None) -> dict:
+    """
+    Fill in DEFAULT_ARCHITECTURE and derive dropout rates from the layer count
+
+    Extra keys (e.g. a sweep's batch_size) are kept.
+    """
+    architecture = {**DEFAULT_ARCHITECTURE, **(architecture or {})}
+    if not architecture['dropout']:
+        architecture['dropout'] = default_dropout(len(architecture['hidden_units']))
+    return architecture
+
+
+def create_model(input_shape: int, num_classes: int, hidden_units: Optional[List[int]] = None,
+                 dropout: Optional[List[float]] = None):
     """
     Create MLP model
+
+    Each hidden layer is Dense + ReLU, BatchNormalization and Dropout.
+    Defaults to DEFAULT_ARCHITECTURE.
     """
+    hidden_units = hidden_units or DEFAULT_ARCHITECTURE['hidden_units']
+    dropout = dropout or default_dropout(len(hidden_units))
+    if len(dropout) == 1:
+        dropout = dropout * len(hidden_units)
+    if len(dropout) != len(hidden_units):
+        raise ValueError("dropout needs one rate, or one rate per hidden layer")
+    
+    hidden_layers = []
+    for units, rate in zip(hidden_units, dropout):
+        hidden_layers += [
+            layers.Dense(units, activation='relu'),
+            layers.BatchNormalization(),
+            layers.Dropout(rate)
+        ]
+    
     model = keras.Sequential([
         layers.Input(shape=(input_shape,)),
+        *hidden_layers,
         
-        # First hidden layer
-        layers.Dense(256, activation='relu'),
-        layers.BatchNormalization(),
-        layers.Dropout(0.3),
-        
-        # Second hidden layer
-        layers.Dense(128, activation='relu'),
-        layers.BatchNormalization(),
-        layers.Dropout(0.3),
-        
-        # Third hidden layer
+        # Output layer
+        layers.Dense(num_classes, activation='softmax')
+    ])
+    
+    return model
+
+
+def create_sequence_model(window: int, num_features: int, num_classes: int, architecture: str = 'conv1d'):
+    """
+    Create a small temporal model over landmark windows
+
+    Padded frames are all zeros; the GRU skips them with a Masking layer.
+    """
+    if architecture == 'gru':
+        temporal = [
+            layers.Masking(mask_value=0.0),
+            layers.GRU(64)
+        ]
+    else:
+        temporal = [
+            layers.Conv1D(64, 3, padding='same', activation='relu'),
+            layers.Conv1D(64, 3, padding='same', activation='relu'),
+            layers.GlobalAveragePooling1D()
+        ]
+    
+    model = keras.Sequential([
+        layers.Input(shape=(window, num_features)),
+        *temporal,
         layers.Dense(64, activation='relu'),
-        layers.BatchNormalization(),
         layers.Dropout(0.2),
-        
-        # Output layer
         layers.Dense(num_classes, activation='softmax')
     ])
     
     return model
 
 
+def measure_inference_ms(model: keras.Model, repeats: int = 200) -> float:
+    """
+    Median latency in milliseconds of a single-sample forward pass
+    """
+    sample = tf.zeros((1,) + tuple(model.input_shape[1:]))
+    model(sample, training=False)  # warm up
+    
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model(sample, training=False).numpy()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
 def plot_training_history(history, output_dir: Path):
     """
     Plot training history
@@ -99,16 +275,58 @@ def plot_training_history(history, output_dir: Path):
     print(f"Training history plot saved to {output_dir / 'training_history.png'}")
 
 
-def train_model(input_path: Path, output_path: Path, epochs: int = 100, batch_size: int = 32):
+def train_model(input_path: Path, output_path: Path, epochs: int = 100, batch_size: int = 32,
+                pipeline: str = 'arrays', shuffle_buffer: int = 10000, cache: Optional[str] = None,
+                augmentation: Optional[dict] = None, sample_filter: Optional[dict] = None,
+                model_type: str = 'mlp', fps_budget: float = 30.0,
+                architecture: Optional[dict] = None, features: str = DEFAULT_FEATURE_SPEC):
     """
     Train the model
+
+    pipeline='arrays' feeds NumPy arrays to model.fit; pipeline='tfdata'
+    streams batches from the (memory-mapped) landmark data through a tf.data
+    pipeline with a bounded shuffle buffer, optional cache ('memory' or a
+    file path), on-the-fly augmentation and prefetching.
+    pipeline='auto' picks tfdata for datasets of TFDATA_MIN_SAMPLES or more.
+
+    `augmentation` (overrides for augmentation.DEFAULT_AUGMENTATION) enables
+    batched landmark augmentation inside the tf.data pipeline.
+
+    `sample_filter` ({'handedness': ..., 'min_hand_score': ...}) is passed to
+    load_data() and saved in the metadata so export uses the same samples.
+
+    model_type 'conv1d' or 'gru' trains a sequence model on a sequence store
+    and compares its per-window inference latency with the per-frame MLP
+    against a real-time budget of one prediction per frame at `fps_budget`.
+
+    `architecture` overrides DEFAULT_ARCHITECTURE (hidden_units, dropout,
+    learning_rate), e.g. with the winner of hparam_sweep.py.
+
+    `features` names the feature spec (see features.FEATURE_SPECS) computed
+    from the landmarks of an MLP; it is saved in the metadata so export and
+    inference compute the same inputs.
     """
+    architecture = resolve_architecture(architecture)
     print("=" * 60)
     print("Model Training")
     print("=" * 60)
     
     # Load data
-    X, y = load_data(input_path)
+    X, y, groups = load_data(input_path, **(sample_filter or {}), return_groups=True)
+    
+    if (model_type == 'mlp') != (X.ndim == 2):
+        raise ValueError(f"Model type '{model_type}' needs "
+                         f"{'a landmark store or CSV' if model_type == 'mlp' else 'a sequence store'} as input")
+    if augmentation is not None and model_type != 'mlp':
+        print("Warning: Augmentation supports single-frame samples only, disabling it")
+        augmentation = None
+    if features != DEFAULT_FEATURE_SPEC and model_type != 'mlp':
+        print(f"Warning: Feature spec '{features}' supports single-frame samples only, using {DEFAULT_FEATURE_SPEC}")
+        features = DEFAULT_FEATURE_SPEC
+    # A store extracted with --canonicalize-hands holds mirrored left hands;
+    # the spec records it so inference mirrors them as well
+    spec = {**feature_spec(features), 'canonicalize_handedness': handedness_canonicalized(input_path)}
+    feature_fn = partial(compute_features, spec=spec) if model_type == 'mlp' else None
     
     # Encode labels
     label_encoder = LabelEncoder()
@@ -118,20 +336,37 @@ def train_model(input_path: Path, output_path: Path, epochs: int = 100, batch_si
     print(f"\nNumber of classes: {num_classes}")
     print(f"Classes: {label_encoder.classes_}")
     
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y_encoded, test_size=0.2, random_state=42, stratify=y_encoded
-    )
+    # Split data; windows of one video stay on one side
+    train_idx, test_idx = split_indices(y_encoded, groups if X.ndim == 3 else None)
+    X_test, y_test = np.asarray(X[test_idx]), y_encoded[test_idx]
+    if feature_fn is not None:
+        X_test = feature_fn(X_test)
+    
+    print(f"\nTraining samples: {len(train_idx)}")
+    print(f"Testing samples: {len(test_idx)}")
+    
+    if pipeline == 'auto':
+        pipeline = 'tfdata' if len(X) >= TFDATA_MIN_SAMPLES else 'arrays'
+    if augmentation is not None and pipeline == 'arrays':
+        print("Augmentation runs inside the tf.data pipeline, switching to pipeline='tfdata'")
+        pipeline = 'tfdata'
+    print(f"Input pipeline: {pipeline}")
     
-    print(f"\nTraining samples: {len(X_train)}")
-    print(f"Testing samples: {len(X_test)}")
+    augment_throughput = None
+    if augmentation is not None:
+        augment_throughput = benchmark_augmentation(augmentation, batch_size)
+        print(f"Augmentation throughput: {augment_throughput:,.0f} samples/sec")
     
     # Create model
-    model = create_model(X.shape[1], num_classes)
+    if model_type == 'mlp':
+        print(f"Features: {spec['name']} ({spec['num_features']} inputs)")
+        model = create_model(spec['num_features'], num_classes, architecture['hidden_units'], architecture['dropout'])
+    else:
+        model = create_sequence_model(X.shape[1], X.shape[2], num_classes, model_type)
     
     # Compile model
     model.compile(
-        optimizer=keras.optimizers.Adam(learning_rate=0.001),
+        optimizer=keras.optimizers.Adam(learning_rate=architecture['learning_rate']),
         loss='sparse_categorical_crossentropy',
         metrics=['accuracy']
     )
@@ -140,7 +375,9 @@ def train_model(input_path: Path, output_path: Path, epochs: int = 100, batch_si
     model.summary()
     
     # Callbacks
+    throughput = ThroughputCallback(len(train_idx))
     callbacks = [
+        throughput,
         keras.callbacks.EarlyStopping(
             monitor='val_loss',
             patience=15,
@@ -156,14 +393,43 @@ def train_model(input_path: Path, output_path: Path, epochs: int = 100, batch_si
     
     # Train model
     print("\nTraining model...")
-    history = model.fit(
-        X_train, y_train,
-        validation_data=(X_test, y_test),
-        epochs=epochs,
-        batch_size=batch_size,
-        callbacks=callbacks,
-        verbose=1
-    )
+    if pipeline == 'tfdata':
+        augment_fn = make_augment_fn(augmentation) if augmentation is not None else None
+        train_ds = make_dataset(
+            X, y_encoded, train_idx, batch_size,
+            training=True, shuffle_buffer=shuffle_buffer, cache=cache,
+            augment_fn=augment_fn, seed=42, feature_fn=feature_fn
+        )
+        val_ds = make_dataset(X, y_encoded, test_idx, batch_size, training=False, feature_fn=feature_fn)
+        history = model.fit(
+            train_ds,
+            validation_data=val_ds,
+            epochs=epochs,
+            callbacks=callbacks,
+            verbose=1
+        )
+    else:
+        X_train = np.asarray(X[train_idx])
+        if feature_fn is not None:
+            X_train = feature_fn(X_train)
+        history = model.fit(
+            X_train, y_encoded[train_idx],
+            validation_data=(X_test, y_test),
+            epochs=epochs,
+            batch_size=batch_size,
+            callbacks=callbacks,
+            verbose=1
+        )
+    
+    throughput_report = throughput.report()
+    if throughput_report['epochs']:
+        print(f"\nThroughput ({pipeline}): {throughput_report['mean_samples_per_sec']:.0f} samples/sec "
+              f"(first epoch {throughput_report['first_epoch_samples_per_sec']:.0f})")
+        if augment_throughput is not None:
+            throughput_report['augmentation_samples_per_sec'] = augment_throughput
+            if augment_throughput < 2 * throughput_report['mean_samples_per_sec']:
+                print("Warning: Augmentation throughput is less than 2x training throughput "
+                      "and may starve training")
     
     # Evaluate model
     print("\nEvaluating model...")
@@ -178,6 +444,20 @@ def train_model(input_path: Path, output_path: Path, epochs: int = 100, batch_si
     print("\nClassification Report:")
     print(classification_report(y_test, y_pred, target_names=label_encoder.classes_))
     
+    # Per-window cost of a sequence model vs the per-frame MLP
+    inference_cost = None
+    if model_type != 'mlp':
+        inference_cost = {
+            'window_ms': measure_inference_ms(model),
+            'mlp_frame_ms': measure_inference_ms(create_model(NUM_FEATURES, num_classes)),
+            'budget_ms': 1000.0 / fps_budget
+        }
+        print(f"\nInference: {model_type} {inference_cost['window_ms']:.2f} ms/window, "
+              f"MLP {inference_cost['mlp_frame_ms']:.2f} ms/frame, "
+              f"budget {inference_cost['budget_ms']:.1f} ms/frame at {fps_budget:g} fps")
+        if inference_cost['window_ms'] > inference_cost['budget_ms']:
+            print("Warning: The sequence model does not fit the real-time budget")
+    
     # Save model
     output_path.mkdir(parents=True, exist_ok=True)
     model_path = output_path / 'model.h5'
@@ -196,13 +476,21 @@ def train_model(input_path: Path, output_path: Path, epochs: int = 100, batch_si
     metadata = {
         'num_classes': num_classes,
         'classes': label_encoder.classes_.tolist(),
-        'input_shape': X.shape[1],
+        'input_shape': spec['num_features'] if X.ndim == 2 else list(X.shape[1:]),
+        'model_type': model_type,
+        'architecture': architecture,
         'test_accuracy': float(test_accuracy),
         'test_loss': float(test_loss),
         'epochs_trained': len(history.history['loss']),
         'total_samples': len(X),
-        'train_samples': len(X_train),
-        'test_samples': len(X_test)
+        'train_samples': len(train_idx),
+        'test_samples': len(test_idx),
+        'input_pipeline': pipeline,
+        'throughput': throughput_report,
+        'sample_filter': sample_filter or {},
+        'feature_spec': {key: value for key, value in spec.items() if key != 'num_features'},
+        'canonicalize_handedness': spec['canonicalize_handedness'],
+        'inference_cost': inference_cost
     }
     
     with open(output_path / 'model_metadata.json', 'w', encoding='utf-8') as f:
@@ -214,19 +502,314 @@ def train_model(input_path: Path, output_path: Path, epochs: int = 100, batch_si
     print("=" * 60)
 
 
+# Set by _init_fold_worker in each fold process
+_fold_data = None
+
+
+def _init_fold_worker(data_path: str, sample_filter: dict, intra_op_threads: int, inter_op_threads: int):
+    """
+    Pool initializer: pin TensorFlow threads, then load the data once per process
+
+    TensorFlow is already imported here (unpickling the initializer imports
+    this module), so the thread environment variables are set by
+    cross_validate before the workers are spawned.
+    """
+    global _fold_data
+
+    tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+
+    X, y = load_data(Path(data_path), **sample_filter)
+    _fold_data = {'X': X, 'y_encoded': LabelEncoder().fit_transform(y)}
+
+
+def run_fold(fold: int, train_idx: np.ndarray, val_idx: np.ndarray, test_idx: np.ndarray, epochs: int,
+             batch_size: int, architecture: dict, model_type: str, spec: dict) -> dict:
+    """
+    Train and evaluate one fold in a worker process
+
+    Early stopping and learning-rate decay watch `val_idx`, carved from the
+    training files, so the test fold is only used for the final evaluation.
+    """
+    start = time.perf_counter()
+    X, y_encoded = _fold_data['X'], _fold_data['y_encoded']
+    num_classes = int(y_encoded.max()) + 1
+
+    X_train, X_val, X_test = np.asarray(X[train_idx]), np.asarray(X[val_idx]), np.asarray(X[test_idx])
+    if X.ndim == 2:
+        X_train, X_val, X_test = (compute_features(X_split, spec) for X_split in (X_train, X_val, X_test))
+        model = create_model(spec['num_features'], num_classes, architecture['hidden_units'], architecture['dropout'])
+    else:
+        model = create_sequence_model(X.shape[1], X.shape[2], num_classes, model_type)
+    y_train, y_val, y_test = y_encoded[train_idx], y_encoded[val_idx], y_encoded[test_idx]
+
+    model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=architecture['learning_rate']),
+        loss='sparse_categorical_crossentropy',
+        metrics=['accuracy']
+    )
+
+    # Same callbacks as train_model(), monitoring the validation files
+    fit_start = time.perf_counter()
+    history = model.fit(
+        X_train, y_train,
+        validation_data=(X_val, y_val),
+        epochs=epochs,
+        batch_size=batch_size,
+        callbacks=[
+            keras.callbacks.EarlyStopping(monitor='val_loss', patience=15, restore_best_weights=True),
+            keras.callbacks.ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=5, min_lr=1e-6)
+        ],
+        verbose=0
+    )
+    fit_seconds = time.perf_counter() - fit_start
+
+    test_loss, test_accuracy = model.evaluate(X_test, y_test, verbose=0)
+    y_pred = np.argmax(model.predict(X_test, verbose=0), axis=1)
+
+    return {
+        'fold': fold,
+        'train_samples': len(train_idx),
+        'validation_samples': len(val_idx),
+        'test_samples': len(test_idx),
+        'test_accuracy': float(test_accuracy),
+        'test_loss': float(test_loss),
+        'macro_f1': float(f1_score(y_test, y_pred, average='macro')),
+        'epochs_trained': len(history.history['loss']),
+        'fit_seconds': fit_seconds,
+        'seconds': time.perf_counter() - start
+    }
+
+
+def cross_validate(input_path: Path, output_path: Path, folds: int = 5, epochs: int = 100, batch_size: int = 32,
+                   workers: Optional[int] = None, threads_per_fold: Optional[int] = None,
+                   inter_op_threads: int = 1, sample_filter: Optional[dict] = None,
+                   model_type: str = 'mlp', architecture: Optional[dict] = None,
+                   features: str = DEFAULT_FEATURE_SPEC) -> dict:
+    """
+    Stratified k-fold cross-validation, grouped by source file
+
+    Folds train concurrently in `workers` spawned processes (default: one per
+    fold, up to the CPU count). Each process pins TensorFlow to
+    `threads_per_fold` intra-op threads (default: CPU count / workers) and
+    `inter_op_threads` inter-op threads, so the folds do not oversubscribe
+    the CPU. Folds use the 'arrays' input pipeline without augmentation.
+    A fifth of each fold's training files is set aside as validation data
+    for early stopping (see run_fold).
+
+    Writes cv_results.json with per-fold metrics and timing and the mean and
+    standard deviation across folds.
+    """
+    architecture = resolve_architecture(architecture)
+    sample_filter = sample_filter or {}
+    print("=" * 60)
+    print(f"{folds}-Fold Cross-Validation")
+    print("=" * 60)
+
+    X, y, groups = load_data(input_path, **sample_filter, return_groups=True)
+    if (model_type == 'mlp') != (X.ndim == 2):
+        raise ValueError(f"Model type '{model_type}' needs "
+                         f"{'a landmark store or CSV' if model_type == 'mlp' else 'a sequence store'} as input")
+    if features != DEFAULT_FEATURE_SPEC and model_type != 'mlp':
+        print(f"Warning: Feature spec '{features}' supports single-frame samples only, using {DEFAULT_FEATURE_SPEC}")
+        features = DEFAULT_FEATURE_SPEC
+    spec = feature_spec(features)
+
+    y_encoded = LabelEncoder().fit_transform(y)
+    splits = fold_indices(y_encoded, groups, folds)
+
+    # Grouped validation split of each fold's training files for the callbacks
+    fit_splits = []
+    for train_idx, _ in splits:
+        fit_rel, val_rel = split_indices(y_encoded[train_idx], groups[train_idx] if groups is not None else None)
+        fit_splits.append((train_idx[fit_rel], train_idx[val_rel]))
+
+    cpu_count = os.cpu_count() or 1
+    workers = workers or min(folds, cpu_count)
+    threads_per_fold = threads_per_fold or max(1, cpu_count // workers)
+    print(f"\nFolds: {folds}, workers: {workers}, threads per fold: {threads_per_fold} intra-op / "
+          f"{inter_op_threads} inter-op")
+    if groups is not None:
+        print(f"Source files: {len(np.unique(groups))}")
+
+    start = time.perf_counter()
+    results = []
+    context = mp_proc.get_context('spawn')
+    # Spawned workers inherit the environment and import TensorFlow on start,
+    # so its thread pool sizes must be in the environment before the pool
+    thread_env = {
+        'OMP_NUM_THREADS': str(threads_per_fold),
+        'TF_NUM_INTRAOP_THREADS': str(threads_per_fold),
+        'TF_NUM_INTEROP_THREADS': str(inter_op_threads)
+    }
+    saved_env = {var: os.environ.get(var) for var in thread_env}
+    os.environ.update(thread_env)
+    with context.Pool(workers, initializer=_init_fold_worker,
+                      initargs=(str(input_path), sample_filter, threads_per_fold, inter_op_threads)) as pool:
+        # The workers have started; restore this process's environment
+        for var, value in saved_env.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+        async_results = [
+            pool.apply_async(run_fold, (fold, fit_idx, val_idx, test_idx, epochs, batch_size,
+                                        architecture, model_type, spec))
+            for fold, ((fit_idx, val_idx), (_, test_idx)) in enumerate(zip(fit_splits, splits))
+        ]
+        for async_result in async_results:
+            result = async_result.get()
+            if groups is not None:
+                result['test_files'] = int(len(np.unique(groups[splits[result['fold']][1]])))
+            results.append(result)
+            print(f"Fold {result['fold']}: accuracy {result['test_accuracy']:.4f} after "
+                  f"{result['epochs_trained']} epochs in {result['seconds']:.1f}s")
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{'Fold':>4}{'Train':>9}{'Val':>8}{'Test':>8}{'Files':>7}{'Epochs':>8}{'Fit (s)':>9}{'Total (s)':>11}"
+          f"{'Accuracy':>10}{'Macro F1':>10}{'Loss':>9}")
+    for result in results:
+        print(f"{result['fold']:>4}{result['train_samples']:>9}{result['validation_samples']:>8}"
+              f"{result['test_samples']:>8}"
+              f"{result.get('test_files', '-'):>7}{result['epochs_trained']:>8}{result['fit_seconds']:>9.1f}"
+              f"{result['seconds']:>11.1f}{result['test_accuracy']:>10.4f}{result['macro_f1']:>10.4f}"
+              f"{result['test_loss']:>9.4f}")
+
+    summary = {}
+    for metric in ['test_accuracy', 'macro_f1', 'test_loss', 'epochs_trained', 'seconds']:
+        values = np.array([result[metric] for result in results], dtype=np.float64)
+        summary[metric] = {'mean': float(values.mean()), 'std': float(values.std())}
+
+    fold_seconds = sum(result['seconds'] for result in results)
+    print(f"\nAccuracy: {summary['test_accuracy']['mean']:.4f} ± {summary['test_accuracy']['std']:.4f}, "
+          f"macro F1: {summary['macro_f1']['mean']:.4f} ± {summary['macro_f1']['std']:.4f}")
+    print(f"Wall time: {elapsed:.1f}s for {fold_seconds:.1f}s of fold time "
+          f"({fold_seconds / elapsed:.1f}x concurrency)")
+
+    report = {
+        'input': str(input_path),
+        'folds': folds,
+        'grouped_by_source': groups is not None,
+        'workers': workers,
+        'threads_per_fold': threads_per_fold,
+        'inter_op_threads': inter_op_threads,
+        'epochs': epochs,
+        'batch_size': batch_size,
+        'model_type': model_type,
+        'architecture': architecture,
+        'feature_spec': spec['name'],
+        'sample_filter': sample_filter,
+        'elapsed_seconds': elapsed,
+        'summary': summary,
+        'per_fold': results
+    }
+
+    output_path.mkdir(parents=True, exist_ok=True)
+    results_path = output_path / 'cv_results.json'
+    with open(results_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print("\n" + "=" * 60)
+    print(f"Cross-validation results saved to: {results_path}")
+    print("=" * 60)
+
+    return report
+
+
 def main():
     parser = argparse.ArgumentParser(description='Train TSL recognition model')
-    parser.add_argument('--input', type=str, required=True, help='Input CSV file (landmarks)')
+    parser.add_argument('--input', type=str, required=True, help='Input landmark store or CSV file')
     parser.add_argument('--output', type=str, default='./model', help='Output directory')
     parser.add_argument('--epochs', type=int, default=100, help='Number of epochs')
     parser.add_argument('--batch-size', type=int, default=32, help='Batch size')
+    parser.add_argument('--pipeline', type=str, default='arrays', choices=['arrays', 'tfdata', 'auto'],
+                        help='Input pipeline (tfdata streams batches with prefetching)')
+    parser.add_argument('--shuffle-buffer', type=int, default=10000, help='tf.data shuffle buffer size')
+    parser.add_argument('--cache', type=str, default=None,
+                        help="tf.data cache: 'memory' or a file path (disabled if omitted)")
+    parser.add_argument('--model-type', type=str, default='mlp', choices=MODEL_TYPES,
+                        help='mlp for single frames, conv1d or gru for sequence windows')
+    parser.add_argument('--hidden-units', type=int, nargs='+', default=DEFAULT_ARCHITECTURE['hidden_units'],
+                        help='MLP hidden layer widths')
+    parser.add_argument('--dropout', type=float, nargs='+', default=DEFAULT_ARCHITECTURE['dropout'],
+                        help='Dropout rate, or one rate per hidden layer (default: 0.3, and 0.2 for the last layer)')
+    parser.add_argument('--learning-rate', type=float, default=DEFAULT_ARCHITECTURE['learning_rate'],
+                        help='Adam learning rate')
+    parser.add_argument('--features', type=str, default=DEFAULT_FEATURE_SPEC, choices=list(FEATURE_SPECS),
+                        help='Feature spec computed from the landmarks (MLP only)')
+    parser.add_argument('--fps-budget', type=float, default=30.0,
+                        help='Frame rate the sequence model must keep up with')
+    parser.add_argument('--handedness', type=str, default=None, choices=HANDEDNESS_LABELS,
+                        help='Train only on samples of this handedness')
+    parser.add_argument('--min-hand-score', type=float, default=0.0,
+                        help='Drop samples with a lower handedness score')
+    parser.add_argument('--folds', type=int, default=None,
+                        help='Run K-fold cross-validation grouped by source file instead of a single split')
+    parser.add_argument('--workers', type=int, default=None, help='Folds trained concurrently (default: one per fold)')
+    parser.add_argument('--threads-per-fold', type=int, default=None,
+                        help='TensorFlow intra-op threads per fold (default: CPU count / workers)')
+    parser.add_argument('--inter-op-threads', type=int, default=1, help='TensorFlow inter-op threads per fold')
+    parser.add_argument('--augment', action='store_true', help='Enable on-the-fly landmark augmentation')
+    parser.add_argument('--aug-rotation', type=float, default=DEFAULT_AUGMENTATION['rotation_deg'],
+                        help='Max rotation in degrees')
+    parser.add_argument('--aug-scale', type=float, nargs=2,
+                        default=[DEFAULT_AUGMENTATION['scale_min'], DEFAULT_AUGMENTATION['scale_max']],
+                        help='Scale range (min max)')
+    parser.add_argument('--aug-mirror', type=float, default=DEFAULT_AUGMENTATION['mirror_prob'],
+                        help='Probability of a handedness flip')
+    parser.add_argument('--aug-jitter', type=float, default=DEFAULT_AUGMENTATION['jitter'],
+                        help='Coordinate jitter stddev')
+    parser.add_argument('--aug-z-noise', type=float, default=DEFAULT_AUGMENTATION['z_noise'],
+                        help='Extra depth noise stddev')
     
     args = parser.parse_args()
     
     input_path = Path(args.input)
     output_path = Path(args.output)
+    architecture = {
+        'hidden_units': args.hidden_units,
+        'dropout': args.dropout,
+        'learning_rate': args.learning_rate
+    }
+    sample_filter = {
+        'handedness': args.handedness,
+        'min_hand_score': args.min_hand_score
+    }
+    
+    if args.folds:
+        if args.augment or args.pipeline != 'arrays':
+            print("Warning: Cross-validation uses the arrays pipeline without augmentation")
+        cross_validate(
+            input_path, output_path, args.folds, args.epochs, args.batch_size,
+            workers=args.workers,
+            threads_per_fold=args.threads_per_fold,
+            inter_op_threads=args.inter_op_threads,
+            sample_filter=sample_filter,
+            model_type=args.model_type,
+            architecture=architecture,
+            features=args.features
+        )
+        return
     
-    train_model(input_path, output_path, args.epochs, args.batch_size)
+    train_model(
+        input_path, output_path, args.epochs, args.batch_size,
+        pipeline=args.pipeline,
+        shuffle_buffer=args.shuffle_buffer,
+        cache=args.cache,
+        augmentation={
+            'rotation_deg': args.aug_rotation,
+            'scale_min': args.aug_scale[0],
+            'scale_max': args.aug_scale[1],
+            'mirror_prob': args.aug_mirror,
+            'jitter': args.aug_jitter,
+            'z_noise': args.aug_z_noise
+        } if args.augment else None,
+        model_type=args.model_type,
+        architecture=architecture,
+        fps_budget=args.fps_budget,
+        features=args.features,
+        sample_filter=sample_filter
+    )
 
 
 if __name__ == '__main__':
@@ -6,6 +6,7 @@ import { Controls } from './components/Controls';
 import { useLetterBuffer } from './hooks/useLetterBuffer';
 import { useTTS } from './hooks/useTTS';
 import { mockPredictLetter } from './ml/predictLetter';
+import type { Handedness } from './ml/features';
 // import { loadModel, predictLetter } from './ml/predictLetter'; // Uncomment when model is ready
 
 function App() {
@@ -15,7 +16,7 @@ function App() {
   const lastCommittedLetterRef = useRef<string | null>(null);
 
   // Handle landmarks from camera
-  const handleLandmarksDetected = useCallback((landmarks: number[]) => {
+  const handleLandmarksDetected = useCallback((landmarks: number[], _handedness: Handedness) => {
     if (landmarks.length !== 63) return;
 
     // TODO: Replace with actual model prediction when ready
@@ -27,7 +28,7 @@ function App() {
     }
 
     // Uncomment when model is ready:
-    // predictLetter(landmarks).then((prediction) => {
+    // predictLetter(landmarks, _handedness).then((prediction) => {
     //   if (prediction) {
     //     addPrediction(prediction.letter, prediction.confidence);
     //   }
@@ -1,9 +1,10 @@
 import React from 'react';
 import { useWebcam } from '../hooks/useWebcam';
 import { useHandTracking } from '../hooks/useHandTracking';
+import type { Handedness } from '../ml/features';
 
 interface CameraViewProps {
-    onLandmarksDetected?: (landmarks: number[]) => void;
+    onLandmarksDetected?: (landmarks: number[], handedness: Handedness) => void;
 }
 
 export const CameraView: React.FC<CameraViewProps> = ({ onLandmarksDetected }) => {
@@ -16,7 +17,7 @@ export const CameraView: React.FC<CameraViewProps> = ({ onLandmarksDetected }) =
     // Pass landmarks to parent component
     React.useEffect(() => {
         if (currentLandmarks && onLandmarksDetected) {
-            onLandmarksDetected(currentLandmarks.landmarks);
+            onLandmarksDetected(currentLandmarks.landmarks, currentLandmarks.handedness);
         }
     }, [currentLandmarks, onLandmarksDetected]);
 
@@ -1,9 +1,10 @@
 import { useEffect, useRef, useState, useCallback } from 'react';
 import { HandLandmarker, FilesetResolver, HandLandmarkerResult } from '@mediapipe/tasks-vision';
+import type { Handedness } from '../ml/features';
 
 export interface NormalizedLandmarks {
     landmarks: number[]; // Flattened array of [x, y, z] coordinates
-    handedness: string; // 'Left' or 'Right'
+    handedness: Handedness; // 'Left', 'Right' or 'Unknown'
 }
 
 export interface UseHandTrackingReturn {
@@ -69,7 +70,7 @@ export const useHandTracking = (
         }
 
         const landmarks = result.landmarks[0]; // Take first hand
-        const handedness = result.handedness[0]?.[0]?.categoryName || 'Unknown';
+        const handedness = (result.handedness[0]?.[0]?.categoryName || 'Unknown') as Handedness;
 
         // Flatten landmarks: [x1, y1, z1, x2, y2, z2, ...]
         const flatLandmarks: number[] = [];
@@ -0,0 +1,125 @@
+// Mirror of ml-training/features.py: computes model inputs from the
+// feature_spec.json written next to the exported model
+
+export interface FeatureSpec {
+    name: string;
+    scale: [number, number] | null;
+    rotate: [number, number] | null;
+    fingertip_distances: Array<[number, number]>;
+    joint_angles: Array<[number, number, number]>;
+    // Set when the model was trained on mirrored left hands (--canonicalize-hands)
+    canonicalize_handedness?: boolean;
+    num_features: number;
+}
+
+export type Handedness = 'Left' | 'Right' | 'Unknown';
+
+// Models exported before feature specs existed were trained on wrist-relative landmarks
+export const RAW_FEATURE_SPEC: FeatureSpec = {
+    name: 'raw-v1',
+    scale: null,
+    rotate: null,
+    fingertip_distances: [],
+    joint_angles: [],
+    canonicalize_handedness: false,
+    num_features: 63,
+};
+
+const EPS = 1e-6;
+
+let featureSpec: FeatureSpec = RAW_FEATURE_SPEC;
+
+/**
+ * Load the feature spec of the exported model
+ * @param specPath URL of feature_spec.json
+ * @returns The spec, or raw-v1 if the file is missing
+ */
+export const loadFeatureSpec = async (specPath: string = '/model/feature_spec.json'): Promise<FeatureSpec> => {
+    try {
+        const response = await fetch(specPath);
+        featureSpec = response.ok ? await response.json() : RAW_FEATURE_SPEC;
+    } catch {
+        featureSpec = RAW_FEATURE_SPEC;
+    }
+    return featureSpec;
+};
+
+export const getFeatureSpec = (): FeatureSpec => {
+    return featureSpec;
+};
+
+/**
+ * Compute model input features for one hand
+ * @param landmarks Flattened array of [x, y, z] coordinates (63 values for 21 landmarks)
+ * @param spec Feature spec the model was trained with
+ * @param handedness Detected hand; left hands are mirrored if the spec canonicalizes handedness
+ * @returns Feature vector of spec.num_features values
+ */
+export const computeFeatures = (
+    landmarks: number[],
+    spec: FeatureSpec = featureSpec,
+    handedness?: Handedness
+): number[] => {
+    // Points relative to the wrist (landmark 0), left hands mirrored into right-hand space
+    const mirror = spec.canonicalize_handedness && handedness === 'Left' ? -1 : 1;
+    const points: number[][] = [];
+    for (let i = 0; i < landmarks.length; i += 3) {
+        points.push([
+            (landmarks[i] - landmarks[0]) * mirror,
+            landmarks[i + 1] - landmarks[1],
+            landmarks[i + 2] - landmarks[2],
+        ]);
+    }
+
+    // Divide by palm size
+    if (spec.scale) {
+        const [a, b] = spec.scale;
+        const palm = Math.hypot(
+            points[b][0] - points[a][0],
+            points[b][1] - points[a][1],
+            points[b][2] - points[a][2]
+        );
+        const scale = palm > EPS ? palm : 1;
+        for (const point of points) {
+            point[0] /= scale;
+            point[1] /= scale;
+            point[2] /= scale;
+        }
+    }
+
+    // Rotate the in-plane axis to point up (-y)
+    if (spec.rotate) {
+        const [a, b] = spec.rotate;
+        const axisX = points[b][0] - points[a][0];
+        const axisY = points[b][1] - points[a][1];
+        const length = Math.hypot(axisX, axisY);
+        const cos = length > EPS ? -axisY / length : 1;
+        const sin = length > EPS ? -axisX / length : 0;
+        for (const point of points) {
+            const [x, y] = point;
+            point[0] = x * cos - y * sin;
+            point[1] = x * sin + y * cos;
+        }
+    }
+
+    const features = points.flat();
+
+    for (const [a, b] of spec.fingertip_distances) {
+        features.push(Math.hypot(
+            points[a][0] - points[b][0],
+            points[a][1] - points[b][1],
+            points[a][2] - points[b][2]
+        ));
+    }
+
+    // Angle at the middle landmark, in units of pi
+    for (const [a, b, c] of spec.joint_angles) {
+        const u = [0, 1, 2].map((axis) => points[a][axis] - points[b][axis]);
+        const w = [0, 1, 2].map((axis) => points[c][axis] - points[b][axis]);
+        const norms = Math.hypot(u[0], u[1], u[2]) * Math.hypot(w[0], w[1], w[2]);
+        const cosine = (u[0] * w[0] + u[1] * w[1] + u[2] * w[2]) / (norms > EPS ? norms : 1);
+        features.push(Math.acos(Math.min(1, Math.max(-1, cosine))) / Math.PI);
+    }
+
+    return features;
+};
@@ -1,4 +1,5 @@
 import * as tf from '@tensorflow/tfjs';
+import { loadFeatureSpec } from './features';
 
 let model: tf.LayersModel | null = null;
 
@@ -10,7 +11,8 @@ export const loadModel = async (modelPath: string = '/model/model.json'): Promis
 
         console.log('Loading TensorFlow.js model from:', modelPath);
         model = await tf.loadLayersModel(modelPath);
-        console.log('Model loaded successfully');
+        const spec = await loadFeatureSpec(modelPath.replace(/model\.json$/, 'feature_spec.json'));
+        console.log(`Model loaded successfully (features: ${spec.name})`);
 
         return model;
     } catch (error) {
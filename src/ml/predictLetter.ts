@@ -1,5 +1,6 @@
 import * as tf from '@tensorflow/tfjs';
 import { getModel } from './modelLoader';
+import { computeFeatures, getFeatureSpec, type Handedness } from './features';
 
 // Turkish Sign Language alphabet (29 letters)
 export const TSL_ALPHABET = [
@@ -15,38 +16,28 @@ export interface PredictionResult {
 }
 
 /**
- * Normalize landmarks to prepare for model input
+ * Compute model input features from landmarks
  * @param landmarks Flattened array of [x, y, z] coordinates (63 values for 21 landmarks)
- * @returns Normalized tensor
+ * @param handedness Detected hand
+ * @returns Feature tensor, as specified by the exported feature_spec.json
  */
-const normalizeLandmarks = (landmarks: number[]): tf.Tensor2D => {
-    // Convert to tensor
-    const tensor = tf.tensor2d([landmarks], [1, landmarks.length]);
-
-    // Normalize to [0, 1] range (landmarks are already in relative coordinates)
-    // Additional normalization: center around wrist (landmark 0)
-    const wristX = landmarks[0];
-    const wristY = landmarks[1];
-    const wristZ = landmarks[2];
-
-    const normalized: number[] = [];
-    for (let i = 0; i < landmarks.length; i += 3) {
-        normalized.push(
-            landmarks[i] - wristX,     // x relative to wrist
-            landmarks[i + 1] - wristY, // y relative to wrist
-            landmarks[i + 2] - wristZ  // z relative to wrist
-        );
-    }
+const normalizeLandmarks = (landmarks: number[], handedness?: Handedness): tf.Tensor2D => {
+    // Same wrist-relative normalization and features as training (ml-training/features.py)
+    const features = computeFeatures(landmarks, getFeatureSpec(), handedness);
 
-    return tf.tensor2d([normalized], [1, normalized.length]);
+    return tf.tensor2d([features], [1, features.length]);
 };
 
 /**
  * Predict letter from hand landmarks
  * @param landmarks Flattened array of hand landmarks
+ * @param handedness Detected hand, required by models trained on canonicalized hands
  * @returns Prediction result with letter and confidence
  */
-export const predictLetter = async (landmarks: number[]): Promise<PredictionResult | null> => {
+export const predictLetter = async (
+    landmarks: number[],
+    handedness?: Handedness
+): Promise<PredictionResult | null> => {
     const model = getModel();
 
     if (!model) {
@@ -59,9 +50,14 @@ export const predictLetter = async (landmarks: number[]): Promise<PredictionResu
         return null;
     }
 
+    if (getFeatureSpec().canonicalize_handedness && (!handedness || handedness === 'Unknown')) {
+        console.error('Model was trained on canonicalized hands, handedness is required');
+        return null;
+    }
+
     try {
         // Normalize landmarks
-        const inputTensor = normalizeLandmarks(landmarks);
+        const inputTensor = normalizeLandmarks(landmarks, handedness);
 
         // Make prediction
         const prediction = model.predict(inputTensor) as tf.Tensor;